@@ -0,0 +1,11 @@
+# `python gmgn_scrapper <command>` or `python -m gmgn_scrapper <command>` from the
+# repository root runs the CLI (see cli.py). The scripts import each other as
+# top-level modules, so their directory goes on the path first.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+main()
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from extractor import extract_fields, extract_fields_in_page, text_from_html
+from readiness import StageTimer, stage_timeout_ms
+from network_capture import capture_token_security
+from pipeline_metrics import SCRAPE_SECONDS
+from pipeline_supervisor import probe_page, run_with_watchdog
+from runtime_config import CONFIG
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Token page URL template and the panel holding the security metrics (see
+# runtime_config.py).
+BASE_URL = CONFIG.token_url
+TARGET_SELECTOR = CONFIG.target_selector
+
+# How long a page may take to render the target panel (milliseconds).
+READY_TIMEOUT_MS = stage_timeout_ms("ready")
+
+# "network" decodes the token security XHR the page loads (falling back to
+# "dom" if it does not arrive; experimental, see network_capture.py); "dom" extracts the fields inside the page and
+# returns only the values; "html" transfers the panel HTML and parses it with
+# BeautifulSoup.
+EXTRACTION_MODE = "dom"
+
+# =============================================================================
+# Page Scraping
+# =============================================================================
+
+async def scrape_token_page(page, url, timer, ready_selector=TARGET_SELECTOR, timeout_ms=READY_TIMEOUT_MS,
+                            mode=EXTRACTION_MODE):
+    """
+    Navigate an already-open page to `url`, wait until the target panel is
+    rendered (or, in "network" mode, until its data arrives) and return the
+    fields extracted from it (same dict as extract_data). The "ready" and
+    "extract" stages are recorded on `timer`.
+    """
+    navigated = False
+    if mode == "network":
+        token = url.rstrip("/").rsplit("/", 1)[-1]
+        try:
+            with timer.stage("ready"):
+                navigated, extracted = await capture_token_security(page, url, token)
+            if extracted is not None:
+                return extracted
+            print(f"Security payload for {token} missing or not decodable; reading the panel instead.")
+        except Exception as e:
+            # The page may still show the previous token's panel, so the
+            # navigation is retried below rather than read as is.
+            print(f"Navigation to {token} failed ({e}); retrying it to read the panel.")
+        mode = "dom"
+    with timer.stage("ready"):
+        if not navigated:
+            await page.goto(url, wait_until="commit", timeout=timeout_ms)
+        await page.wait_for_selector(ready_selector, timeout=timeout_ms)
+    with timer.stage("extract"):
+        if mode == "dom":
+            return await extract_fields_in_page(page, ready_selector)
+        return extract_fields(text_from_html(await page.inner_html(ready_selector)))
+
+# =============================================================================
+# Worker Pool
+# =============================================================================
+
+async def _worker(worker_id, session, queue, on_result, url_template, ready_selector, timeout_ms, mode, stats):
+    """
+    Analyze tokens from the queue on pages borrowed from the browser session
+    until a None sentinel arrives. A page whose renderer stops answering is
+    given up on within seconds (see pipeline_supervisor) instead of holding
+    the worker until the stage timeouts expire.
+    """
+    while True:
+        token = await queue.get()
+        try:
+            if token is None:
+                return
+            url = url_template.format(placeholder=token)
+            timer = StageTimer(token)
+            start = time.perf_counter()
+            try:
+                async with session.page() as page:
+                    extracted = await run_with_watchdog(
+                        scrape_token_page(page, url, timer, ready_selector, timeout_ms, mode),
+                        f"page of worker {worker_id}", lambda: probe_page(page))
+                SCRAPE_SECONDS.labels(mode=mode).observe(time.perf_counter() - start)
+                print(f"[worker {worker_id}] Scraped {token} in {time.perf_counter() - start:.2f}s")
+                stats["done"] += 1
+            except Exception as e:
+                print(f"[worker {worker_id}] Error scraping {token}: {e}")
+                stats["failed"] += 1
+                extracted = None
+            try:
+                on_result(token, extracted, timer)
+            except Exception as e:
+                print(f"[worker {worker_id}] Error handling result for {token}: {e}")
+        finally:
+            queue.task_done()
+
+async def run_analyzer_pool(session, queue, on_result, workers=4, url_template=BASE_URL,
+                            ready_selector=TARGET_SELECTOR, timeout_ms=READY_TIMEOUT_MS, mode=EXTRACTION_MODE):
+    """
+    Analyze tokens from `queue` with `workers` pages of one BrowserSession in
+    use concurrently. For every token `on_result(token, extracted, timer)` is
+    called; extracted is None when the page could not be scraped, and timer is
+    the token's StageTimer. Put one None per worker on the queue to shut the
+    pool down. Returns a dict with the number of tokens done and failed.
+    """
+    stats = {"done": 0, "failed": 0}
+    await asyncio.gather(*(
+        _worker(i, session, queue, on_result, url_template, ready_selector, timeout_ms, mode, stats)
+        for i in range(workers)
+    ))
+    return stats
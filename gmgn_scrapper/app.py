@@ -1,22 +1,252 @@
-from fastapi import FastAPI, HTTPException
-import uvicorn
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pipeline_metrics import render as render_metrics
+from token_bus import TokenBus, make_event, subscribe_all
+from token_index import TOKEN_INDEX_PATH
+from token_metrics import DEFAULT_QUERY_LIMIT, MAX_QUERY_LIMIT, TokenMetrics, TokenMetricsCache
 
-app = FastAPI()
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Discovery audit file; the ring is seeded from its last lines at startup.
+TOKEN_FILE_PATH = "./data/new_coins.txt"
+
+# Where new tokens come from after startup: "bus" follows the token bus served by
+# the discovery script; "file" watches TOKEN_FILE_PATH for appended lines.
+TOKEN_FEED = "bus"
+
+# Number of recent tokens kept in memory (the most /recent can return).
+RING_SIZE = 1000
+
+# Seconds between size checks of the token file in "file" mode.
+FILE_POLL_INTERVAL = 0.5
+
+# Seconds between SSE keep-alive comments on an idle /stream connection.
+STREAM_KEEPALIVE = 15
+
+# Database holding the analyzed token metrics (shared with the token index).
+METRICS_DB_PATH = TOKEN_INDEX_PATH
+
+# =============================================================================
+# Recent Token Ring
+# =============================================================================
+
+# Most recent token events ({"token", "source", "ts"}), oldest first.
+recent = deque(maxlen=RING_SIZE)
+
+# Fan-out to /stream clients; each gets its own bounded queue.
+feed = TokenBus()
+
+def ingest(event):
+    """
+    Add a token event to the ring and push it to every /stream client.
+    """
+    recent.append(event)
+    feed.publish(event)
+
+def read_last_lines(path, n, block_size=65536):
+    """
+    Return the last `n` non-empty lines of a file, reading backwards from the
+    end in blocks, so the cost depends on `n` and not on the file size.
+    Returns (lines, file_size).
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        position = size
+        data = b""
+        while position > 0 and data.count(b"\n") <= n:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = [line.strip() for line in data.decode("utf-8", errors="replace").splitlines()]
+    lines = [line for line in lines if line]
+    return lines[-n:], size
+
+def seed_ring():
+    """
+    Fill the ring from the tail of the token file. Returns the file size, from
+    where a file watcher continues.
+    """
+    if not os.path.exists(TOKEN_FILE_PATH):
+        return 0
+    lines, size = read_last_lines(TOKEN_FILE_PATH, RING_SIZE)
+    mtime = os.path.getmtime(TOKEN_FILE_PATH)
+    for line in lines:
+        recent.append(make_event(line, "file", mtime))
+    return size
+
+def read_appended(path, offset):
+    """
+    Complete lines appended to `path` since byte `offset`. Returns (lines, new_offset).
+    """
+    size = os.path.getsize(path)
+    if size < offset:
+        # Truncated or replaced: start over.
+        offset = 0
+    if size == offset:
+        return [], offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    end = data.rfind(b"\n") + 1
+    lines = [line.strip() for line in data[:end].decode("utf-8", errors="replace").splitlines()]
+    return [line for line in lines if line], offset + end
+
+async def follow_token_file(offset):
+    """
+    Watch the token file and ingest appended tokens (file reads run off the
+    event loop).
+    """
+    while True:
+        try:
+            if os.path.exists(TOKEN_FILE_PATH):
+                lines, offset = await asyncio.to_thread(read_appended, TOKEN_FILE_PATH, offset)
+                now = time.time()
+                for line in lines:
+                    ingest(make_event(line, "file", now))
+        except Exception as e:
+            print(f"Error following {TOKEN_FILE_PATH}: {e}")
+        await asyncio.sleep(FILE_POLL_INTERVAL)
+
+async def follow_token_bus():
+    """
+    Ingest tokens from the token bus served by the discovery script (by
+    every discovery instance).
+    """
+    async for event in subscribe_all():
+        if event.get("token"):
+            ingest(event)
+
+# Analyzed token metrics and the LRU cache of hot rows (opened at startup).
+store = {"metrics": None, "cache": None}
+
+@asynccontextmanager
+async def lifespan(app):
+    # Opening creates the schema; the handlers then query from worker threads
+    # (the connection is shared under TokenMetrics' lock).
+    store["metrics"] = await asyncio.to_thread(TokenMetrics, METRICS_DB_PATH)
+    store["cache"] = TokenMetricsCache(store["metrics"])
+    offset = await asyncio.to_thread(seed_ring)
+    print(f"Seeded the recent token ring with {len(recent)} tokens.")
+    task = asyncio.create_task(follow_token_bus() if TOKEN_FEED == "bus" else follow_token_file(offset))
+    try:
+        yield
+    finally:
+        task.cancel()
+        store["metrics"].close()
+
+app = FastAPI(lifespan=lifespan)
+
+# =============================================================================
+# Endpoints
+# =============================================================================
 
 @app.get("/")
 async def get_text():
     """
-    Reads the content of a text file and returns only the last line as JSON.
-    Replace './data/new_coins.txt' with the path to your file.
+    Returns the most recently discovered token as JSON, from the in-memory ring.
     """
-    try:
-        with open("./data/new_coins.txt", "r") as file:
-            lines = file.readlines()
-            # Check if the file has any lines
-            last_line = lines[-1].strip() if lines else "File is empty."
-        return {"last_line": last_line}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {"last_line": recent[-1]["token"] if recent else "File is empty."}
+
+@app.get("/recent")
+async def get_recent(n: int = Query(10, ge=1, le=RING_SIZE)):
+    """
+    Returns up to `n` recently discovered tokens, newest first.
+    """
+    count = min(n, len(recent))
+    return {"tokens": [recent[-i] for i in range(1, count + 1)]}
+
+@app.get("/stream")
+async def stream(request: Request):
+    """
+    Server-Sent Events feed: one `data: {"token", "source", "ts"}` message per
+    newly discovered token, as it arrives.
+    """
+    queue = feed.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            feed.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/tokens/{address}")
+async def get_token(address: str):
+    """
+    Latest metrics and risk score of one analyzed token. Served from the LRU
+    cache of hot rows; the database is only read on a miss, off the event loop.
+    """
+    found, row = store["cache"].lookup(address)
+    if not found:
+        row = await asyncio.to_thread(store["metrics"].get, address)
+        store["cache"].put(address, row)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Token {address} has not been analyzed.")
+    # Rows are plain JSON types; returning a JSONResponse skips FastAPI's
+    # per-field encoding pass, which dominates the response time otherwise.
+    return JSONResponse(row)
+
+@app.get("/tokens/{address}/history")
+async def get_token_history(address: str, since: Optional[float] = Query(None, description="epoch seconds")):
+    """
+    Time series of one analyzed token, oldest first: its first analysis and
+    every re-sample the analyzer took since (see rescore_scheduler.py).
+    """
+    rows = await asyncio.to_thread(store["metrics"].history, address, since=since)
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"Token {address} has not been analyzed.")
+    return JSONResponse({"address": address, "samples": rows})
+
+@app.get("/tokens")
+async def list_tokens(
+    max_top10: Optional[float] = None,
+    audit: Optional[str] = None,
+    since: Optional[float] = Query(None, description="epoch seconds"),
+    max_risk: Optional[float] = None,
+    max_rug_prob: Optional[float] = None,
+    limit: int = Query(DEFAULT_QUERY_LIMIT, ge=1, le=MAX_QUERY_LIMIT),
+):
+    """
+    Analyzed tokens matching every given filter, most recently analyzed first,
+    e.g. /tokens?max_top10=30&audit=Safe&since=1739712000. Percentages are
+    given as numbers (30 for 30%); the risk score is 0-100.
+    """
+    rows = await asyncio.to_thread(store["metrics"].query, max_top10=max_top10, audit=audit, since=since, max_risk=max_risk,
+                                   max_rug_prob=max_rug_prob, limit=limit)
+    return JSONResponse({"tokens": rows})
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Pipeline metrics in the Prometheus text format: discovery ticks, stage
+    durations, discovery-to-analysis latency, extraction failures per field,
+    backlog size and Chrome restarts, from the snapshots the discovery and
+    analyzer scripts write (empty when metrics are disabled).
+    """
+    body = await asyncio.to_thread(render_metrics, "api")
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
+    # Only the server itself needs uvicorn; importing app (tests, the CLI) does not.
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
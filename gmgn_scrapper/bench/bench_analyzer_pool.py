@@ -0,0 +1,85 @@
+"""
+Analyzer pool throughput benchmark.
+
+Serves token pages from the local fixture server (the security panel renders
+after --render-delay ms) and measures tokens/minute of
+analyzer_pool.run_analyzer_pool for several worker counts on one browser,
+with in-page ("dom"), BeautifulSoup ("html") and token security XHR
+("network") extraction.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_analyzer_pool.py [--tokens 40] [--workers 1 2 4 8] [--render-delay 500]
+"""
+import argparse
+import asyncio
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from analyzer_pool import run_analyzer_pool  # noqa: E402
+from browser_session import BrowserSession  # noqa: E402
+from fixture_server import expected_metrics, free_port, start_fixture_server  # noqa: E402
+
+async def run_once(chrome_path, base_url, tokens, workers, mode):
+    queue = asyncio.Queue()
+    for token in tokens:
+        queue.put_nowait(token)
+    for _ in range(workers):
+        queue.put_nowait(None)
+
+    mismatched = []
+
+    def on_result(token, extracted, timer):
+        if extracted is None or extracted != expected_metrics(token):
+            mismatched.append(token)
+
+    with tempfile.TemporaryDirectory() as profile_dir:
+        session = BrowserSession(chrome_path, free_port(), profile_dir, headless=True)
+        try:
+            # Browser startup is paid once per session, not per token, so it is
+            # kept out of the measured time.
+            await session.ensure_started()
+            start = time.perf_counter()
+            stats = await run_analyzer_pool(session, queue, on_result, workers,
+                                            base_url + "/sol/token/{placeholder}", mode=mode)
+            elapsed = time.perf_counter() - start
+        finally:
+            await session.close()
+    return stats, elapsed, mismatched
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=40, help="tokens to analyze per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="worker counts to try")
+    parser.add_argument("--render-delay", type=int, default=500, help="ms before the fixture renders the panel")
+    parser.add_argument("--mode", choices=["dom", "html", "network", "all"], default="all",
+                        help="extraction mode (in-page, BeautifulSoup or network payload)")
+    parser.add_argument("--chrome", default=None, help="path to a Chrome/Chromium executable")
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(args.render_delay)
+    tokens = [f"Bench{i:04d}pump" for i in range(args.tokens)]
+    results = []
+    try:
+        modes = ["html", "dom", "network"] if args.mode == "all" else [args.mode]
+        for mode in modes:
+            for workers in args.workers:
+                stats, elapsed, mismatched = await run_once(args.chrome, base_url, tokens, workers, mode)
+                results.append((mode, workers, stats, elapsed, mismatched))
+    finally:
+        server.shutdown()
+
+    print()
+    for mode, workers, stats, elapsed, mismatched in results:
+        print(
+            f"mode={mode:<7} workers={workers:<3} done={stats['done']:<4} failed={stats['failed']:<3} "
+            f"mismatched={len(mismatched):<3} elapsed={elapsed:7.2f}s  "
+            f"throughput={stats['done'] / elapsed * 60:8.1f} tokens/min"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+API load test with a large token file.
+
+Writes a token file with --lines lines, then serves it with app.py (the token
+ring, fed by the file watcher) and with the original handler (readlines() on
+every request) and measures requests/second for GET / and GET /recent with
+--concurrency clients for --duration seconds each. Finally appends a few
+tokens to the file and checks they arrive on the /stream SSE feed.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_api.py [--lines 1000000] [--duration 5] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import app as token_app  # noqa: E402
+from fixture_server import free_port  # noqa: E402
+
+def legacy_app(token_file):
+    """
+    The original app.py endpoint: readlines() on every request.
+    """
+    legacy = FastAPI()
+
+    @legacy.get("/")
+    async def get_text():
+        try:
+            with open(token_file, "r") as file:
+                lines = file.readlines()
+                last_line = lines[-1].strip() if lines else "File is empty."
+            return {"last_line": last_line}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return legacy
+
+def serve(kind, token_file, port):
+    if kind == "legacy":
+        asgi_app = legacy_app(token_file)
+    else:
+        token_app.TOKEN_FILE_PATH = token_file
+        token_app.TOKEN_FEED = "file"
+        asgi_app = token_app.app
+    uvicorn.run(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+
+def start_server(kind, token_file):
+    """
+    Run one of the apps in its own process, so the load generator does not
+    compete with it for the GIL. Returns (process, base_url) once it answers.
+    """
+    port = free_port()
+    process = multiprocessing.Process(target=serve, args=(kind, token_file, port), daemon=True)
+    process.start()
+    base_url = f"http://127.0.0.1:{port}"
+    while True:
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+
+async def load(url, duration, concurrency):
+    """
+    Hammer `url` with `concurrency` clients for `duration` seconds. Returns
+    (requests, errors, seconds).
+    """
+    counts = {"ok": 0, "errors": 0}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                try:
+                    response = await client.get(url)
+                    counts["ok" if response.status_code == 200 else "errors"] += 1
+                except httpx.HTTPError:
+                    counts["errors"] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return counts["ok"], counts["errors"], elapsed
+
+async def check_stream(base_url, token_file, count=5):
+    """
+    Append `count` tokens to the file and return the ones received on /stream
+    with their delivery latency (ms).
+    """
+    received = {}
+    written_at = {}
+
+    async def listen():
+        async with httpx.AsyncClient(timeout=None) as client:
+            async with client.stream("GET", base_url + "/stream") as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        token = json.loads(line[len("data: "):])["token"]
+                        received[token] = (time.perf_counter() - written_at[token]) * 1000
+                        if len(received) == count:
+                            return
+
+    task = asyncio.create_task(listen())
+    await asyncio.sleep(0.5)
+    for n in range(count):
+        token = f"Stream{n:04d}pump"
+        written_at[token] = time.perf_counter()
+        with open(token_file, "a", encoding="utf-8") as f:
+            f.write(token + "\n")
+        await asyncio.sleep(0.1)
+    await asyncio.wait([task], timeout=5)
+    task.cancel()
+    return received
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000, help="lines in the token file")
+    parser.add_argument("--duration", type=float, default=5, help="seconds per measurement")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        token_file = os.path.join(tmp, "new_coins.txt")
+        with open(token_file, "w", encoding="utf-8") as f:
+            for n in range(args.lines):
+                f.write(f"{n:040d}pump\n")
+        print(f"Token file: {args.lines} lines, {os.path.getsize(token_file) / 1e6:.1f} MB")
+
+        ring_server, ring_url = start_server("ring", token_file)
+        legacy_server, legacy_url = start_server("legacy", token_file)
+        results = []
+        try:
+            for name, url in (("legacy GET /", legacy_url + "/"),
+                              ("ring GET /", ring_url + "/"),
+                              ("ring GET /recent?n=50", ring_url + "/recent?n=50")):
+                ok, errors, elapsed = await load(url, args.duration, args.concurrency)
+                results.append((name, ok, errors, elapsed))
+            streamed = await check_stream(ring_url, token_file)
+        finally:
+            ring_server.terminate()
+            legacy_server.terminate()
+
+    print()
+    for name, ok, errors, elapsed in results:
+        print(f"{name:>24}: {ok / elapsed:9.1f} req/s  ({ok} ok, {errors} errors in {elapsed:.1f}s)")
+    if streamed:
+        print(f"{'/stream':>24}: {len(streamed)}/5 appended tokens delivered, "
+              f"max {max(streamed.values()):.0f} ms after the write")
+    else:
+        print(f"{'/stream':>24}: no tokens delivered")
+
+if __name__ == "__main__":
+    asyncio.run(main())
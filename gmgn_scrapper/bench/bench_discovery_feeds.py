@@ -0,0 +1,105 @@
+"""
+Multi-feed discovery benchmark: CPU cost and latency of watching several
+new-pair views on one browser.
+
+Runs the DiscoverySupervisor against 1..--feeds copies of
+bench/fixtures/new_pair.html in a headless Chromium (each page lists its own
+tokens), once with the extra feeds throttled as configured in
+discovery_supervisor.EXTRA_FEED_DEFAULTS and once without throttling, and
+reports the browser's CPU time (CDP SystemInfo.getProcessInfo) and the
+detection latency of the first feed and of the extra feeds.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_discovery_feeds.py [--feeds 3] [--interval 500] [--count 40]
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from discovery import TOKEN_HREF_PREFIX  # noqa: E402
+from discovery_supervisor import DiscoverySupervisor  # noqa: E402
+from fixture_server import chromium, percentile  # noqa: E402
+
+FIXTURE = pathlib.Path(__file__).resolve().parent / "fixtures" / "new_pair.html"
+
+UNTHROTTLED = {"interval": 5, "batch_ms": 0, "cpu_throttle": 1, "block_resources": False}
+
+async def browser_cpu_seconds(browser):
+    session = await browser.new_browser_cdp_session()
+    info = await session.send("SystemInfo.getProcessInfo")
+    await session.detach()
+    return sum(process["cpuTime"] for process in info["processInfo"])
+
+async def run(browser, feeds, throttled, args):
+    """
+    Watch `feeds` fixture pages for the duration of the fixture; returns
+    (browser CPU seconds, {feed name: [latency ms]}, rows inserted).
+    """
+    context = await browser.new_context()
+    urls = [f"{FIXTURE.as_uri()}?interval={args.interval}&count={args.count}&prefix=Feed{i}x"
+            for i in range(feeds)]
+    config = [{"name": f"feed{i}", "url": url, **({} if throttled or i == 0 else UNTHROTTLED)}
+              for i, url in enumerate(urls)]
+    seen_at = {}
+
+    def on_new(addresses, feed):
+        now = time.time() * 1000
+        for address in addresses:
+            seen_at.setdefault(address, (feed["name"], now))
+
+    cpu_before = await browser_cpu_seconds(browser)
+    with tempfile.TemporaryDirectory() as tmp:
+        supervisor = DiscoverySupervisor(context, config, set(), os.path.join(tmp, "new_coins.txt"), on_new)
+        task = asyncio.create_task(supervisor.run())
+        # Page loads + fixture start delay + all inserts + a fallback interval of slack.
+        await asyncio.sleep(3 + args.count * args.interval / 1000 + 10)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    cpu = await browser_cpu_seconds(browser) - cpu_before
+
+    latencies = {}
+    inserted = 0
+    for page in context.pages:
+        inserted_at = await page.evaluate("window.__insertedAt || {}")
+        inserted += len(inserted_at)
+        for href, ts in inserted_at.items():
+            token = href[len(TOKEN_HREF_PREFIX):]
+            if token in seen_at:
+                name, at = seen_at[token]
+                latencies.setdefault(name, []).append(at - ts)
+    await context.close()
+    return cpu, latencies, inserted
+
+def report(feeds, throttled, cpu, latencies, inserted):
+    first = latencies.get("feed0", [])
+    extra = [ms for name, values in latencies.items() if name != "feed0" for ms in values]
+    detected = len(first) + len(extra)
+    line = (f"{feeds} feed(s) {'throttled  ' if throttled else 'unthrottled'}: browser CPU {cpu:6.2f}s  "
+            f"detected {detected}/{inserted}  first feed p50={percentile(first, 0.5):7.0f} ms "
+            f"p95={percentile(first, 0.95):7.0f} ms")
+    if extra:
+        line += f"  extra feeds p50={percentile(extra, 0.5):7.0f} ms p95={percentile(extra, 0.95):7.0f} ms"
+    print(line)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeds", type=int, default=3, help="largest number of concurrent feeds")
+    parser.add_argument("--interval", type=int, default=500, help="ms between inserted rows on each page")
+    parser.add_argument("--count", type=int, default=40, help="rows inserted on each page")
+    parser.add_argument("--chrome", default=None, help="path to a Chrome/Chromium executable")
+    args = parser.parse_args()
+
+    async with chromium(args.chrome) as browser:
+        for feeds in range(1, args.feeds + 1):
+            for throttled in ((True,) if feeds == 1 else (False, True)):
+                report(feeds, throttled, *await run(browser, feeds, throttled, args))
+
+if __name__ == "__main__":
+    asyncio.run(main())
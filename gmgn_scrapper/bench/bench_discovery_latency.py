@@ -0,0 +1,91 @@
+"""
+Discovery latency benchmark: push (MutationObserver) vs. poll.
+
+Opens bench/fixtures/new_pair.html in a headless Chromium, which prepends a row
+to the "New Pool" table on a timer, and measures how long each discovery mode
+takes to record a row after it was inserted.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_discovery_latency.py [--interval 250] [--count 40] [--poll-interval 5]
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from discovery import watch_new_coins, poll_new_coins, TOKEN_HREF_PREFIX  # noqa: E402
+from fixture_server import chromium  # noqa: E402
+
+FIXTURE = pathlib.Path(__file__).resolve().parent / "fixtures" / "new_pair.html"
+
+async def run_mode(browser, mode, args):
+    """
+    Run one discovery mode against a fresh fixture page and return latencies in ms.
+    """
+    page = await browser.new_page()
+    await page.goto(f"{FIXTURE.as_uri()}?interval={args.interval}&count={args.count}")
+    seen_at = {}
+
+    def on_new(tokens):
+        now = time.time() * 1000
+        for token in tokens:
+            seen_at.setdefault(token, now)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        coins_file = os.path.join(tmp, "new_coins.txt")
+        if mode == "push":
+            loop = watch_new_coins(page, set(), coins_file, fallback_interval=args.poll_interval, on_new=on_new)
+        else:
+            loop = poll_new_coins(page, set(), coins_file, interval=args.poll_interval, on_new=on_new)
+        task = asyncio.create_task(loop)
+        # Fixture start delay + all inserts + one full poll interval of slack.
+        await asyncio.sleep(1 + args.count * args.interval / 1000 + args.poll_interval + 0.5)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    inserted_at = await page.evaluate("window.__insertedAt")
+    await page.close()
+    latencies = []
+    for href, ts in inserted_at.items():
+        token = href[len(TOKEN_HREF_PREFIX):]
+        if token in seen_at:
+            latencies.append(seen_at[token] - ts)
+    return latencies, len(inserted_at)
+
+def report(mode, latencies, inserted):
+    if not latencies:
+        print(f"{mode:>5}: no rows detected out of {inserted}")
+        return
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{mode:>5}: detected {len(latencies)}/{inserted} rows  "
+        f"mean={statistics.mean(latencies):8.1f} ms  p50={statistics.median(latencies):8.1f} ms  "
+        f"p95={p95:8.1f} ms  max={latencies[-1]:8.1f} ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=int, default=250, help="ms between inserted rows")
+    parser.add_argument("--count", type=int, default=40, help="number of rows to insert")
+    parser.add_argument("--poll-interval", type=float, default=5, help="poll / fallback interval in seconds")
+    parser.add_argument("--chrome", default=None, help="path to a Chrome/Chromium executable")
+    args = parser.parse_args()
+
+    async with chromium(args.chrome) as browser:
+        for mode in ("poll", "push"):
+            latencies, inserted = await run_mode(browser, mode, args)
+            report(mode, latencies, inserted)
+
+if __name__ == "__main__":
+    asyncio.run(main())
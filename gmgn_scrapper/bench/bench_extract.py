@@ -0,0 +1,130 @@
+"""
+Field extraction benchmark and golden check.
+
+Verifies extractor.extract_fields / to_typed against the golden corpus in
+bench/fixtures/golden/golden.json (built from the text dumps in data/ plus
+small synthetic panels), checks that it and the two single-pass variants below
+agree with the original five-regex extract_data on every input, then times
+them all:
+
+    legacy 5x re.search   the original extract_data (re's pattern cache)
+    extract_fields        the precompiled per-field patterns (extractor.py)
+    single alternation    one finditer over all field patterns joined by "|"
+    label scan            one finditer over the labels, each value matched
+                          with an anchored pattern at the label's end
+    extract_typed         extract_fields plus to_typed
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_extract.py [--repeat 2000]
+"""
+import argparse
+import json
+import pathlib
+import re
+import sys
+import timeit
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from extractor import FIELD_PATTERNS, extract_fields, extract_typed, fields_from_groups, to_typed  # noqa: E402
+
+GOLDEN = pathlib.Path(__file__).resolve().parent / "fixtures" / "golden" / "golden.json"
+
+def legacy_extract_data(text):
+    """
+    The original extract_data: five separate re.search calls over the full text.
+    """
+    snipers_match = re.search(r'Snipers\s*\n\s*>\s*\n\s*(\S+)', text)
+    bluechip_match = re.search(r'BlueChip\s*\n\s*>\s*\n\s*(\S+)', text)
+    top10_match = re.search(r'Top 10\s*\n\s*(\S+)', text)
+    audit_match = re.search(r'Audit\s*\n\s*>\s*\n\s*(\S+)\s*\n\s*(\S+)', text)
+    rug_prob_match = re.search(r'Rug probability\s*\n\s*(\S+)', text)
+    return {
+        'snipers': snipers_match.group(1) if snipers_match else '',
+        'bluechip': bluechip_match.group(1) if bluechip_match else '',
+        'top10': top10_match.group(1) if top10_match else '',
+        'audit': f"{audit_match.group(1)} {audit_match.group(2)}" if audit_match else '',
+        'rug_prob': rug_prob_match.group(1) if rug_prob_match else None,
+    }
+
+# One alternative per field, in FIELD_PATTERNS order; each alternative is a
+# group wrapping the field's own groups.
+ALTERNATION = re.compile("|".join(f"({pattern.pattern})" for _, pattern in FIELD_PATTERNS))
+ALTERNATIVES = {}
+_group = 1
+for _field, _pattern in FIELD_PATTERNS:
+    ALTERNATIVES[_group] = (_field, range(_group + 1, _group + 1 + _pattern.groups))
+    _group += 1 + _pattern.groups
+
+def single_alternation(text):
+    groups = {}
+    for match in ALTERNATION.finditer(text):
+        field, inner = ALTERNATIVES[match.lastindex]
+        groups.setdefault(field, tuple(match.group(i) for i in inner))
+        if len(groups) == len(FIELD_PATTERNS):
+            break
+    return fields_from_groups(groups)
+
+# Label literal -> (field, the rest of its pattern anchored after the label).
+LABEL_TAILS = {}
+for _field, _pattern in FIELD_PATTERNS:
+    _label = re.match(r"[A-Za-z0-9 ]+", _pattern.pattern).group()
+    LABEL_TAILS[_label] = (_field, re.compile(_pattern.pattern[len(_label):]))
+LABELS = re.compile("|".join(re.escape(label) for label in LABEL_TAILS))
+
+def label_scan(text):
+    groups = {}
+    for label in LABELS.finditer(text):
+        field, tail = LABEL_TAILS[label.group()]
+        if field in groups:
+            continue
+        value = tail.match(text, label.end())
+        if value:
+            groups[field] = value.groups()
+            if len(groups) == len(FIELD_PATTERNS):
+                break
+    return fields_from_groups(groups)
+
+def check_golden(cases):
+    failures = 0
+    for case in cases:
+        text = (ROOT / case["source"]).read_text(encoding="utf-8")
+        raw = extract_fields(text)
+        typed = to_typed(raw)
+        legacy = legacy_extract_data(text)
+        for label, got, want in (("raw", raw, case["raw"]), ("typed", typed, case["typed"]), ("legacy", raw, legacy),
+                                 ("single alternation", single_alternation(text), legacy),
+                                 ("label scan", label_scan(text), legacy)):
+            if got != want:
+                failures += 1
+                print(f"MISMATCH [{label}] {case['source']}\n  got:  {got}\n  want: {want}")
+    if failures:
+        print(f"golden: {failures} mismatches")
+    else:
+        print(f"golden: all {len(cases)} cases OK")
+    return failures == 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="extractions per input and method")
+    args = parser.parse_args()
+
+    cases = json.loads(GOLDEN.read_text(encoding="utf-8"))
+    ok = check_golden(cases)
+
+    for case in cases:
+        text = (ROOT / case["source"]).read_text(encoding="utf-8")
+        print(f"\n{case['source']} ({len(text)} chars)")
+        for name, fn in (("legacy 5x re.search", legacy_extract_data),
+                         ("extract_fields", extract_fields),
+                         ("single alternation", single_alternation),
+                         ("label scan", label_scan),
+                         ("extract_typed", extract_typed)):
+            seconds = timeit.timeit(lambda: fn(text), number=args.repeat)
+            print(f"  {name:>20}: {seconds / args.repeat * 1e6:8.2f} us/call")
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Href extraction micro-benchmark: per-element get_attribute vs. one batched call.
+
+Renders 200 rows in bench/fixtures/new_pair.html and times the original
+query_selector_all + get_attribute loop against discovery.read_coin_rows,
+which returns href, age, liquidity, holders, volume and market cap for every
+row in a single eval_on_selector_all round trip.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_href_extraction.py [--rows 200] [--repeat 20]
+"""
+import argparse
+import asyncio
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from discovery import COIN_SELECTOR, read_coin_rows  # noqa: E402
+from fixture_server import chromium  # noqa: E402
+
+FIXTURE = pathlib.Path(__file__).resolve().parent / "fixtures" / "new_pair.html"
+
+async def per_element(page):
+    coin_elements = await page.query_selector_all(COIN_SELECTOR)
+    return [await coin.get_attribute("href") for coin in coin_elements]
+
+async def batched(page):
+    return await read_coin_rows(page)
+
+async def time_it(fn, page, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn(page)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200, help="rows rendered in the fixture")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per method")
+    parser.add_argument("--chrome", default=None, help="path to a Chrome/Chromium executable")
+    args = parser.parse_args()
+
+    async with chromium(args.chrome) as browser:
+        page = await browser.new_page()
+        await page.goto(f"{FIXTURE.as_uri()}?prefill={args.rows}&count=0")
+
+        slow, hrefs = await time_it(per_element, page, args.repeat)
+        fast, rows = await time_it(batched, page, args.repeat)
+        assert hrefs == [row[0] for row in rows], "batched hrefs differ from per-element hrefs"
+
+        for name, timings in (("per-element", slow), ("batched", fast)):
+            print(
+                f"{name:>12}: {len(hrefs)} rows  mean={statistics.mean(timings):8.2f} ms  "
+                f"p50={statistics.median(timings):8.2f} ms  min={min(timings):8.2f} ms"
+            )
+        print(f"     speedup: {statistics.median(slow) / statistics.median(fast):.1f}x (p50)")
+        print(f"  sample row: {rows[0]}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
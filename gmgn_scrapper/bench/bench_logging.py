@@ -0,0 +1,118 @@
+"""
+Logging overhead benchmark: the old stdout Tee vs. pipeline_log.
+
+Prints --lines lines (mostly the discovery idle message, like data/data.txt)
+through each setup and reports the time the printing code spends per print,
+which is what the event loop waits for. The console side goes to /dev/null.
+--flush-ms adds a delay to every flush of the log file, to stand in for a
+slow or busy disk.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_logging.py [--lines 20000] [--flush-ms 0]
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import pipeline_log  # noqa: E402
+
+class Tee:
+    """
+    The original stdout Tee: every write is flushed to every file.
+    """
+    def __init__(self, *files):
+        self.files = files
+
+    def write(self, obj):
+        for f in self.files:
+            f.write(obj)
+            f.flush()
+
+    def flush(self):
+        for f in self.files:
+            f.flush()
+
+class SlowFile:
+    """
+    Wraps a file so every flush takes `delay` seconds.
+    """
+    def __init__(self, f, delay):
+        self.f = f
+        self.delay = delay
+
+    def write(self, text):
+        return self.f.write(text)
+
+    def flush(self):
+        self.f.flush()
+        if self.delay:
+            time.sleep(self.delay)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+def messages(count):
+    for n in range(count):
+        if n % 50 == 0:
+            yield f"New coins found: ['Bench{n:06d}pump']"
+        else:
+            yield "No new coins found in this iteration."
+
+def time_prints(count):
+    samples = []
+    for message in messages(count):
+        start = time.perf_counter()
+        print(message)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+def report(name, samples, log_path):
+    ordered = sorted(samples)
+    p99 = ordered[int(len(ordered) * 0.99)]
+    with open(log_path, encoding="utf-8") as f:
+        lines = sum(1 for _ in f)
+    sys.__stdout__.write(f"{name:>14}: mean={statistics.mean(ordered):7.2f} us  p99={p99:7.2f} us  "
+                         f"max={ordered[-1]:9.2f} us  log lines={lines}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000, help="lines to print per setup")
+    parser.add_argument("--flush-ms", type=float, default=0, help="simulated delay per log file flush (ms)")
+    args = parser.parse_args()
+    delay = args.flush_ms / 1000
+
+    devnull = open(os.devnull, "w")
+    with tempfile.TemporaryDirectory() as tmp:
+        tee_log = os.path.join(tmp, "tee.txt")
+        with open(tee_log, "a", encoding="utf-8") as log_file:
+            sys.stdout = Tee(devnull, SlowFile(log_file, delay))
+            tee_samples = time_prints(args.lines)
+            sys.stdout = sys.__stdout__
+        report("Tee", tee_samples, tee_log)
+
+        queued_log = os.path.join(tmp, "queued.txt")
+        original_stdout = sys.__stdout__
+        sys.__stdout__ = devnull
+        try:
+            listener = pipeline_log.setup_logging(queued_log)
+        finally:
+            sys.__stdout__ = original_stdout
+        for handler in listener.handlers:
+            if isinstance(handler, pipeline_log.logging.handlers.RotatingFileHandler):
+                handler.stream = SlowFile(handler.stream, delay)
+        queued_samples = time_prints(args.lines)
+        sys.stdout = sys.__stdout__
+        # Let the writer thread drain the queue before counting lines.
+        while not listener.queue.empty():
+            time.sleep(0.05)
+        time.sleep(delay + 0.1)
+        report("pipeline_log", queued_samples, queued_log)
+
+if __name__ == "__main__":
+    main()
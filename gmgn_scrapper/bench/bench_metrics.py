@@ -0,0 +1,98 @@
+"""
+Pipeline metrics overhead and /metrics check.
+
+Times the instrumentation a scraped token goes through (a few stage
+observations, counters and the discovery-to-analysis histogram) with metrics
+enabled and disabled, against the same loop without instrumentation. Then
+writes an analyzer snapshot, serves app.py and checks that /metrics returns
+its samples in the Prometheus text format.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_metrics.py [--tokens 200000]
+"""
+import argparse
+import pathlib
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import pipeline_metrics as pm  # noqa: E402
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="[^"]*",?)*\})? \S+$')
+
+def per_token_baseline(n):
+    total = 0.0
+    for i in range(n):
+        total += i * 1e-6
+    return total
+
+def per_token_instrumented(n):
+    total = 0.0
+    for i in range(n):
+        total += i * 1e-6
+        pm.STAGE_SECONDS.labels(stage="ready").observe(0.8)
+        pm.STAGE_SECONDS.labels(stage="extract").observe(0.004)
+        pm.STAGE_SECONDS.labels(stage="persist").observe(0.002)
+        pm.SCRAPE_SECONDS.labels(mode="dom").observe(0.81)
+        pm.EXTRACTION_FAILURES.labels(field="rug_prob").inc()
+        pm.TOKENS_ANALYZED.labels(result="stored").inc()
+        pm.DISCOVERY_TO_ANALYSIS_SECONDS.observe(2.5)
+        pm.TOKEN_BACKLOG.set(3)
+    return total
+
+def timed(function, n):
+    start = time.perf_counter()
+    function(n)
+    return (time.perf_counter() - start) / n * 1e9
+
+def check_endpoint(directory):
+    from fastapi.testclient import TestClient
+    import app as token_app
+
+    pm.write_snapshot("analyzer", directory)
+    original = pm.render
+
+    def render(process, directory=directory):
+        return original(process, directory)
+
+    token_app.render_metrics = render
+    token_app.TOKEN_FEED = "file"
+    with TestClient(token_app.app) as client:
+        start = time.perf_counter()
+        response = client.get("/metrics")
+        elapsed = (time.perf_counter() - start) * 1000
+    lines = response.text.splitlines()
+    samples = [line for line in lines if not line.startswith("#")]
+    malformed = [line for line in samples if not SAMPLE_LINE.match(line)]
+    analyzer = [line for line in samples if 'process="analyzer"' in line]
+    print(f"/metrics: status={response.status_code} {len(samples)} samples "
+          f"({len(analyzer)} from the analyzer snapshot), {len(malformed)} malformed, {elapsed:.1f} ms")
+    for line in malformed[:5]:
+        print(f"  malformed: {line}")
+    for line in lines:
+        if 'process="analyzer"' in line and (line.startswith("gmgn_stage_seconds_count")
+                                             or line.startswith("gmgn_discovery_to_analysis_seconds_bucket")):
+            print(f"  {line}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=200_000, help="simulated tokens per measurement")
+    args = parser.parse_args()
+
+    baseline = timed(per_token_baseline, args.tokens)
+    pm.set_enabled(False)
+    disabled = timed(per_token_instrumented, args.tokens)
+    pm.set_enabled(True)
+    enabled = timed(per_token_instrumented, args.tokens)
+    print(f"per token (8 metric updates): baseline {baseline:7.0f} ns  disabled +{disabled - baseline:6.0f} ns  "
+          f"enabled +{enabled - baseline:6.0f} ns")
+    print("(a scraped token takes about a second, so either is below 1e-5 of its time)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_endpoint(tmp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Network payload decoding check and benchmark.
+
+Decodes the payloads in bench/fixtures/payloads/ with network_capture and
+checks them against what the DOM path extracts for the same token, checks
+that the fixture server's security JSON decodes to exactly the panel strings
+its token pages render, then times decoding a payload against extracting the
+same fields from the page text.
+
+The payloads are hand-written (synthetic) fixtures, made to agree with the
+output_3m1M... page dump, not captures of gmgn's responses: passing shows the
+decoders agree with the fixtures, not with gmgn (see network_capture.py).
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_network_capture.py [--repeat 2000] [--tokens 500]
+"""
+import argparse
+import json
+import pathlib
+import sys
+import timeit
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from extractor import extract_fields  # noqa: E402
+from fixture_server import expected_metrics, security_payload  # noqa: E402
+from network_capture import decode_new_pairs, decode_token_security, decode_ws_frame  # noqa: E402
+
+PAYLOADS = pathlib.Path(__file__).resolve().parent / "fixtures" / "payloads"
+PAGE_DUMP = ROOT / "data" / "output_3m1MQdum8ogQ4XfKSHbtRUVdakdKFEJC2YigiecLpump.txt"
+
+def check(label, got, want):
+    if got != want:
+        print(f"MISMATCH [{label}]\n  got:  {got}\n  want: {want}")
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="decodes per payload and method")
+    parser.add_argument("--tokens", type=int, default=500, help="fixture tokens to cross-check")
+    args = parser.parse_args()
+
+    new_pairs = json.loads((PAYLOADS / "new_pairs.json").read_text(encoding="utf-8"))
+    ws_frame = (PAYLOADS / "ws_new_pool.json").read_text(encoding="utf-8")
+    security = json.loads((PAYLOADS / "token_security.json").read_text(encoding="utf-8"))
+    page_text = PAGE_DUMP.read_text(encoding="utf-8")
+
+    failures = 0
+    failures += check("new_pairs", decode_new_pairs(new_pairs),
+                      ["3m1MQdum8ogQ4XfKSHbtRUVdakdKFEJC2YigiecLpump",
+                       "FXh71uncZypbmB8zkTmb9ny8oU54Gu9bxQCDUrh5DoKY"])
+    # The fixture's pool address ("a") differs from its base token ("ba"); only the token is emitted.
+    failures += check("ws_new_pool", decode_ws_frame(ws_frame), ["3m1MQdum8ogQ4XfKSHbtRUVdakdKFEJC2YigiecLpump"])
+    failures += check("ws_pool_without_ba", decode_ws_frame(
+        '{"channel": "new_pool_info", "data": [{"pools": [{"a": "PoolOnlyAddress"}]}]}'), ["PoolOnlyAddress"])
+    failures += check("ws_other_channel", decode_ws_frame('{"channel": "token_stat", "data": []}'), [])
+    failures += check("token_security", decode_token_security(security), extract_fields(page_text))
+    for i in range(args.tokens):
+        token = f"Bench{i:04d}pump"
+        failures += check(f"fixture {token}", decode_token_security(security_payload(token)), expected_metrics(token))
+    print(f"decoding: {failures} mismatches" if failures else f"decoding: all {args.tokens + 5} cases OK")
+
+    security_text = json.dumps(security)
+    print(f"\ntoken security ({len(security_text)} bytes JSON vs {len(page_text)} chars of page text)")
+    for name, fn in (("extract_fields(page)", lambda: extract_fields(page_text)),
+                     ("json + decode", lambda: decode_token_security(json.loads(security_text)))):
+        seconds = timeit.timeit(fn, number=args.repeat)
+        print(f"  {name:>22}: {seconds / args.repeat * 1e6:8.2f} us/call")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
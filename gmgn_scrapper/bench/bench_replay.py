@@ -0,0 +1,256 @@
+"""
+Offline end-to-end replay of the discovery -> analysis pipeline.
+
+Replays the stream of new pairs recorded in the discovery log (data/data.txt,
+one poll iteration every 5 s) on a New Pool page served by the local fixture
+server, --speedup times faster, and runs the real pipeline against it in
+headless Chromium:
+
+    main.fetch_scrape_data      discovers the tokens on the replayed page and
+                                publishes them on the token bus
+    run_pool (analyzer script)  scrapes each token page, extracts the fields
+                                and stores them (metrics store, token metrics,
+                                legacy CSV through write_csv)
+
+Token pages with a recording (the values stored in data/<token>.csv, the
+saved page dumps in data/*.txt) render the recorded panel; the others get
+generated values (see fixture_server.expected_metrics). Reports throughput,
+end-to-end latency percentiles (row inserted on the New Pool page -> token
+stored), per-stage percentiles and extraction accuracy against the expected
+values.
+
+Everything runs on 127.0.0.1 in a temporary working directory (the scripts'
+./data paths land there), configured through a runtime config file written
+there (see runtime_config.py), so no network access or display is needed. Both
+scripts share this process and its event loop; in production they are
+separate processes, so CPU-bound parts are measured pessimistically.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_replay.py [--speedup 20] [--limit 0] [--discovery push] [--mode dom]
+                                 [--workers 4] [--render-delay 500] [--drain 60]
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import pathlib
+import socket
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from fixture_server import (expected_for, free_port, load_recordings, percentile, recorded_timeline,  # noqa: E402
+                            start_fixture_server)
+
+FIELDS = ["snipers", "bluechip", "top10", "audit", "rug_prob"]
+
+def load_analyzer():
+    """
+    Import formating+data_ex.py (not a valid module name) as a module.
+    """
+    spec = importlib.util.spec_from_file_location("analyzer_script", ROOT / "formating+data_ex.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def free_cdp_port():
+    """
+    A cdp_port for the runtime config whose discovery and analyzer ports (it
+    and it + 100, see runtime_config.ROLE_PORT_OFFSETS) are both free.
+    """
+    while True:
+        port = free_port()
+        if port + 100 < 65536:
+            try:
+                with socket.socket() as sock:
+                    sock.bind(("127.0.0.1", port + 100))
+                return port
+            except OSError:
+                pass
+
+def write_config(args, base_url):
+    """
+    Write the runtime config of the replay to ./config.json (the working
+    directory is a temporary one) and point GMGN_CONFIG at it.
+    """
+    config = {
+        "chrome_path": args.chrome,
+        "profile_dir": os.path.abspath("profiles"),
+        "cdp_port": free_cdp_port(),
+        "headless": True,
+        "bus_port": free_port(),
+        "new_pair_url": base_url + "/new-pair?chain=sol",
+        "token_url": base_url + "/sol/token/{placeholder}",
+        "discovery_feeds": ["sol"],
+    }
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.environ["GMGN_CONFIG"] = os.path.abspath("config.json")
+
+def build_timeline(args):
+    """
+    The recorded stream, shifted to start at 0 and compressed by --speedup.
+    """
+    timeline = recorded_timeline(args.log)
+    if args.limit:
+        timeline = timeline[:args.limit]
+    first = timeline[0][1]
+    return [(token, (offset - first) / args.speedup) for token, offset in timeline]
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    return (f"p50={percentile(values, 0.50) * 1000:8.0f} ms  p95={percentile(values, 0.95) * 1000:8.0f} ms  "
+            f"p99={percentile(values, 0.99) * 1000:8.0f} ms  max={max(values) * 1000:8.0f} ms  (n={len(values)})")
+
+async def run_pipeline(args, base_url, timeline, log):
+    """
+    Run discovery and the analyzer against the fixture server until every
+    replayed token is analyzed or the drain time after the last insertion is
+    over. Returns (New Pool insertion times in epoch s by token, wall time).
+    """
+    # Ports, pages and profiles go through the runtime config, as for a
+    # deployment; it is read when the scripts are first imported below.
+    write_config(args, base_url)
+    import main as discovery
+    from browser_session import BrowserSession
+    from token_index import open_token_index
+
+    analyzer = load_analyzer()
+
+    # Run modes are set the way the CLI sets them.
+    discovery.DISCOVERY_MODE = args.discovery
+    analyzer.EXTRACTION_MODE = args.mode
+    analyzer.ANALYZER_WORKERS = args.workers
+    analyzer.TOKEN_SOURCE = "bus"
+    analyzer.WRITE_LEGACY_CSV = True
+
+    # The Chrome discovery attaches to, as launch_separate_browser would start it.
+    discovery_chrome = BrowserSession(discovery.chrome_path, *discovery.chrome_slot(), headless=True)
+    token_index = open_token_index()
+    tokens = [token for token, _ in timeline]
+    started = time.time()
+    with contextlib.redirect_stdout(log):
+        await discovery_chrome.ensure_started()
+        tasks = [asyncio.create_task(discovery.fetch_scrape_data()), asyncio.create_task(analyzer.run_pool())]
+        deadline = time.time() + 5 + timeline[-1][1] + args.drain
+        try:
+            while time.time() < deadline and not any(task.done() for task in tasks):
+                if all(token_index.is_analyzed(token) for token in tokens):
+                    break
+                await asyncio.sleep(0.5)
+            inserted_at = {}
+            for page in discovery_chrome.context.pages:
+                if "/new-pair" in page.url:
+                    inserted_at = await page.evaluate("window.__insertedAt")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await discovery_chrome.close()
+    elapsed = time.time() - started
+    token_index.close()
+    prefix = "/sol/token/"
+    return {href[len(prefix):]: ms / 1000 for href, ms in inserted_at.items()}, elapsed
+
+def report(args, timeline, recordings, inserted_at, elapsed):
+    from token_index import open_token_index
+    from token_metrics import TokenMetrics
+
+    token_index = open_token_index()
+    metrics = TokenMetrics()
+    tokens = [token for token, _ in timeline]
+    rows = {address: (first_seen, analyzed_at) for address, first_seen, analyzed_at in token_index.conn.execute(
+        "SELECT address, first_seen, analyzed_at FROM tokens").fetchall()}
+
+    discovered = [token for token in tokens if token in rows]
+    analyzed = [token for token in tokens if token in rows and rows[token][1] is not None]
+    end_to_end = [rows[t][1] - inserted_at[t] for t in analyzed if t in inserted_at]
+    discovery = [rows[t][0] - inserted_at[t] for t in discovered if t in inserted_at]
+
+    mismatches = {field: 0 for field in FIELDS}
+    exact = {"recorded": [0, 0], "generated": [0, 0]}
+    for token in analyzed:
+        stored = (metrics.get(token) or {}).get("raw") or {}
+        expected = expected_for(token, recordings)
+        kind = "recorded" if token in recordings else "generated"
+        exact[kind][1] += 1
+        wrong = [field for field in FIELDS if (stored.get(field) or None) != (expected.get(field) or None)]
+        if not wrong:
+            exact[kind][0] += 1
+        for field in wrong:
+            mismatches[field] += 1
+
+    stages = {}
+    if os.path.exists("./data/stage_timings.jsonl"):
+        with open("./data/stage_timings.jsonl", encoding="utf-8") as f:
+            for line in f:
+                for stage, ms in json.loads(line)["stages_ms"].items():
+                    stages.setdefault(stage, []).append(ms / 1000)
+    csv_files = [name for name in os.listdir("./data") if name.endswith(".csv")]
+
+    span = timeline[-1][1]
+    print()
+    print(f"Replayed {len(tokens)} new pairs ({len([t for t in tokens if t in recordings])} with recorded pages) "
+          f"over {span:.0f}s ({args.speedup:g}x the recorded {span * args.speedup / 60:.0f} min); "
+          f"discovery={args.discovery} extraction={args.mode} workers={args.workers}; wall time {elapsed:.0f}s")
+    print(f"  inserted on page: {len(inserted_at)}  discovered: {len(discovered)}  analyzed: {len(analyzed)}")
+    if analyzed:
+        finished = max(rows[t][1] for t in analyzed) - min(inserted_at.values())
+        print(f"  throughput: {len(analyzed) / finished * 60:.1f} tokens/min analyzed "
+              f"(arrival rate {len(tokens) / max(span, 1e-9) * 60:.1f} tokens/min)")
+    print(f"  end-to-end latency (inserted -> stored): {percentiles(end_to_end)}")
+    print(f"  discovery latency (inserted -> indexed): {percentiles(discovery)}")
+    for stage, values in stages.items():
+        print(f"  stage {stage:<8}: {percentiles(values)}")
+    total_exact = exact["recorded"][0] + exact["generated"][0]
+    print(f"  accuracy: {total_exact}/{len(analyzed)} tokens exact "
+          f"(recorded {exact['recorded'][0]}/{exact['recorded'][1]}, "
+          f"generated {exact['generated'][0]}/{exact['generated'][1]}); "
+          f"field mismatches: " + ", ".join(f"{field}={count}" for field, count in mismatches.items()))
+    print(f"  legacy CSVs written by write_csv: {len(csv_files)}")
+    metrics.close()
+    token_index.close()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=str(ROOT / "data" / "data.txt"), help="discovery log to replay")
+    parser.add_argument("--speedup", type=float, default=20, help="replay this many times faster than recorded")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N new pairs (0 = all)")
+    parser.add_argument("--discovery", choices=["push", "poll"], default="push", help="discovery mode")
+    parser.add_argument("--mode", choices=["dom", "html", "network"], default="dom", help="extraction mode")
+    parser.add_argument("--workers", type=int, default=4, help="analyzer workers")
+    parser.add_argument("--render-delay", type=int, default=500, help="ms before a token page renders its panel")
+    parser.add_argument("--drain", type=float, default=60, help="seconds to wait after the last new pair")
+    parser.add_argument("--chrome", default=None, help="path to a Chrome/Chromium executable")
+    parser.add_argument("--keep", action="store_true", help="keep the working directory and print its path")
+    args = parser.parse_args()
+
+    timeline = build_timeline(args)
+    recordings = load_recordings()
+    server, base_url = start_fixture_server(args.render_delay, recordings=recordings, timeline=timeline)
+    workdir = tempfile.mkdtemp(prefix="gmgn_replay_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        os.makedirs("data", exist_ok=True)
+        with open("replay.log", "w", encoding="utf-8") as log:
+            inserted_at, elapsed = await run_pipeline(args, base_url, timeline, log)
+        report(args, timeline, recordings, inserted_at, elapsed)
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        if args.keep:
+            print(f"Working directory (pipeline output in replay.log): {workdir}")
+        else:
+            import shutil
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+Re-scoring scheduler simulation.
+
+Replays a day of new tokens (Poisson arrivals at --rate per minute) through
+the analyzer pool's scheduling on a virtual clock: first analyses take a
+worker as soon as one is free, re-samples are taken from RescoreScheduler on
+the workers left idle, within --budget re-samples per minute. Each token's
+metrics drift for a random time after launch and then stop moving, so the
+stability check can end its schedule early.
+
+Reports how many re-samples were taken per schedule step, how many were
+skipped because the token had become stable, how late the re-samples ran
+against their due time, the first-analysis wait, and the scheduler's own cost
+per operation.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_rescore.py [--rate 2] [--hours 24] [--workers 4] [--scrape 1.5] [--budget 20]
+"""
+import argparse
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from rescore_scheduler import RESCORE_SCHEDULE, RescoreScheduler  # noqa: E402
+from fixture_server import percentile  # noqa: E402
+
+def sample(token, at):
+    """
+    A token_metrics-like row for `token` at virtual time `at`: top10 and the
+    sniper share drift until the token settles, then stay put.
+    """
+    launched, settles, rng_seed = token
+    rng = random.Random(rng_seed)
+    drift = min(at - launched, settles) / 60
+    return {
+        "updated_at": at,
+        "audit": "Safe",
+        "top10": min(100.0, 15 + drift * rng.uniform(2, 10)),
+        "snipers": max(0, int(30 - drift * rng.uniform(1, 5))),
+        "snipers_total": 70,
+        "audit_passed": None,
+        "audit_total": None,
+        "rug_prob": None,
+    }
+
+def simulate(args):
+    rng = random.Random(args.seed)
+    scheduler = RescoreScheduler(budget=args.budget)
+    end = args.hours * 3600
+    arrivals = []
+    t = 0.0
+    while t < end:
+        t += rng.expovariate(args.rate / 60)
+        # Most tokens settle within minutes; a few keep moving for the hour.
+        arrivals.append((t, rng.expovariate(1 / args.settle), rng.random()))
+    pending = list(reversed(arrivals))
+    tokens = {}
+    histories = {}
+    busy_until = [0.0] * args.workers
+    first_waits, lateness = [], []
+    steps = [0] * len(RESCORE_SCHEDULE)
+    cpu = 0.0
+    ops = 0
+
+    now = 0.0
+    while now < end + RESCORE_SCHEDULE[-1]:
+        free = [i for i, until in enumerate(busy_until) if until <= now]
+        # New tokens go first.
+        while free and pending and pending[-1][0] <= now:
+            launched, settles, seed = pending.pop()
+            name = f"T{len(tokens)}"
+            tokens[name] = (launched, settles, seed)
+            worker = free.pop()
+            first_waits.append(now - launched)
+            busy_until[worker] = now + args.scrape
+            histories[name] = [sample(tokens[name], now + args.scrape)]
+            started = time.perf_counter()
+            scheduler.add(name, now + args.scrape)
+            cpu += time.perf_counter() - started
+            ops += 1
+        if free and not (pending and pending[-1][0] <= now):
+            started = time.perf_counter()
+            due = scheduler.pop_due(len(free), now=now)
+            cpu += time.perf_counter() - started
+            ops += 1
+            for name, step, analyzed_at in due:
+                worker = free.pop()
+                busy_until[worker] = now + args.scrape
+                lateness.append(now - (analyzed_at + RESCORE_SCHEDULE[step]))
+                steps[step] += 1
+                histories[name].append(sample(tokens[name], now + args.scrape))
+                started = time.perf_counter()
+                scheduler.record(name, step, histories[name])
+                cpu += time.perf_counter() - started
+                ops += 1
+        now += args.tick
+    return {
+        "tokens": len(tokens),
+        "steps": steps,
+        "stats": scheduler.stats,
+        "first_waits": first_waits,
+        "lateness": lateness,
+        "cpu_us": cpu / max(ops, 1) * 1e6,
+        "busy": sum(steps) * args.scrape + len(tokens) * args.scrape,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=2, help="new tokens per minute")
+    parser.add_argument("--hours", type=float, default=24, help="simulated hours of arrivals")
+    parser.add_argument("--workers", type=int, default=4, help="analyzer workers")
+    parser.add_argument("--scrape", type=float, default=1.5, help="seconds per scrape")
+    parser.add_argument("--budget", type=int, default=20, help="re-samples per minute")
+    parser.add_argument("--settle", type=float, default=300, help="mean seconds until a token's metrics settle")
+    parser.add_argument("--tick", type=float, default=1, help="scheduling interval in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    result = simulate(args)
+    tokens = result["tokens"]
+    full = tokens * len(RESCORE_SCHEDULE)
+    taken = sum(result["steps"])
+    capacity = args.workers * (args.hours * 3600 + RESCORE_SCHEDULE[-1])
+    print(f"{tokens} tokens over {args.hours:g}h at {args.rate:g}/min, {args.workers} workers, "
+          f"{args.scrape:g}s per scrape, budget {args.budget}/min, schedule {RESCORE_SCHEDULE}")
+    print(f"  re-samples taken: {taken} of {full} on a fixed schedule ({taken / max(full, 1):.0%}); by step: "
+          + ", ".join(f"{offset}s={count}" for offset, count in zip(RESCORE_SCHEDULE, result["steps"])))
+    print(f"  ended early as stable: {result['stats']['stable']} tokens; "
+          f"late samples folded into a later step: {result['stats']['coalesced']}")
+    print(f"  re-sample lateness: p50={percentile(result['lateness'], 0.5):.1f}s "
+          f"p95={percentile(result['lateness'], 0.95):.1f}s max={max(result['lateness'], default=0):.1f}s")
+    print(f"  first-analysis wait: p50={percentile(result['first_waits'], 0.5):.1f}s "
+          f"p95={percentile(result['first_waits'], 0.95):.1f}s")
+    print(f"  worker utilization: {result['busy'] / capacity:.1%}; scheduler cost {result['cpu_us']:.1f} us/op")
+
+if __name__ == "__main__":
+    main()
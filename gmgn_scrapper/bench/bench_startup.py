@@ -0,0 +1,70 @@
+"""
+Startup cost of each entry point.
+
+For every CLI command, runs a fresh interpreter that imports everything the
+command needs (cli.load_command, which stops short of launching Chrome or
+binding a port) and reports the wall time of the imports, the peak RSS of the
+process and which heavy third-party packages ended up loaded. The same is
+measured for `import cli` alone (what `--help` costs) and for the bare
+interpreter as a floor.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+
+SCRIPT_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+HEAVY = ("pandas", "numpy", "pyarrow", "fastapi", "uvicorn", "playwright", "bs4", "cv2", "pyautogui")
+
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {script_dir!r})
+started = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+TARGETS = {
+    "python": "pass",
+    "cli": "import cli",
+    "discover": "import cli; cli.load_command('discover')",
+    "analyze": "import cli; cli.load_command('analyze')",
+    "serve": "import cli; cli.load_command('serve')",
+}
+
+def measure(body):
+    code = PROBE.format(script_dir=str(SCRIPT_DIR), body=body, heavy=HEAVY)
+    result = subprocess.run([sys.executable, "-c", code], cwd=SCRIPT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="interpreters started per target")
+    args = parser.parse_args()
+
+    print(f"{'target':<10} {'import ms':>10} {'max RSS MB':>11}  heavy modules loaded")
+    for name, body in TARGETS.items():
+        try:
+            runs = [measure(body) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:<10} failed: {e}")
+            continue
+        seconds = statistics.median(run["seconds"] for run in runs)
+        rss = statistics.median(run["rss_mb"] for run in runs)
+        print(f"{name:<10} {seconds * 1000:>10.0f} {rss:>11.0f}  {', '.join(runs[-1]['loaded']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Supervisor benchmark: hang detection, restart delays and checkpoint cost.
+
+Without a browser: a fake page whose renderer hangs after a while is watched
+by the same watchdog the discovery feeds and analyzer workers use, a task that
+keeps failing is run under supervise(), and the analyzer checkpoint is saved
+with a realistic in-flight set.
+
+    hang detection   time from the renderer hanging to HealthCheckFailed
+                     (without the watchdog the worker waits for the stage
+                     timeouts, and a discovery feed waits forever)
+    restarts         delays supervise() applies to consecutive failures
+    checkpoint       cost of an update() and of a forced save()
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_supervisor.py [--hangs 5] [--in-flight 8]
+"""
+import argparse
+import asyncio
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import pipeline_supervisor as ps  # noqa: E402
+from readiness import STAGE_TIMEOUTS  # noqa: E402
+
+class HangingPage:
+    """
+    Answers evaluate() in a millisecond until `hang_at`, then never again.
+    """
+
+    def __init__(self, hang_at):
+        self.hang_at = hang_at
+
+    async def evaluate(self, expression):
+        if time.monotonic() >= self.hang_at:
+            await asyncio.Event().wait()
+        await asyncio.sleep(0.001)
+        return 1
+
+    def is_closed(self):
+        return False
+
+async def hang_detection(hang_after):
+    page = HangingPage(time.monotonic() + hang_after)
+    try:
+        await ps.run_with_watchdog(asyncio.Event().wait(), "bench page", lambda: ps.probe_page(page))
+    except ps.HealthCheckFailed:
+        return time.monotonic() - page.hang_at
+    return None
+
+async def restart_delays(failures):
+    delays = []
+    runs = []
+
+    async def flaky():
+        runs.append(time.monotonic())
+        if len(runs) > failures:
+            await asyncio.Event().wait()
+        raise RuntimeError("simulated CDP disconnect")
+
+    original = asyncio.sleep
+
+    async def fast_sleep(delay):
+        delays.append(delay)
+        await original(0)
+
+    ps.asyncio.sleep = fast_sleep
+    try:
+        task = asyncio.create_task(ps.supervise("bench", flaky))
+        while len(runs) <= failures:
+            await original(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    finally:
+        ps.asyncio.sleep = original
+    return delays
+
+def checkpoint_cost(in_flight, n=2000):
+    tokens = [f"{i:044d}pump" for i in range(in_flight)]
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = ps.Checkpoint("analyzer", tmp)
+        start = time.perf_counter()
+        for i in range(n):
+            checkpoint.update(in_flight=tokens, last_token=tokens[i % in_flight])
+        update_us = (time.perf_counter() - start) / n * 1e6
+        start = time.perf_counter()
+        for i in range(200):
+            checkpoint.update(last_token=str(i))
+            checkpoint.save()
+        save_us = (time.perf_counter() - start) / 200 * 1e6
+        restored = ps.Checkpoint("analyzer", tmp).state
+    return update_us, save_us, len(restored["in_flight"])
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hangs", type=int, default=5, help="simulated renderer hangs")
+    parser.add_argument("--in-flight", type=int, default=8, help="tokens in the checkpointed in-flight set")
+    args = parser.parse_args()
+
+    detections = []
+    for i in range(args.hangs):
+        detections.append(await hang_detection(0.5 + i * 0.7))
+    worst = ps.HEALTH_INTERVAL + ps.HEALTH_FAILURES * ps.HEALTH_TIMEOUT
+    print(f"hang detection (interval {ps.HEALTH_INTERVAL}s, timeout {ps.HEALTH_TIMEOUT}s, "
+          f"{ps.HEALTH_FAILURES} failures): mean {statistics.mean(detections):.1f}s  max {max(detections):.1f}s  "
+          f"(bound {worst}s; without it: {STAGE_TIMEOUTS['ready'] + STAGE_TIMEOUTS['extract']}s+ per analyzer "
+          f"token, indefinitely for a discovery feed)")
+
+    delays = await restart_delays(8)
+    print(f"restart delays for 8 consecutive failures: {', '.join(f'{d:g}s' for d in delays)}")
+
+    update_us, save_us, restored = checkpoint_cost(args.in_flight)
+    print(f"checkpoint ({args.in_flight} tokens in flight): update {update_us:.1f} us (saved at most every "
+          f"{ps.CHECKPOINT_INTERVAL}s), forced save {save_us:.0f} us, restored {restored} tokens")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Discovery -> analyzer handoff latency: token bus vs. token file.
+
+Publishes --count tokens, one every --interval ms, and measures how long each
+takes to reach a subscriber: over the token bus socket (as the analyzer and
+the API receive them from the discovery script), and through the token file
+followed by TokenTailer polled every --poll-interval seconds (the old handoff).
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_token_bus.py [--count 50] [--interval 100] [--subscribers 2] [--poll-interval 1]
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from token_bus import TokenBus, serve_bus, subscribe_remote  # noqa: E402
+from token_tailer import TokenTailer  # noqa: E402
+from fixture_server import free_port  # noqa: E402
+
+def summarize(name, latencies, expected):
+    if not latencies:
+        print(f"{name:>22}: nothing received")
+        return
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name:>22}: received={len(latencies)}/{expected} median={statistics.median(ordered):8.2f} ms "
+          f"p95={p95:8.2f} ms max={ordered[-1]:8.2f} ms")
+
+async def bench_bus(args):
+    port = free_port()
+    bus = TokenBus()
+    server = await serve_bus(bus, port=port)
+    published_at = {}
+    latencies = [[] for _ in range(args.subscribers)]
+
+    async def subscriber(i):
+        async for event in subscribe_remote(port=port):
+            latencies[i].append((time.perf_counter() - published_at[event["token"]]) * 1000)
+            if len(latencies[i]) == args.count:
+                return
+
+    tasks = [asyncio.create_task(subscriber(i)) for i in range(args.subscribers)]
+    # Let every subscriber connect before publishing.
+    while len(bus.subscribers) < args.subscribers:
+        await asyncio.sleep(0.01)
+    for n in range(args.count):
+        token = f"Bus{n:04d}pump"
+        published_at[token] = time.perf_counter()
+        bus.publish_tokens([token])
+        await asyncio.sleep(args.interval / 1000)
+    await asyncio.wait(tasks, timeout=5)
+    for task in tasks:
+        task.cancel()
+    # Give the server's handlers a moment to see the disconnects.
+    await asyncio.sleep(0.1)
+    server.close()
+    await server.wait_closed()
+    return [latency for per_subscriber in latencies for latency in per_subscriber]
+
+async def bench_file(args):
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        token_file = os.path.join(tmp, "new_coins.txt")
+        open(token_file, "w").close()
+        tailer = TokenTailer(token_file)
+        written_at = {}
+
+        async def follow():
+            while len(latencies) < args.count:
+                tailer.poll()
+                token = tailer.next_token()
+                while token:
+                    latencies.append((time.perf_counter() - written_at[token]) * 1000)
+                    token = tailer.next_token()
+                await asyncio.sleep(args.poll_interval)
+
+        task = asyncio.create_task(follow())
+        for n in range(args.count):
+            token = f"File{n:04d}pump"
+            with open(token_file, "a", encoding="utf-8") as f:
+                f.write(token + "\n")
+            written_at[token] = time.perf_counter()
+            await asyncio.sleep(args.interval / 1000)
+        await asyncio.wait([task], timeout=args.poll_interval * 2 + 1)
+        task.cancel()
+    return latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50, help="tokens to publish")
+    parser.add_argument("--interval", type=int, default=100, help="ms between tokens")
+    parser.add_argument("--subscribers", type=int, default=2, help="token bus subscribers")
+    parser.add_argument("--poll-interval", type=float, default=1, help="token file poll interval (s)")
+    args = parser.parse_args()
+
+    bus_latencies = await bench_bus(args)
+    file_latencies = await bench_file(args)
+    print()
+    summarize("token bus", bus_latencies, args.count * args.subscribers)
+    summarize(f"file poll every {args.poll_interval:g}s", file_latencies, args.count)
+
+if __name__ == "__main__":
+    asyncio.run(main())
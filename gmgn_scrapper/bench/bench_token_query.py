@@ -0,0 +1,109 @@
+"""
+Token query API latency benchmark.
+
+Fills a temporary metrics database with --tokens analyzed tokens (values from
+fixture_server.expected_metrics), serves app.py on it in a separate process
+and measures per-request latency (p50/p99, sequential keep-alive client) of:
+/tokens/{address} for a small hot set (LRU cache hits), for random addresses
+(cache misses), and filtered /tokens queries. The same lookups are also timed
+directly on TokenMetrics, without HTTP.
+
+Usage (from the gmgn_scrapper directory):
+    python bench/bench_token_query.py [--tokens 100000] [--requests 2000]
+"""
+import argparse
+import multiprocessing
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import app as token_app  # noqa: E402
+from fixture_server import expected_metrics, free_port, percentile  # noqa: E402
+from token_metrics import TokenMetrics  # noqa: E402
+
+def serve(db_path, token_file, port):
+    token_app.METRICS_DB_PATH = db_path
+    token_app.TOKEN_FILE_PATH = token_file
+    token_app.TOKEN_FEED = "file"
+    uvicorn.run(token_app.app, host="127.0.0.1", port=port, log_level="warning")
+
+def report(name, samples_ms):
+    print(f"{name:>40}: p50={percentile(samples_ms, 0.50):7.3f} ms  p99={percentile(samples_ms, 0.99):7.3f} ms  "
+          f"max={max(samples_ms):7.3f} ms")
+
+def time_calls(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=100_000, help="analyzed tokens in the database")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per measurement")
+    args = parser.parse_args()
+
+    random.seed(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "tokens.db")
+        metrics = TokenMetrics(db_path)
+        tokens = [f"Query{i:07d}pump" for i in range(args.tokens)]
+        now = time.time()
+        start = time.perf_counter()
+        for i, token in enumerate(tokens):
+            metrics.ingest(token, expected_metrics(token), now - (args.tokens - i))
+        print(f"Ingested {args.tokens} tokens in {time.perf_counter() - start:.1f}s "
+              f"({(time.perf_counter() - start) / args.tokens * 1e6:.0f} us/token incl. risk score)")
+
+        hot = random.sample(tokens, 100)
+        lookups = {
+            "/tokens/{address} (hot, cached)": [f"/tokens/{random.choice(hot)}" for _ in range(args.requests)],
+            "/tokens/{address} (random)": [f"/tokens/{random.choice(tokens)}" for _ in range(args.requests)],
+            "/tokens?max_top10=30&audit=Safe": ["/tokens?max_top10=30&audit=Safe"] * args.requests,
+            "/tokens?since=<last 10 min>&max_risk=40": [f"/tokens?since={now - 600}&max_risk=40"] * args.requests,
+        }
+
+        print()
+        report("TokenMetrics.get (no HTTP)", time_calls(metrics.get, [(random.choice(tokens),)
+                                                                       for _ in range(args.requests)]))
+        report("TokenMetrics.query (no HTTP)", time_calls(
+            lambda: metrics.query(max_top10=30, audit="Safe"), [()] * args.requests))
+        metrics.close()
+
+        port = free_port()
+        server = multiprocessing.Process(target=serve, args=(db_path, os.path.join(tmp, "none.txt"), port),
+                                         daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            with httpx.Client(base_url=base_url, timeout=10) as client:
+                while True:
+                    try:
+                        client.get("/")
+                        break
+                    except httpx.HTTPError:
+                        time.sleep(0.1)
+                for name, paths in lookups.items():
+                    samples = []
+                    for path in paths:
+                        started = time.perf_counter()
+                        response = client.get(path)
+                        samples.append((time.perf_counter() - started) * 1000)
+                        assert response.status_code == 200, (path, response.status_code)
+                    report(name, samples)
+        finally:
+            server.terminate()
+
+if __name__ == "__main__":
+    main()
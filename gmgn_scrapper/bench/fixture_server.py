@@ -0,0 +1,279 @@
+"""
+Local stand-in for gmgn.ai used by the benchmarks, and the helpers they share
+(free ports, percentiles, a headless Chromium).
+
+Serves /sol/token/<token> from fixtures/token_page.html and the token security
+XHR that page loads, /api/v1/token_security_sol/sol/<token>, with metrics
+derived deterministically from the token address (see expected_metrics), so
+results can be checked without network access. Tokens with a recorded
+snapshot (see load_recordings) render the recorded panel instead, and
+/new-pair replays a timed stream of new pairs from fixtures/new_pair_replay.html.
+"""
+import ast
+import csv
+import hashlib
+import html
+import json
+import pathlib
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+
+FIXTURES_DIR = pathlib.Path(__file__).resolve().parent / "fixtures"
+DATA_DIR = pathlib.Path(__file__).resolve().parent.parent / "data"
+GOLDEN_FILE = FIXTURES_DIR / "golden" / "golden.json"
+TOKEN_PAGE = Template((FIXTURES_DIR / "token_page.html").read_text(encoding="utf-8"))
+NEW_PAIR_PAGE = Template((FIXTURES_DIR / "new_pair_replay.html").read_text(encoding="utf-8"))
+SECURITY_PATH = "/api/v1/token_security_sol/sol/"
+
+# Panel rows in display order: (field, label, has a ">" link marker).
+PANEL_ROWS = [
+    ("snipers", "Snipers", True),
+    ("bluechip", "BlueChip", True),
+    ("top10", "Top 10", False),
+    ("audit", "Audit", True),
+    ("rug_prob", "Rug probability", False),
+]
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+def expected_metrics(token):
+    """
+    Return the raw panel strings the fixture page renders for `token`.
+    """
+    h = _token_hash(token)
+    total = 5 + h[0] % 60
+    top10 = h[3] % 90 + 5 + h[5] % 10 / 10
+    # Mint renounced, freeze renounced and LP burnt come from three bits of
+    # h[4]; the fourth check is "top 10 holders own at most 30%".
+    passed = bin(h[4] & 0b111).count("1") + (top10 <= 30)
+    return {
+        "snipers": f"{h[1] % (total + 1)}/{total}",
+        "bluechip": f"{h[2] % 10}%",
+        # Rendered like the live panel: one decimal, a trailing ".0" dropped.
+        "top10": f"{h[3] % 90 + 5}" + (f".{h[5] % 10}" if h[5] % 10 else "") + "%",
+        "audit": f"{'Safe' if passed == 4 else 'Risk'} {passed}/4",
+        "rug_prob": f"{h[6] % 100}%",
+    }
+
+def security_payload(token):
+    """
+    The token security JSON for `token`, in the (synthetic) shape of
+    fixtures/payloads/token_security.json, consistent with expected_metrics.
+    """
+    h = _token_hash(token)
+    total = 5 + h[0] % 60
+    return {
+        "code": 0,
+        "msg": "success",
+        "data": {
+            "address": token,
+            "renounced_mint": bool(h[4] & 0b001),
+            "renounced_freeze_account": bool(h[4] & 0b010),
+            "burn_status": "burn" if h[4] & 0b100 else "none",
+            "top_10_holder_rate": round((h[3] % 90 + 5 + h[5] % 10 / 10) / 100, 4),
+            "sniper_count": total,
+            "sniper_holding_count": h[1] % (total + 1),
+            "bluechip_owner_percentage": (h[2] % 10) / 100,
+            "rug_ratio": (h[6] % 100) / 100,
+        },
+    }
+
+# =============================================================================
+# Recorded Snapshots
+# =============================================================================
+
+def panel_html(metrics):
+    """
+    Security panel markup for a dict of raw panel strings; fields that are
+    missing ('' or None) are left out, as on the live page.
+    """
+    rows = []
+    for field, label, marker in PANEL_ROWS:
+        value = metrics.get(field)
+        if not value:
+            continue
+        cells = [label] + ([">"] if marker else []) + value.split(" ")
+        rows.append("<div>" + "".join(f"<div>{html.escape(cell)}</div>" for cell in cells) + "</div>")
+    return "\n".join(rows)
+
+def text_panel_html(text):
+    """
+    Markup rendering a saved page text dump one line per element, so the
+    panel's text nodes read back as the recorded text.
+    """
+    return "\n".join(f"<div>{html.escape(line.strip())}</div>" for line in text.splitlines() if line.strip())
+
+def load_recordings(data_dir=DATA_DIR, golden_file=GOLDEN_FILE):
+    """
+    Recorded token pages: {token: {"panel_html", "expected"}}. The per-token
+    data/<token>.csv files give the values the scraper stored for real tokens
+    (the last row is rendered); the saved page dumps listed in the golden
+    corpus (data/<token>.txt, data/output_<token>.txt) are rendered verbatim
+    and expected to extract as their golden result.
+    """
+    recordings = {}
+    for csv_path in sorted(pathlib.Path(data_dir).glob("*.csv")):
+        if csv_path.stem.startswith("output_"):
+            continue
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            continue
+        expected = {field: rows[-1].get(field) or "" for field in ("snipers", "bluechip", "top10", "audit")}
+        expected["rug_prob"] = rows[-1].get("rug_prob") or None
+        recordings[csv_path.stem] = {"panel_html": panel_html(expected), "expected": expected}
+    if golden_file.exists():
+        root = pathlib.Path(__file__).resolve().parent.parent
+        for entry in json.loads(golden_file.read_text(encoding="utf-8")):
+            source = root / entry["source"]
+            if source.parent != pathlib.Path(data_dir).resolve() or not source.exists():
+                continue
+            token = source.stem[len("output_"):] if source.stem.startswith("output_") else source.stem
+            text = source.read_text(encoding="utf-8")
+            recordings[token] = {"panel_html": text_panel_html(text), "expected": entry["raw"]}
+    return recordings
+
+def recorded_timeline(log_path=DATA_DIR / "data.txt", poll_interval=5):
+    """
+    The stream of new pairs recorded in a discovery log: [(token, offset_s)],
+    where every logged poll iteration advanced time by `poll_interval` seconds
+    and each token is kept at its first appearance.
+    """
+    timeline = []
+    seen = set()
+    tick = 0
+    with open(log_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.startswith("New coins found: "):
+                for token in ast.literal_eval(line[len("New coins found: "):].strip()):
+                    if token not in seen:
+                        seen.add(token)
+                        timeline.append((token, tick * poll_interval))
+                tick += 1
+            elif line.startswith(("No new coins found", "No coin elements found")):
+                tick += 1
+    return timeline
+
+# =============================================================================
+# Pages
+# =============================================================================
+
+def render_token_page(token, render_delay_ms, recordings=None):
+    recording = (recordings or {}).get(token)
+    panel = recording["panel_html"] if recording else panel_html(expected_metrics(token))
+    return TOKEN_PAGE.safe_substitute(
+        token=token,
+        render_delay_ms=render_delay_ms,
+        security_url=SECURITY_PATH + token,
+        hydrate_delay_ms=render_delay_ms - render_delay_ms // 2,
+        panel_json=json.dumps(panel),
+    )
+
+def render_new_pair_page(timeline, start_delay_ms):
+    return NEW_PAIR_PAGE.safe_substitute(
+        timeline_json=json.dumps([[token, round(offset * 1000)] for token, offset in timeline]),
+        start_delay_ms=start_delay_ms,
+    )
+
+def expected_for(token, recordings=None):
+    """
+    The raw panel strings a scrape of `token` should return.
+    """
+    recording = (recordings or {}).get(token)
+    return recording["expected"] if recording else expected_metrics(token)
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    render_delay_ms = 500
+    recordings = {}
+    timeline = []
+    start_delay_ms = 2000
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/sol/token/"):
+            body = render_token_page(path[len("/sol/token/"):], self.render_delay_ms, self.recordings)
+            self._send(body.encode("utf-8"), "text/html; charset=utf-8")
+        elif path.startswith(SECURITY_PATH):
+            # Half of the render delay is the API answering, the other half the
+            # page rendering the answer into the panel.
+            time.sleep(self.render_delay_ms // 2 / 1000)
+            token = path[len(SECURITY_PATH):]
+            if token in self.recordings:
+                # No security payload was recorded: the analyzer has to fall
+                # back to reading the panel.
+                payload = {"code": 0, "msg": "success", "data": {"address": token}}
+            else:
+                payload = security_payload(token)
+            self._send(json.dumps(payload).encode("utf-8"), "application/json")
+        elif path == "/new-pair":
+            body = render_new_pair_page(self.timeline, self.start_delay_ms)
+            self._send(body.encode("utf-8"), "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fixture_server(render_delay_ms=500, port=0, recordings=None, timeline=None, start_delay_ms=2000):
+    """
+    Start the fixture server on a background thread. `recordings` (see
+    load_recordings) replace the generated pages of their tokens; `timeline`
+    ([(token, offset_s)]) is replayed by /new-pair, starting `start_delay_ms`
+    after the page loads. Returns (server, base_url); call server.shutdown()
+    when done.
+    """
+    handler = type("Handler", (FixtureHandler,), {
+        "render_delay_ms": render_delay_ms,
+        "recordings": recordings or {},
+        "timeline": timeline or [],
+        "start_delay_ms": start_delay_ms,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# =============================================================================
+# Shared Bench Helpers
+# =============================================================================
+
+def free_port():
+    """
+    A TCP port on 127.0.0.1 that is free right now.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values, q):
+    """
+    The `q` quantile (0-1) of `values` by nearest rank; NaN if there are none.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else float("nan")
+
+@asynccontextmanager
+async def chromium(executable_path=None):
+    """
+    A headless Chromium launched by Playwright (`executable_path`, else
+    Playwright's own download), closed on exit.
+    """
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, executable_path=executable_path)
+        try:
+            yield browser
+        finally:
+            await browser.close()
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import subprocess
+from contextlib import asynccontextmanager
+
+from pipeline_metrics import CHROME_RESTARTS
+from pipeline_supervisor import HEALTH_TIMEOUT, probe_browser, reap_process
+from readiness import STAGE_TIMEOUTS, wait_for_cdp
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# A page is closed and replaced after this many tokens...
+MAX_PAGE_USES = 50
+# ...or as soon as its JS heap grows beyond this many megabytes.
+MAX_PAGE_HEAP_MB = 512
+
+# Delay before restarting a crashed browser, doubled on each consecutive failure.
+RESTART_BACKOFF = 1
+MAX_RESTART_BACKOFF = 30
+
+# =============================================================================
+# Browser Session Manager
+# =============================================================================
+
+class BrowserSession:
+    """
+    One long-lived Chrome process with a single Playwright CDP connection.
+
+    Pages are handed out with `async with session.page() as page:` and reused
+    across tokens; a page is recycled after MAX_PAGE_USES uses or when its JS
+    heap exceeds MAX_PAGE_HEAP_MB. If Chrome exits or the CDP connection drops,
+    the next page request restarts it (with backoff), so per-token startup cost
+    is a page navigation rather than a process launch. An optional
+    `init_script` is added to the context and runs in every page it loads;
+    `extra_args` are appended to Chrome's command line.
+    """
+
+    def __init__(self, chrome_path, port, user_data_dir, headless=False, max_page_uses=MAX_PAGE_USES,
+                 max_page_heap_mb=MAX_PAGE_HEAP_MB, init_script=None, extra_args=()):
+        self.chrome_path = chrome_path
+        self.extra_args = list(extra_args)
+        self.port = port
+        self.user_data_dir = user_data_dir
+        self.headless = headless
+        self.max_page_uses = max_page_uses
+        self.max_page_heap_mb = max_page_heap_mb
+        self.init_script = init_script
+        self.process = None
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.restarts = 0
+        self._cdp = None
+        self._idle_pages = []
+        self._uses = {}
+        self._lock = asyncio.Lock()
+        self._backoff = RESTART_BACKOFF
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def _launch_chrome(self):
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        args = [
+            self.chrome_path,
+            f"--remote-debugging-port={self.port}",
+            f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            *self.extra_args,
+        ]
+        if self.headless:
+            args.append("--headless=new")
+        args.append("about:blank")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        print(f"Launched Chrome (pid {self.process.pid}) with remote debugging on port {self.port}.")
+
+    async def start(self):
+        """
+        Launch Chrome and connect to it over CDP.
+        """
+        from playwright.async_api import async_playwright
+
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        if not self.chrome_path:
+            self.chrome_path = self.playwright.chromium.executable_path
+        if await asyncio.to_thread(wait_for_cdp, self.port, 0.2):
+            # Another Chrome already serves this port (e.g. one started by the
+            # discovery script with the same profile); attach to it instead of
+            # launching a process that would just hand off to it and exit.
+            print(f"Attaching to the Chrome already listening on port {self.port}.")
+        else:
+            self._launch_chrome()
+            ready = await asyncio.to_thread(wait_for_cdp, self.port, STAGE_TIMEOUTS["launch"])
+            if not ready:
+                self._reap_process()
+                raise RuntimeError(f"Chrome did not open remote debugging port {self.port} in time.")
+        self.browser = await self.playwright.chromium.connect_over_cdp(f"http://localhost:{self.port}")
+        self.context = self.browser.contexts[0] if self.browser.contexts else await self.browser.new_context()
+        if self.init_script:
+            # Runs in every document the session's pages load, before the page's own scripts.
+            await self.context.add_init_script(self.init_script)
+        self._idle_pages = [pg for pg in self.context.pages if not pg.is_closed()]
+        self._uses = {}
+
+    def is_alive(self):
+        if self.browser is None or not self.browser.is_connected():
+            return False
+        # A Chrome we attached to (process is None) is judged by its connection only.
+        return self.process is None or self.process.poll() is None
+
+    async def ensure_started(self):
+        """
+        Start Chrome if it is not running, or restart it if it crashed or the
+        CDP connection was lost.
+        """
+        async with self._lock:
+            if self.is_alive():
+                return
+            if self.browser is not None:
+                self.restarts += 1
+                CHROME_RESTARTS.inc()
+                print(f"Browser session lost; restarting in {self._backoff}s (restart #{self.restarts}).")
+                await self._teardown_browser()
+                await asyncio.sleep(self._backoff)
+                self._backoff = min(self._backoff * 2, MAX_RESTART_BACKOFF)
+            await self.start()
+            self._backoff = RESTART_BACKOFF
+
+    async def probe(self, timeout=HEALTH_TIMEOUT):
+        """
+        Health check: raise if the running Chrome does not answer a CDP command
+        within `timeout` seconds. A Chrome that exited is restarted by the next
+        page request, so only a hung one fails the check.
+        """
+        if not self.is_alive():
+            return
+        if self._cdp is None:
+            self._cdp = await asyncio.wait_for(self.browser.new_browser_cdp_session(), timeout)
+        await probe_browser(self._cdp, timeout)
+
+    async def _teardown_browser(self):
+        # For a CDP connection close() only disconnects; the Chrome process is
+        # stopped below, and only if this session launched it. A hung Chrome
+        # may never answer, so the disconnect is bounded.
+        try:
+            if self.browser is not None and self.browser.is_connected():
+                await asyncio.wait_for(self.browser.close(), STAGE_TIMEOUTS["launch"])
+        except Exception:
+            pass
+        self.browser = None
+        self.context = None
+        self._cdp = None
+        self._idle_pages = []
+        self._uses = {}
+        self._reap_process()
+
+    def _reap_process(self):
+        reap_process(self.process)
+        self.process = None
+
+    async def close(self):
+        """
+        Close the CDP connection, stop Chrome and wait for it to exit.
+        """
+        await self._teardown_browser()
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+    # -------------------------------------------------------------------------
+    # Page Reuse
+    # -------------------------------------------------------------------------
+
+    async def acquire_page(self):
+        await self.ensure_started()
+        while self._idle_pages:
+            page = self._idle_pages.pop()
+            if not page.is_closed():
+                return page
+        page = await self.context.new_page()
+        self._uses[page] = 0
+        return page
+
+    async def release_page(self, page, broken=False):
+        """
+        Return a page to the idle pool, or close it if it is broken, has been
+        used max_page_uses times or is using too much memory.
+        """
+        if page.is_closed() or not self.is_alive():
+            self._uses.pop(page, None)
+            return
+        uses = self._uses.get(page, 0) + 1
+        self._uses[page] = uses
+        reason = None
+        if broken:
+            reason = "error"
+        elif uses >= self.max_page_uses:
+            reason = f"{uses} uses"
+        else:
+            heap_mb = await self._heap_mb(page)
+            if heap_mb is not None and heap_mb > self.max_page_heap_mb:
+                reason = f"JS heap {heap_mb:.0f} MB"
+        if reason:
+            print(f"Recycling page ({reason}).")
+            self._uses.pop(page, None)
+            try:
+                await page.close()
+            except Exception:
+                pass
+            return
+        self._idle_pages.append(page)
+
+    async def _heap_mb(self, page):
+        try:
+            client = await page.context.new_cdp_session(page)
+            try:
+                usage = await client.send("Runtime.getHeapUsage")
+            finally:
+                await client.detach()
+            return usage["usedSize"] / (1024 * 1024)
+        except Exception:
+            return None
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Borrow a page for one token. A page that raised is closed, not reused.
+        """
+        page = await self.acquire_page()
+        try:
+            yield page
+        except BaseException:
+            await self.release_page(page, broken=True)
+            raise
+        await self.release_page(page)
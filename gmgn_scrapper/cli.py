@@ -0,0 +1,128 @@
+import argparse
+import importlib.util
+import os
+import sys
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# The scripts read and write ./data and ./images relative to the working
+# directory; unless --workdir is given, commands run from this directory.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# =============================================================================
+# Commands
+# =============================================================================
+# Each command imports only the modules its mode needs, when it runs: the CLI
+# itself loads nothing but the standard library, so `serve` never loads
+# Playwright or pyarrow and `discover` never loads FastAPI.
+
+def load_analyzer():
+    """
+    Import formating+data_ex.py, whose file name is not a valid module name.
+    """
+    module = sys.modules.get("analyzer")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("analyzer", os.path.join(SCRIPT_DIR, "formating+data_ex.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["analyzer"] = module
+        spec.loader.exec_module(module)
+    return module
+
+def load_command(name):
+    """
+    Import what a command needs and return (module, entry point), without
+    running it.
+    """
+    if name == "discover":
+        import main as discovery
+        return discovery, discovery.main
+    if name == "analyze":
+        analyzer = load_analyzer()
+        return analyzer, analyzer.main
+    if name == "serve":
+        import uvicorn
+        import app as token_app
+        return token_app, uvicorn.run
+    raise ValueError(f"Unknown command: {name}")
+
+def discover(args):
+    discovery, run = load_command("discover")
+    if args.mode:
+        discovery.DISCOVERY_MODE = args.mode
+    if args.headless:
+        discovery.HEADLESS = True
+    run()
+
+def analyze(args):
+    analyzer, run = load_command("analyze")
+    if args.mode:
+        analyzer.ANALYZER_MODE = args.mode
+    if args.workers:
+        analyzer.ANALYZER_WORKERS = args.workers
+    if args.extraction:
+        analyzer.EXTRACTION_MODE = args.extraction
+    if args.source:
+        analyzer.TOKEN_SOURCE = args.source
+    if args.headless:
+        analyzer.HEADLESS = True
+    if args.no_rescore:
+        analyzer.RESCORE = False
+    run()
+
+def serve(args):
+    token_app, run = load_command("serve")
+    run(token_app.app, host=args.host, port=args.port)
+
+# =============================================================================
+# Argument Parsing
+# =============================================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="gmgn_scrapper",
+        description="Discover new gmgn tokens, analyze them and serve the results.")
+    parser.add_argument("--workdir", default=SCRIPT_DIR,
+                        help="directory holding data/ and images/ (default: the scripts' directory)")
+    parser.add_argument("--config", help="runtime config file (default: ./config.json in the workdir, if any)")
+    parser.add_argument("--instance", type=int,
+                        help="instance of the command to run, for several side by side (see runtime_config.py)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("discover", help="watch the new-pair feeds and publish new tokens (main.py)")
+    command.add_argument("--mode", choices=["network", "push", "poll"], help="discovery mode (network is experimental)")
+    command.add_argument("--headless", action="store_true", help="run Chrome without a window")
+    command.set_defaults(run=discover)
+
+    command = commands.add_parser("analyze", help="scrape the security metrics of new tokens (formating+data_ex.py)")
+    command.add_argument("--mode", choices=["pool", "serial"], help="analyzer mode")
+    command.add_argument("--workers", type=int, help="concurrent pages in pool mode")
+    command.add_argument("--extraction", choices=["network", "dom", "html"], help="extraction mode (network is experimental)")
+    command.add_argument("--source", choices=["bus", "file"], help="where new tokens come from")
+    command.add_argument("--headless", action="store_true", help="run Chrome without a window (pool mode)")
+    command.add_argument("--no-rescore", action="store_true", help="analyze each token once")
+    command.set_defaults(run=analyze)
+
+    command = commands.add_parser("serve", help="serve the token API and /metrics (app.py)")
+    command.add_argument("--host", default="0.0.0.0")
+    command.add_argument("--port", type=int, default=8000)
+    command.set_defaults(run=serve)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # The modules resolve each other from the scripts' directory.
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+    # The runtime config is read when the command's modules are imported, from
+    # the file and the GMGN_* environment variables.
+    if args.config:
+        os.environ["GMGN_CONFIG"] = os.path.abspath(args.config)
+    os.chdir(args.workdir)
+    if args.instance is not None:
+        os.environ["GMGN_INSTANCE"] = str(args.instance)
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
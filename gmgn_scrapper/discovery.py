@@ -0,0 +1,277 @@
+import asyncio
+import os
+import re
+import time
+
+from network_capture import NetworkCapture
+from pipeline_metrics import DISCOVERY_TICKS, DISCOVERY_TICK_SECONDS, TOKENS_DISCOVERED
+from runtime_config import CONFIG
+
+# =============================================================================
+# New Pool selectors
+# =============================================================================
+
+# Container of the virtualised "New Pool" table and the coin links inside it
+# (set in the runtime config when gmgn changes its markup).
+COIN_CONTAINER_SELECTOR = CONFIG.coin_container_selector
+COIN_LINK_SELECTOR = CONFIG.coin_link_selector
+COIN_SELECTOR = f"{COIN_CONTAINER_SELECTOR} {COIN_LINK_SELECTOR}"
+
+# Prefix stripped from each coin's href to obtain the token address, and the
+# same for any chain ("/bsc/token/<address>", ...).
+TOKEN_HREF_PREFIX = "/sol/token/"
+TOKEN_HREF = re.compile(r"^/\w+/token/")
+
+# Name of the binding the in-page MutationObserver reports new hrefs through.
+BINDING_NAME = "__onNewCoins"
+
+# =============================================================================
+# In-page MutationObserver
+# =============================================================================
+
+# Installed once per document. Reports every coin href already in the table,
+# then only the hrefs of rows that are added (or recycled by the virtual list)
+# afterwards. Mutations delivered in the same microtask are coalesced into a
+# single binding call; with batchMs > 0, hrefs are collected and reported at
+# most once per batchMs instead. If the table has not rendered yet a single
+# retry timer per document attaches the observer once it does.
+NEW_COIN_OBSERVER_JS = """
+([containerSel, linkSel, bindingName, batchMs]) => {
+    if (window.__coinObserver) return true;
+    const seen = new Set();
+    let pending = [];
+    let flushTimer = null;
+    const report = (fresh) => {
+        if (!batchMs) { window[bindingName](fresh); return; }
+        pending.push(...fresh);
+        if (flushTimer === null) flushTimer = setTimeout(() => {
+            const batch = pending;
+            pending = [];
+            flushTimer = null;
+            window[bindingName](batch);
+        }, batchMs);
+    };
+    const collect = (node, fresh) => {
+        if (node.nodeType !== 1) return;
+        const links = node.matches(linkSel) ? [node] : node.querySelectorAll(linkSel);
+        for (const a of links) {
+            const href = a.getAttribute('href');
+            if (href && !seen.has(href)) { seen.add(href); fresh.push(href); }
+        }
+    };
+    const attach = () => {
+        // Another call (or its retry) may have attached in the meantime.
+        if (window.__coinObserver) return true;
+        const container = document.querySelector(containerSel);
+        if (!container) return false;
+        const initial = [];
+        collect(container, initial);
+        if (initial.length) report(initial);
+        window.__coinObserver = new MutationObserver((mutations) => {
+            const fresh = [];
+            for (const m of mutations) {
+                if (m.type === 'attributes') collect(m.target, fresh);
+                else for (const n of m.addedNodes) collect(n, fresh);
+            }
+            if (fresh.length) report(fresh);
+        });
+        window.__coinObserver.observe(container, {
+            childList: true, subtree: true, attributes: true, attributeFilter: ['href']
+        });
+        return true;
+    };
+    // At most one retry timer per document, however often this is called
+    // before the table renders.
+    if (!attach() && !window.__coinObserverRetry) {
+        window.__coinObserverRetry = setInterval(() => {
+            if (attach()) {
+                clearInterval(window.__coinObserverRetry);
+                window.__coinObserverRetry = null;
+            }
+        }, 100);
+    }
+    return true;
+}
+"""
+
+# Runs over every coin link in a single round trip and returns one compact row
+# per coin: [href, age, liquidity, holders, volume, market_cap]. Column values are
+# read from the row text, which is laid out as: symbol, name, Buy, age, short
+# address, "Liq", liquidity, holders, "V", volume, "MC", market cap.
+COIN_ROWS_JS = """
+(links) => links.map((a) => {
+    const parts = a.innerText.split('\\n').map((s) => s.trim()).filter(Boolean);
+    const after = (label, offset = 1) => {
+        const i = parts.indexOf(label);
+        return i >= 0 && i + offset < parts.length ? parts[i + offset] : null;
+    };
+    const age = parts.find((s) => /^\\d+[smhd]$/.test(s)) || null;
+    return [a.getAttribute('href'), age, after('Liq'), after('Liq', 2), after('V'), after('MC')];
+})
+"""
+
+# Column names of the rows returned by read_coin_rows, in order.
+COIN_ROW_FIELDS = ("href", "age", "liquidity", "holders", "volume", "market_cap")
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+def href_to_token(coin_href):
+    """
+    Remove the "/<chain>/token/" prefix from a coin href, if present.
+    """
+    if coin_href.startswith(TOKEN_HREF_PREFIX):
+        return coin_href[len(TOKEN_HREF_PREFIX):]
+    return TOKEN_HREF.sub("", coin_href)
+
+def _ensure_parent_dir(path):
+    if path and os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+def record_new_coins(hrefs, processed_coins, new_coins_file, on_new=None):
+    """
+    Convert hrefs to token addresses and drop the ones already processed. The
+    rest go to `on_new(addresses)`, which returns the ones it accepted (e.g.
+    those the token index had not seen yet; None accepts all), and the accepted
+    ones are appended to the token file (an audit log; skipped when
+    new_coins_file is None). Returns the list of newly recorded addresses.
+    """
+    new_coin_addresses = []
+    for coin_href in hrefs:
+        if not coin_href:
+            continue
+        token_address = href_to_token(coin_href)
+        if token_address not in processed_coins:
+            new_coin_addresses.append(token_address)
+            processed_coins.add(token_address)
+    if new_coin_addresses and on_new:
+        accepted = on_new(new_coin_addresses)
+        if accepted is not None:
+            new_coin_addresses = list(accepted)
+    if new_coin_addresses:
+        print(f"New coins found: {new_coin_addresses}")
+    if new_coin_addresses and new_coins_file:
+        try:
+            with open(new_coins_file, "a", encoding="utf-8") as f:
+                for address in new_coin_addresses:
+                    f.write(address + "\n")
+        except Exception as file_err:
+            print(f"Error writing to file: {file_err}")
+    return new_coin_addresses
+
+def count_tick(source, started, new_coins):
+    """
+    Record one discovery iteration that started at perf_counter() `started`.
+    """
+    DISCOVERY_TICKS.labels(source=source).inc()
+    DISCOVERY_TICK_SECONDS.labels(source=source).observe(time.perf_counter() - started)
+    if new_coins:
+        TOKENS_DISCOVERED.labels(source=source).inc(len(new_coins))
+
+async def read_coin_rows(page):
+    """
+    Return every coin currently rendered in the "New Pool" table as a list of
+    [href, age, liquidity, holders, volume, market_cap] rows (see COIN_ROW_FIELDS),
+    fetched with a single eval_on_selector_all call instead of one CDP round trip
+    per element.
+    """
+    return await page.eval_on_selector_all(COIN_SELECTOR, COIN_ROWS_JS)
+
+async def read_coin_hrefs(page):
+    """
+    Return the href of every coin currently rendered in the "New Pool" table.
+    """
+    return [row[0] for row in await read_coin_rows(page)]
+
+# =============================================================================
+# Discovery Loops
+# =============================================================================
+
+async def poll_new_coins(page, processed_coins, new_coins_file, interval=5, on_new=None):
+    """
+    Poll the "New Pool" table every `interval` seconds and record unseen coins.
+    """
+    _ensure_parent_dir(new_coins_file)
+    while True:
+        started = time.perf_counter()
+        hrefs = await read_coin_hrefs(page)
+        new_coins = record_new_coins(hrefs, processed_coins, new_coins_file, on_new) if hrefs else []
+        count_tick("poll", started, new_coins)
+        if hrefs:
+            if not new_coins:
+                print("No new coins found in this iteration.")
+        else:
+            print("No coin elements found in the 'New Pool' section.")
+        await asyncio.sleep(interval)
+
+async def install_coin_observer(page, batch_ms=0):
+    """
+    Install the MutationObserver in the current document. Safe to call repeatedly:
+    the script is a no-op when an observer is already attached.
+    """
+    await page.evaluate(NEW_COIN_OBSERVER_JS, [COIN_CONTAINER_SELECTOR, COIN_LINK_SELECTOR, BINDING_NAME, batch_ms])
+
+async def watch_new_coins(page, processed_coins, new_coins_file, fallback_interval=5, on_new=None, batch_ms=0):
+    """
+    Event-driven discovery: a MutationObserver on the "New Pool" table pushes new
+    hrefs to Python through an exposed binding, so coins are recorded as soon as
+    they render instead of on the next poll tick (or, with `batch_ms`, at most
+    once per `batch_ms` milliseconds, for pages where CPU matters more than
+    latency).
+
+    If no push arrives within `fallback_interval` seconds the table is polled once
+    and the observer is re-installed (it is lost when the page reloads). If the
+    binding cannot be exposed at all, the plain polling loop is used instead.
+    """
+    _ensure_parent_dir(new_coins_file)
+    pushed = asyncio.Queue()
+
+    def on_new_coins(source, hrefs):
+        pushed.put_nowait(hrefs)
+
+    try:
+        await page.expose_binding(BINDING_NAME, on_new_coins)
+        await install_coin_observer(page, batch_ms)
+    except Exception as e:
+        print(f"Push-based discovery unavailable ({e}); falling back to polling.")
+        await poll_new_coins(page, processed_coins, new_coins_file, fallback_interval, on_new)
+        return
+
+    print("MutationObserver installed; waiting for new coins to be pushed...")
+    while True:
+        try:
+            hrefs = await asyncio.wait_for(pushed.get(), timeout=fallback_interval)
+            source, started = "push", time.perf_counter()
+        except asyncio.TimeoutError:
+            source, started = "fallback", time.perf_counter()
+            try:
+                hrefs = await read_coin_hrefs(page)
+                await install_coin_observer(page, batch_ms)
+            except Exception as e:
+                if page.is_closed():
+                    print("The monitored page was closed; stopping push-based discovery.")
+                    return
+                print(f"Fallback poll failed: {e}")
+                continue
+        new_coins = record_new_coins(hrefs, processed_coins, new_coins_file, on_new)
+        count_tick(source, started, new_coins)
+
+def attach_network_discovery(page, processed_coins, new_coins_file, on_new=None):
+    """
+    Record new coins straight from the page's new-pair XHR responses and
+    websocket frames, before they are rendered into the table. Attach before
+    navigating so the initial new_pairs response is captured; keep
+    watch_new_coins running as the DOM fallback (both share processed_coins,
+    so a coin is only recorded once). Returns the NetworkCapture.
+    """
+    _ensure_parent_dir(new_coins_file)
+
+    def on_new_tokens(addresses):
+        started = time.perf_counter()
+        new_coins = record_new_coins(addresses, processed_coins, new_coins_file, on_new)
+        count_tick("network", started, new_coins)
+
+    capture = NetworkCapture(on_new_tokens=on_new_tokens)
+    capture.attach(page)
+    return capture
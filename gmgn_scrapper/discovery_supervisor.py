@@ -0,0 +1,224 @@
+import asyncio
+import time
+
+from discovery import COIN_CONTAINER_SELECTOR, attach_network_discovery, poll_new_coins, watch_new_coins
+from pipeline_metrics import FEED_RESTARTS, FEED_TOKENS
+from pipeline_supervisor import probe_page, run_with_watchdog
+from popup import dismiss_popup
+from readiness import stage_timeout_ms
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Settings of a discovery feed that the feed (see main.DISCOVERY_FEEDS) does
+# not set itself. A feed needs at least a "name" and a "url".
+FEED_DEFAULTS = {
+    "chain": "sol",
+    # "network", "push" or "poll" (see main.DISCOVERY_MODE); None uses the
+    # supervisor's mode.
+    "mode": None,
+    # Visible texts clicked in order once the page has loaded, to apply the
+    # feed's filter through the DOM (e.g. ["Pump"] for the launchpad chip, as
+    # the pump/moonshot/filter/apply images were meant to).
+    "filter_clicks": [],
+    # Poll interval in poll mode, fallback poll interval in push mode (seconds).
+    "interval": 5,
+    # Push mode: report new rows at most once per batch_ms milliseconds.
+    "batch_ms": 0,
+    # Chrome CPU throttling rate applied to the page (1 = not throttled).
+    "cpu_throttle": 1,
+    # Do not load images, fonts and media on the page.
+    "block_resources": False,
+    # Re-open the feed if it reports no new coin for this many seconds (None
+    # to never). The page is also re-opened if its renderer stops answering
+    # (see pipeline_supervisor.HEALTH_TIMEOUT).
+    "stall_timeout": 300,
+}
+
+# Every feed after the first is an extra page on the same browser. Unless it
+# sets them itself, it is throttled so it costs as little CPU as possible; the
+# first feed keeps the lowest latency.
+EXTRA_FEED_DEFAULTS = {
+    "interval": 10,
+    "batch_ms": 1000,
+    "cpu_throttle": 4,
+    "block_resources": True,
+    # Coins usually reach the first feed first, so an extra feed can go a
+    # long time without reporting one.
+    "stall_timeout": None,
+}
+
+# URL patterns blocked on pages with block_resources (CDP Network.setBlockedURLs).
+BLOCKED_URL_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+                        "*.woff", "*.woff2", "*.ttf", "*.mp4", "*.webm"]
+
+# Delay before re-opening a feed whose page failed, doubled on each
+# consecutive failure up to MAX_FEED_BACKOFF (seconds).
+FEED_BACKOFF = 2
+MAX_FEED_BACKOFF = 60
+
+# =============================================================================
+# Discovery Supervisor
+# =============================================================================
+
+def feed_settings(feed, primary):
+    """
+    A feed's settings with the defaults filled in.
+    """
+    return {**FEED_DEFAULTS, **({} if primary else EXTRA_FEED_DEFAULTS), **feed}
+
+class DiscoverySupervisor:
+    """
+    Runs one monitored new-pair page per discovery feed, concurrently, in one
+    browser context:
+
+        supervisor = DiscoverySupervisor(context, feeds, processed_coins, new_coins_file, on_new)
+        await supervisor.run()
+
+    All feeds share `processed_coins`, so a token is recorded once, by the
+    first feed that sees it; `on_new(addresses, feed)` receives the feed's
+    settings so the tokens can be tagged with its name and chain, and returns
+    the addresses it accepted (None accepts all); only those are counted and
+    written to the audit file. A feed whose
+    page fails is re-opened on a fresh page with backoff without disturbing
+    the others.
+    """
+
+    def __init__(self, context, feeds, processed_coins, new_coins_file, on_new, mode="push", first_page=None,
+                 popup_fallback=None):
+        self.context = context
+        self.feeds = [feed_settings(feed, i == 0) for i, feed in enumerate(feeds)]
+        self.processed_coins = processed_coins
+        self.new_coins_file = new_coins_file
+        self.on_new = on_new
+        self.mode = mode
+        self.first_page = first_page
+        # Blocking callable run (in a thread) if the first feed's pop-up cannot
+        # be dismissed through the DOM; screen-based, so only for one page.
+        self.popup_fallback = popup_fallback
+        self.found = {feed["name"]: 0 for feed in self.feeds}
+        self._last_new = {}
+        self._cdp_sessions = {}
+
+    async def run(self):
+        """
+        Monitor every feed until cancelled.
+        """
+        print(f"Watching {len(self.feeds)} discovery feeds: {', '.join(feed['name'] for feed in self.feeds)}")
+        await asyncio.gather(*(self._supervise(feed, i == 0) for i, feed in enumerate(self.feeds)))
+
+    async def _supervise(self, feed, primary):
+        page = self.first_page if primary and self.first_page is not None else None
+        backoff = FEED_BACKOFF
+        while True:
+            started = time.monotonic()
+            try:
+                if page is None or page.is_closed():
+                    page = await self.context.new_page()
+                await self._run_feed(feed, page, primary)
+                # The watch loops only return if the page went away.
+                print(f"[{feed['name']}] Discovery stopped; re-opening the feed.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[{feed['name']}] Discovery failed ({e}); re-opening in {backoff}s.")
+            FEED_RESTARTS.labels(feed=feed["name"]).inc()
+            # The old page keeps its exposed binding; start over on a new one.
+            self._cdp_sessions.pop(feed["name"], None)
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            page = None
+            if time.monotonic() - started > MAX_FEED_BACKOFF:
+                # It ran fine for a while: this is a new failure, not a repeat.
+                backoff = FEED_BACKOFF
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_FEED_BACKOFF)
+
+    def _feed_on_new(self, feed):
+        def on_new(addresses):
+            self._last_new[feed["name"]] = time.monotonic()
+            accepted = self.on_new(addresses, feed)
+            if accepted is not None:
+                addresses = accepted
+            self.found[feed["name"]] += len(addresses)
+            FEED_TOKENS.labels(feed=feed["name"]).inc(len(addresses))
+            return addresses
+        return on_new
+
+    async def _check_feed(self, page, feed):
+        """
+        Health check of a running feed: its renderer answers and, with a
+        stall_timeout, it reported a new coin recently enough.
+        """
+        await probe_page(page)
+        idle = time.monotonic() - self._last_new[feed["name"]]
+        if feed["stall_timeout"] and idle > feed["stall_timeout"]:
+            raise RuntimeError(f"no new coins for {idle:.0f}s")
+
+    async def _throttle(self, page, feed):
+        """
+        Apply the feed's CPU throttling and resource blocking to its page. The
+        CDP session is kept open: Chrome drops the overrides when it detaches.
+        """
+        if feed["cpu_throttle"] <= 1 and not feed["block_resources"]:
+            return
+        session = await self.context.new_cdp_session(page)
+        self._cdp_sessions[feed["name"]] = session
+        if feed["cpu_throttle"] > 1:
+            await session.send("Emulation.setCPUThrottlingRate", {"rate": feed["cpu_throttle"]})
+        if feed["block_resources"]:
+            await session.send("Network.enable")
+            await session.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    async def _run_feed(self, feed, page, primary):
+        name = feed["name"]
+        mode = feed["mode"] or self.mode
+        on_new = self._feed_on_new(feed)
+        await self._throttle(page, feed)
+
+        capture = None
+        if mode == "network":
+            # Listen before (re)loading the page so its initial new_pairs
+            # response is not missed.
+            capture = attach_network_discovery(page, self.processed_coins, self.new_coins_file, on_new=on_new)
+        if feed["url"] not in page.url or capture is not None:
+            print(f"[{name}] Navigating to {feed['url']}...")
+            # gmgn keeps websockets open, so "networkidle" may never settle; wait
+            # for the DOM and then for the New Pool table itself.
+            await page.goto(feed["url"], wait_until="domcontentloaded", timeout=stage_timeout_ms("ready"))
+
+        # Hide the pop-up (and any that opens later) through the DOM; no display needed.
+        try:
+            await page.wait_for_load_state("domcontentloaded", timeout=stage_timeout_ms("popup"))
+        except Exception:
+            pass
+        if not await dismiss_popup(page) and primary and self.popup_fallback is not None:
+            await asyncio.to_thread(self.popup_fallback)
+
+        for text in feed["filter_clicks"]:
+            try:
+                await page.get_by_text(text, exact=True).first.click(timeout=stage_timeout_ms("popup"))
+                print(f"[{name}] Applied filter '{text}'.")
+            except Exception as e:
+                print(f"[{name}] Could not click filter '{text}' ({e}); continuing without it.")
+
+        try:
+            await page.wait_for_selector(COIN_CONTAINER_SELECTOR, timeout=stage_timeout_ms("ready"))
+        except Exception:
+            print(f"[{name}] The 'New Pool' table did not render in time; monitoring anyway.")
+
+        print(f"[{name}] Monitoring new coins ({mode} mode, chain {feed['chain']}).")
+        self._last_new[name] = time.monotonic()
+        if mode in ("network", "push"):
+            watch = watch_new_coins(page, self.processed_coins, self.new_coins_file,
+                                    fallback_interval=feed["interval"], on_new=on_new, batch_ms=feed["batch_ms"])
+        else:
+            watch = poll_new_coins(page, self.processed_coins, self.new_coins_file, interval=feed["interval"],
+                                   on_new=on_new)
+        # A hung renderer never raises by itself; the watchdog ends the watch
+        # so the feed is re-opened.
+        await run_with_watchdog(watch, f"feed {name}", lambda: self._check_feed(page, feed))
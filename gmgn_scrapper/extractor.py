@@ -0,0 +1,154 @@
+import re
+
+# =============================================================================
+# Field Patterns
+# =============================================================================
+
+# Compiled once at import. Each pattern starts with its label as a literal, so
+# the regex engine can skip ahead with its fast literal-prefix search. Single-pass
+# scans over the text (one alternation of all fields, or a label scan with
+# anchored value matches) were slower on the saved page dumps; bench_extract.py
+# measures them against these patterns and the original extract_data.
+FIELD_PATTERNS = [
+    ("snipers", re.compile(r"Snipers\s*\n\s*>\s*\n\s*(\S+)")),
+    ("bluechip", re.compile(r"BlueChip\s*\n\s*>\s*\n\s*(\S+)")),
+    ("top10", re.compile(r"Top 10\s*\n\s*(\S+)")),
+    ("audit", re.compile(r"Audit\s*\n\s*>\s*\n\s*(\S+)\s*\n\s*(\S+)")),
+    ("rug_prob", re.compile(r"Rug probability\s*\n\s*(\S+)")),
+]
+
+FIELDS = [field for field, _ in FIELD_PATTERNS]
+
+_RATIO = re.compile(r"(\d+)/(\d+)")
+_PERCENT = re.compile(r"([-+]?\d+(?:\.\d+)?)%")
+
+# =============================================================================
+# Extraction
+# =============================================================================
+
+def extract_fields(text):
+    """
+    Extract the raw value strings with the precompiled patterns, keyed like
+    extract_data: snipers, bluechip, top10, audit ('' when missing) and
+    rug_prob (None when missing).
+    """
+    groups = {}
+    for field, pattern in FIELD_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            groups[field] = match.groups()
+    return fields_from_groups(groups)
+
+def fields_from_groups(groups):
+    """
+    Build the extract_data-shaped dict from {field: matched groups}.
+    """
+    found = {field: " ".join(values) for field, values in groups.items()}
+    return {
+        "snipers": found.get("snipers", ""),
+        "bluechip": found.get("bluechip", ""),
+        "top10": found.get("top10", ""),
+        "audit": found.get("audit", ""),
+        "rug_prob": found.get("rug_prob"),
+    }
+
+# =============================================================================
+# In-page Extraction
+# =============================================================================
+
+# Runs inside the page on the target panel. Joins the panel's text nodes the way
+# BeautifulSoup's get_text(separator="\n", strip=True) does, applies the same
+# field patterns (their syntax is valid in JavaScript too) and returns only the
+# matched groups, so neither the panel HTML nor its text leaves the browser.
+PANEL_FIELDS_JS = """
+(panel, patterns) => {
+    const walker = document.createTreeWalker(panel, NodeFilter.SHOW_TEXT);
+    const parts = [];
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        const value = node.nodeValue.trim();
+        if (value) parts.push(value);
+    }
+    const text = parts.join('\\n');
+    const groups = {};
+    for (const [field, source] of patterns) {
+        const match = new RegExp(source).exec(text);
+        if (match) groups[field] = match.slice(1);
+    }
+    return groups;
+}
+"""
+
+PANEL_PATTERNS = [[field, pattern.pattern] for field, pattern in FIELD_PATTERNS]
+
+async def extract_fields_in_page(page, selector):
+    """
+    Extract the fields from the element matching `selector` inside the page.
+    Returns the same dict as extract_fields. Raises if the element is missing.
+    """
+    groups = await page.eval_on_selector(selector, PANEL_FIELDS_JS, PANEL_PATTERNS)
+    return fields_from_groups(groups)
+
+def text_from_html(html):
+    """
+    Plain text of an HTML fragment, one text node per line. Used for saved-HTML
+    replays and as the fallback when in-page extraction is not possible.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.get_text(separator="\n", strip=True)
+
+# =============================================================================
+# Typed Conversion
+# =============================================================================
+
+def parse_ratio(value):
+    """
+    "13/22" -> (13, 22); None when the value is missing or malformed.
+    """
+    match = _RATIO.fullmatch(value or "")
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def parse_percent(value):
+    """
+    "25.3%" -> 25.3; None when the value is missing or malformed.
+    """
+    match = _PERCENT.fullmatch(value or "")
+    return float(match.group(1)) if match else None
+
+def parse_audit(value):
+    """
+    "Safe 4/4" -> ("Safe", 4, 4); None when the value is missing or malformed.
+    """
+    verdict, _, score = (value or "").partition(" ")
+    ratio = parse_ratio(score)
+    return (verdict, ratio[0], ratio[1]) if verdict and ratio else None
+
+def to_typed(raw):
+    """
+    Convert the raw strings returned by extract_fields to typed values:
+    snipers/snipers_total and audit_passed/audit_total as ints, bluechip,
+    top10 and rug_prob as float percentages, audit as the verdict string.
+    Fields that are absent or could not be parsed are None and listed in
+    "missing".
+    """
+    snipers = parse_ratio(raw.get("snipers"))
+    audit = parse_audit(raw.get("audit"))
+    typed = {
+        "snipers": snipers[0] if snipers else None,
+        "snipers_total": snipers[1] if snipers else None,
+        "bluechip": parse_percent(raw.get("bluechip")),
+        "top10": parse_percent(raw.get("top10")),
+        "audit": audit[0] if audit else None,
+        "audit_passed": audit[1] if audit else None,
+        "audit_total": audit[2] if audit else None,
+        "rug_prob": parse_percent(raw.get("rug_prob")),
+    }
+    typed["missing"] = [field for field in FIELDS if typed[field] is None]
+    return typed
+
+def extract_typed(text):
+    """
+    Extract straight to typed values (see to_typed).
+    """
+    return to_typed(extract_fields(text))
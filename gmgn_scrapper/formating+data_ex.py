@@ -2,35 +2,67 @@ import asyncio
 import time
 import subprocess
 import os
-import sys
-import pyautogui
-import pandas as pd
-import re
 import csv
-from bs4 import BeautifulSoup
+from token_tailer import TokenTailer
+from token_index import open_token_index
+from metrics_store import MetricsStore
+from token_metrics import TokenMetrics
+from extractor import extract_fields, extract_fields_in_page, text_from_html, to_typed
+from readiness import STAGE_TIMEOUTS, StageTimer, stage_timeout_ms, wait_for_cdp
+from popup import dismiss_popup, popup_init_script
+from pipeline_log import setup_logging
+from pipeline_metrics import (DISCOVERY_TO_ANALYSIS_SECONDS, EXTRACTION_FAILURES, RESCORE_PENDING, RESCORES,
+                              SCRAPE_SECONDS, TOKEN_BACKLOG, TOKENS_ANALYZED, export_snapshots, write_snapshot)
+from rescore_scheduler import RESCORE_SCHEDULE, RescoreScheduler, is_stable
+from pipeline_supervisor import Checkpoint, reap_process, run_with_watchdog, supervise, supervise_sync
+from runtime_config import (CONFIG, browser_slot, instance_file, instance_name, owns_token, resolve_chrome,
+                            resolve_headless)
 
 # =============================================================================
 # Configuration
 # =============================================================================
 
 # Base URL with placeholder (token)
-BASE_URL = "https://gmgn.ai/sol/token/{placeholder}"
-
-# Path to your Chrome executable (adjust if needed)
-CHROME_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-
-# Temporary user data directory (make sure it exists)
-TEMP_USER_DATA_DIR = r"C:\temp\my_temp_chrome_profile"
-os.makedirs(TEMP_USER_DATA_DIR, exist_ok=True)
-
-# Remote debugging port for Chrome (must be free)
-REMOTE_DEBUGGING_PORT = 9223
-
-# Image file path for the pop-up close (cross) button
-IMAGE_CLOSE = "./images/close_button.png"
-
-# Confidence level for image matching (requires OpenCV)
-CONFIDENCE = 0.8
+BASE_URL = CONFIG.token_url
+
+# Chrome executable (auto-detected unless chrome_path is set). Each analyzer
+# instance has its own profile directory and remote debugging port (see
+# chrome_slot), so several analyzers run side by side. With
+# analyzer_instances > 1 each instance only analyzes its share of the tokens
+# (see runtime_config.owns_token).
+CHROME_PATH = CONFIG.chrome_path
+
+# The pop-up is dismissed through the DOM (see popup.py). Set to True to fall
+# back to clicking the close button image on screen (needs a display and OpenCV).
+POPUP_IMAGE_FALLBACK = False
+
+# "pool" analyzes tokens concurrently in ANALYZER_WORKERS tabs of one long-lived
+# Chrome; "serial" launches Chrome per token and closes it with Ctrl+w.
+ANALYZER_MODE = "pool"
+ANALYZER_WORKERS = 4
+
+# Run the pool's Chrome without a window (the serial mode always needs one). By
+# default only on Linux hosts without a display.
+HEADLESS = resolve_headless(CONFIG)
+
+# Where the pool gets new tokens from: "bus" subscribes to the token bus served
+# by the discovery script (see token_bus.py), so tokens arrive as soon as they
+# are discovered; "file" tails TOKEN_FILE_PATH (the discovery audit file). The
+# serial mode always reads the file.
+TOKEN_SOURCE = "bus"
+
+# Chains whose tokens are analyzed. Discovery can watch other chains too (see
+# DISCOVERY_FEEDS in main.py), but BASE_URL and the security payload decoding
+# are Solana-only, so their tokens are skipped here.
+ANALYZER_CHAINS = ("sol",)
+
+# On start, tokens discovered within this many seconds that were never analyzed
+# (e.g. while the analyzer was down) are queued before new ones from the bus.
+BACKFILL_WINDOW = 3600
+
+# Seconds between checks of the token file for newly appended tokens (file
+# source), and between metrics store flush checks.
+TOKEN_POLL_INTERVAL = 1
 
 # Paths for token input and logging/output folders
 TOKEN_FILE_PATH = "./data/new_coins.txt"
@@ -38,66 +70,51 @@ LOG_FILE_PATH = "./data/log.txt"
 OUTPUT_DIR = "./data"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# =============================================================================
-# Stdout Tee Setup (logs stdout to both console and a log file)
-# =============================================================================
+# Also write the old one-CSV-per-token files next to the metrics store.
+WRITE_LEGACY_CSV = False
 
-class Tee:
-    """
-    A simple class to redirect stdout to multiple file-like objects.
-    """
-    def __init__(self, *files):
-        self.files = files
+# Scrape analyzed tokens again at the decaying intervals of RESCORE_SCHEDULE
+# (see rescore_scheduler.py), within its budget and only on workers that new
+# tokens leave idle; every sample is kept as the token's time series. Pool
+# mode only.
+RESCORE = True
 
-    def write(self, obj):
-        for f in self.files:
-            f.write(obj)
-            f.flush()
+# Order in which the token backlog is drained: "fifo" (oldest first) or "newest".
+TOKEN_ORDER = "fifo"
 
-    def flush(self):
-        for f in self.files:
-            f.flush()
+# Panel holding the token's security metrics.
+TARGET_SELECTOR = CONFIG.target_selector
 
-def setup_stdout_tee(log_file_path):
-    log_dir = os.path.dirname(log_file_path)
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = open(log_file_path, "a", encoding="utf-8")
-    sys.stdout = Tee(sys.stdout, log_file)
+# "network" decodes the token security XHR the page loads and falls back to "dom"
+# if it does not arrive (the serial mode attaches after navigation and always
+# reads the panel; experimental, its payload decoder is unverified, see
+# network_capture.py); "dom" extracts the fields inside the page and only transfers
+# the values; "html" transfers the panel HTML and parses it with BeautifulSoup.
+EXTRACTION_MODE = "dom"
 
 # =============================================================================
-# PyAutoGUI Helper Function
+# Browser Launch and Termination
 # =============================================================================
 
-def wait_and_click(image_file, description, timeout=30, region=None, confidence=CONFIDENCE):
+def chrome_slot():
     """
-    Wait until the given image appears on the screen (or within a region) and then click its center.
+    (remote debugging port, profile directory) of this analyzer instance.
+    Resolved when the analyzer runs rather than at import, so importing this
+    script works in any process, whatever its instance number.
     """
-    print(f"Waiting for {description}...")
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        location = pyautogui.locateOnScreen(image_file, confidence=confidence, region=region)
-        if location:
-            center = pyautogui.center(location)
-            pyautogui.moveTo(center.x, center.y, duration=0.25)
-            pyautogui.click()
-            print(f"Clicked on {description}.")
-            return True
-        time.sleep(1)
-    print(f"Timeout: Could not find {description}.")
-    return False
-
-# =============================================================================
-# Browser Launch and Termination
-# =============================================================================
+    return browser_slot("analyzer", CONFIG)
 
 def launch_browser(url):
     """
     Launch a new Chrome instance with remote debugging enabled and open the given URL.
     """
+    port, user_data_dir = chrome_slot()
+    os.makedirs(user_data_dir, exist_ok=True)
     args = [
-        CHROME_PATH,
-        f"--remote-debugging-port={REMOTE_DEBUGGING_PORT}",
-        f"--user-data-dir={TEMP_USER_DATA_DIR}",
+        CHROME_PATH or resolve_chrome(CONFIG),
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={user_data_dir}",
+        *CONFIG.chrome_args,
         url
     ]
     process = subprocess.Popen(args)
@@ -108,73 +125,69 @@ def terminate_browser_with_pyautogui(process):
     """
     Close the Chrome tab using the Ctrl+w shortcut via pyautogui.
     """
+    import pyautogui
+
     print("Closing the Chrome tab using Ctrl+w shortcut...")
     pyautogui.hotkey('ctrl', 'w')
-    time.sleep(3)
     print("Chrome tab closed.")
 
 # =============================================================================
-# Token File Reader using Pandas
-# =============================================================================
-
-def read_last_token(file_path):
-    """
-    Reads the token (placeholder) from the last non-empty line of a text file.
-    """
-    if not os.path.exists(file_path):
-        print(f"Token file {file_path} does not exist.")
-        return None
-    try:
-        df = pd.read_csv(file_path, header=None, names=["token"])
-        if df.empty:
-            print("Token file is empty.")
-            return None
-        last_token = df.iloc[-1]["token"]
-        return str(last_token).strip()
-    except Exception as e:
-        print(f"Error reading token file: {e}")
-        return None
-
-# =============================================================================
-# Asynchronous Scraping using Playwright & BeautifulSoup
+# Asynchronous Scraping using Playwright
 # =============================================================================
 
-async def scrape_page_text():
+async def scrape_page_fields(url, timer, mode=EXTRACTION_MODE):
     """
-    Connect to the Chrome instance via the CDP, wait for the page to load,
-    and then scrape the text only from the target div (with class "css-1jy8g2v").
-    It then uses BeautifulSoup to extract the plain text.
+    Connect to the Chrome instance via the CDP, dismiss the pop-up, wait until
+    the target div (TARGET_SELECTOR) is rendered on the page showing
+    `url`, and extract the fields from it. The "popup", "ready" and "extract"
+    stages are recorded on `timer`.
+    In "dom" (or "network") mode the fields are extracted inside the page and
+    only the values are transferred; in "html" mode the div's HTML is parsed
+    with BeautifulSoup.
+    Returns the extract_data dict, or None if nothing could be scraped.
     """
     from playwright.async_api import async_playwright
 
-    page_text = ""
+    extracted = None
     p = await async_playwright().start()
     try:
-        browser = await p.chromium.connect_over_cdp(f"http://localhost:{REMOTE_DEBUGGING_PORT}")
+        browser = await p.chromium.connect_over_cdp(f"http://localhost:{chrome_slot()[0]}")
         context = browser.contexts[0] if browser.contexts else None
         if not context:
             print("No browser context found.")
         else:
             pages = context.pages
             if pages:
-                page = pages[0]
-                await page.wait_for_load_state("networkidle")
-                # Instead of scraping the entire body, get inner HTML of the target div.
-                try:
-                    div_html = await page.inner_html("div.css-1jy8g2v")
-                except Exception as e:
-                    print("Target div not found. Falling back to entire body.")
-                    div_html = await page.inner_html("body")
-                soup = BeautifulSoup(div_html, "html.parser")
-                page_text = soup.get_text(separator="\n", strip=True)
-                print("Scraped text from target div.")
+                page = next((pg for pg in pages if pg.url == url), pages[0])
+                with timer.stage("popup"):
+                    try:
+                        await page.wait_for_load_state("domcontentloaded", timeout=stage_timeout_ms("popup"))
+                    except Exception:
+                        pass
+                    if not await dismiss_popup(page, image_fallback=POPUP_IMAGE_FALLBACK):
+                        print("Could not dismiss the pop-up; continuing anyway.")
+                # Wait for the target div itself rather than for "networkidle",
+                # which the page's websockets can hold off indefinitely.
+                selector = TARGET_SELECTOR
+                with timer.stage("ready"):
+                    try:
+                        await page.wait_for_selector(selector, timeout=stage_timeout_ms("ready"))
+                    except Exception:
+                        print("Target div not found. Falling back to entire body.")
+                        selector = "body"
+                with timer.stage("extract"):
+                    if mode != "html":
+                        extracted = await extract_fields_in_page(page, selector)
+                    else:
+                        extracted = extract_data(text_from_html(await page.inner_html(selector)))
+                print(f"Scraped fields from {selector} ({mode} mode).")
             else:
                 print("No pages found in the browser context.")
         await p.stop()
     except Exception as e:
         print(f"Error during scraping: {e}")
         await p.stop()
-    return page_text
+    return extracted
 
 # =============================================================================
 # Regex Extraction Function
@@ -182,39 +195,10 @@ async def scrape_page_text():
 
 def extract_data(text):
     """
-    Use regex to extract the required fields from the given text.
+    Extract the required fields from the given text with the precompiled field patterns (see extractor.py).
     Returns a dictionary with keys: snipers, bluechip, top10, audit, and (optionally) rug_prob.
     """
-    # Extract "Snipers": expects pattern: "Snipers" then a line with ">" then the value.
-    snipers_match = re.search(r'Snipers\s*\n\s*>\s*\n\s*(\S+)', text)
-    snipers = snipers_match.group(1) if snipers_match else ''
-
-    # Extract "BlueChip": expects similar pattern.
-    bluechip_match = re.search(r'BlueChip\s*\n\s*>\s*\n\s*(\S+)', text)
-    bluechip = bluechip_match.group(1) if bluechip_match else ''
-
-    # Extract "Top 10": expects the value immediately following "Top 10".
-    top10_match = re.search(r'Top 10\s*\n\s*(\S+)', text)
-    top10 = top10_match.group(1) if top10_match else ''
-
-    # Extract "Audit": expects a ">" line then two lines (e.g., "Safe" and "4/4").
-    audit_match = re.search(r'Audit\s*\n\s*>\s*\n\s*(\S+)\s*\n\s*(\S+)', text)
-    if audit_match:
-        audit = f"{audit_match.group(1)} {audit_match.group(2)}"
-    else:
-        audit = ''
-
-    # Optionally extract "Rug probability": the value immediately following the line.
-    rug_prob_match = re.search(r'Rug probability\s*\n\s*(\S+)', text)
-    rug_prob = rug_prob_match.group(1) if rug_prob_match else None
-
-    return {
-        'snipers': snipers,
-        'bluechip': bluechip,
-        'top10': top10,
-        'audit': audit,
-        'rug_prob': rug_prob
-    }
+    return extract_fields(text)
 
 # =============================================================================
 # CSV Writing Function
@@ -243,70 +227,320 @@ def write_csv(data, csv_file_path):
     print(f"Extracted data written to {csv_file_path}")
 
 # =============================================================================
-# Main Loop
+# Result Handling
 # =============================================================================
 
-def main():
-    # Set up logging (stdout now goes to console and the log file)
-    setup_stdout_tee(LOG_FILE_PATH)
-    
-    print("=== Starting Token-Based Scraping Automation ===")
-    
-    while True:
-        print("\n----- New Iteration -----")
-        # 1. Read the token (placeholder) from the last line of the token file
-        token = read_last_token(TOKEN_FILE_PATH)
-        if not token:
-            print("No valid token found. Waiting for 10 seconds before retrying...")
-            time.sleep(10)
-            continue
+def handle_extracted(token, extracted, token_index, metrics_store, token_metrics, timer):
+    """
+    Append the fields extracted for a token to the metrics store, store its
+    typed values and risk score for the query API, mark the token as analyzed
+    in the shared token index and log its stage timings. Returns the stored
+    row, or None if nothing was scraped.
+    """
+    if extracted is None:
+        print(f"Nothing scraped for {token}; skipping.")
+        TOKENS_ANALYZED.labels(result="empty").inc()
+        timer.finish()
+        return None
+    print(f"Extracted Data for {token}:")
+    for key, value in extracted.items():
+        print(f"  {key}: {value}")
+    missing = to_typed(extracted)["missing"]
+    if missing:
+        print(f"  missing or unparsable: {', '.join(missing)}")
+    for field in missing:
+        EXTRACTION_FAILURES.labels(field=field).inc()
+
+    # Append the extracted data to the metrics store (and the legacy CSV file)
+    with timer.stage("persist"):
+        metrics_store.append(token, extracted)
+        row = token_metrics.ingest(token, extracted)
+        print(f"  risk score: {row['risk']}")
+        if WRITE_LEGACY_CSV:
+            write_csv(dict(extracted), os.path.join(OUTPUT_DIR, f"{token}.csv"))
+        token_index.mark_analyzed(token)
+    TOKENS_ANALYZED.labels(result="stored").inc()
+    first_seen = token_index.first_seen(token)
+    if first_seen:
+        DISCOVERY_TO_ANALYSIS_SECONDS.observe(time.time() - first_seen)
+    timer.finish()
+    return row
+
+def handle_rescored(token, extracted, step, analyzed_at, scheduler, metrics_store, token_metrics, timer):
+    """
+    Store a re-sample of an analyzed token as a new point of its time series
+    and schedule its next re-sample, unless its metrics have become stable.
+    The token index keeps the time of the first analysis.
+    """
+    if extracted is None:
+        print(f"Nothing scraped when re-scoring {token}; trying again at the next step.")
+        RESCORES.labels(result="empty").inc()
+        scheduler.add(token, analyzed_at, step + 1)
+        timer.finish()
+        return
+    with timer.stage("persist"):
+        previous = token_metrics.get(token)
+        metrics_store.append(token, extracted)
+        row = token_metrics.ingest(token, extracted)
+        if WRITE_LEGACY_CSV:
+            write_csv(dict(extracted), os.path.join(OUTPUT_DIR, f"{token}.csv"))
+    samples = token_metrics.history(token, since=analyzed_at)
+    stable = is_stable(samples)
+    print(f"Re-scored {token} {row['updated_at'] - analyzed_at:.0f}s after its first analysis: "
+          f"risk {previous['risk'] if previous else None} -> {row['risk']}"
+          f"{' (stable, no more re-samples)' if stable else ''}")
+    RESCORES.labels(result="stable" if stable else "stored").inc()
+    scheduler.record(token, step, samples)
+    timer.finish()
 
-        # Determine the CSV file path for the current token
-        CSV_FILE_PATH = os.path.join(OUTPUT_DIR, f"{token}.csv")
-        if os.path.exists(CSV_FILE_PATH):
-            print(f"Token {token} has already been processed. Waiting for a new token...")
-            time.sleep(5)
-            continue
+# =============================================================================
+# Serial Loop (one Chrome launch per token)
+# =============================================================================
 
-        # 2. Construct the URL from the BASE_URL and token
-        url = BASE_URL.format(placeholder=token)
-        print(f"Constructed URL: {url}")
+def run_serial():
+    tailer = TokenTailer(TOKEN_FILE_PATH, instance_file(TOKEN_FILE_PATH, CONFIG) + ".offset", order=TOKEN_ORDER)
+    token_index = open_token_index()
+    metrics_store = MetricsStore(instance=CONFIG.instance)
+    token_metrics = TokenMetrics()
+    # The tailer forgets a token once it is handed out; the checkpoint keeps
+    # it until it is analyzed, so a crash mid-token does not lose it.
+    checkpoint = Checkpoint(instance_name("analyzer", CONFIG))
+    resume = checkpoint.state.get("current")
+    if resume:
+        print(f"Resuming with token {resume}, which the last run did not finish.")
+    # The stores are closed when the loop fails, so the restart in main()
+    # opens fresh ones.
+    try:
+        while True:
+            print("\n----- New Iteration -----")
+            # 1. Take the next token from the backlog of newly appended tokens
+            tailer.poll()
+            TOKEN_BACKLOG.set(len(tailer))
+            write_snapshot(instance_name("analyzer", CONFIG))
+            token, resume = resume or tailer.next_token(), None
+            if not token:
+                metrics_store.flush_if_due()
+                print("No new token found. Waiting for 5 seconds before retrying...")
+                time.sleep(5)
+                continue
+
+            if not owns_token(token, CONFIG):
+                continue
+            if token_index.is_analyzed(token):
+                print(f"Token {token} has already been processed. Skipping.")
+                continue
+
+            # 2. Construct the URL from the BASE_URL and token
+            url = BASE_URL.format(placeholder=token)
+            print(f"Constructed URL: {url}")
+            timer = StageTimer(token)
+            checkpoint.update(current=token)
+            checkpoint.save()
+
+            # 3. Launch Chrome with the constructed URL and wait until it accepts CDP connections
+            with timer.stage("launch"):
+                chrome_process = launch_browser(url)
+                if not wait_for_cdp(chrome_slot()[0]):
+                    print("Chrome did not open its remote debugging port in time.")
+
+            try:
+                # 4-6. Dismiss the pop-up, wait for the target div and extract its fields using Playwright
+                try:
+                    started = time.perf_counter()
+                    # Bounded as a whole, so a hung page cannot stall the loop.
+                    budget = sum(STAGE_TIMEOUTS[stage] for stage in ("popup", "ready", "extract"))
+                    extracted = asyncio.run(asyncio.wait_for(scrape_page_fields(url, timer, EXTRACTION_MODE), budget))
+                    SCRAPE_SECONDS.labels(mode=EXTRACTION_MODE).observe(time.perf_counter() - started)
+                except Exception as e:
+                    print(f"Error during asynchronous scraping: {e!r}")
+                    extracted = None
+
+                # 7. Append the extracted fields to the metrics store
+                handle_extracted(token, extracted, token_index, metrics_store, token_metrics, timer)
+                checkpoint.update(current=None)
+                checkpoint.save()
+            finally:
+                # 8. Close the Chrome tab using the Ctrl+w shortcut via pyautogui,
+                # and make sure the Chrome launched for this token is gone.
+                try:
+                    terminate_browser_with_pyautogui(chrome_process)
+                finally:
+                    reap_process(chrome_process)
+            print("Iteration complete.\n")
+    finally:
+        metrics_store.close()
+        token_metrics.close()
+        token_index.close()
 
-        # 3. Launch Chrome with the constructed URL
-        chrome_process = launch_browser(url)
-        time.sleep(5)  # Wait for Chrome to load
+# =============================================================================
+# Pool Loop (N concurrent tabs on one CDP-connected Chrome)
+# =============================================================================
 
-        # 4. (Optional) Click the pop-up close button if present
-        if not wait_and_click(IMAGE_CLOSE, "pop-up close button", timeout=30):
-            print("Could not perform the pyautogui action for the pop-up; continuing anyway.")
+async def run_pool():
+    """
+    Start one long-lived browser session and analyze tokens with ANALYZER_WORKERS
+    pages in use at the same time. Pages are reused across tokens; each navigates
+    with page.goto and waits for the target div instead of sleeping a fixed time.
+    Tokens come from the token bus or the token file (see TOKEN_SOURCE); with
+    RESCORE, analyzed tokens are re-sampled on idle workers. Raises
+    HealthCheckFailed if Chrome stops answering; main() then starts over.
+    """
+    from analyzer_pool import run_analyzer_pool
+    from browser_session import BrowserSession
+
+    # The pop-up is hidden by CSS injected into every page the session loads.
+    session = BrowserSession(CHROME_PATH or resolve_chrome(CONFIG), *chrome_slot(), headless=HEADLESS,
+                             init_script=popup_init_script(), extra_args=CONFIG.chrome_args)
+    token_index = open_token_index()
+    metrics_store = MetricsStore(instance=CONFIG.instance)
+    token_metrics = TokenMetrics()
+    # Tokens handed to the workers but not finished yet; the bus backlog and
+    # the tailer only cover tokens that were never handed out.
+    checkpoint = Checkpoint(instance_name("analyzer", CONFIG))
+    try:
+        await session.ensure_started()
+
+        queue = asyncio.Queue()
+        in_flight = set()
+
+        scheduler = None
+        # token -> (step, first analysis time) of the re-samples in flight.
+        rescans = {}
+        if RESCORE and RESCORE_SCHEDULE:
+            scheduler = RescoreScheduler()
+            histories = token_metrics.recent_histories(time.time() - RESCORE_SCHEDULE[-1])
+            restored = scheduler.restore({token: samples for token, samples in histories.items()
+                                          if owns_token(token, CONFIG)})
+            if restored:
+                print(f"Resumed the re-scoring schedule of {restored} recently analyzed tokens.")
+
+        def on_result(token, extracted, timer):
+            in_flight.discard(token)
+            checkpoint.update(in_flight=sorted(in_flight), last_token=token)
+            if token in rescans:
+                step, analyzed_at = rescans.pop(token)
+                handle_rescored(token, extracted, step, analyzed_at, scheduler, metrics_store, token_metrics, timer)
+                return
+            row = handle_extracted(token, extracted, token_index, metrics_store, token_metrics, timer)
+            if scheduler is not None and row is not None:
+                scheduler.add(token, row["updated_at"])
+
+        def schedule_rescans():
+            # New tokens go first: re-samples only take workers nothing else is waiting for.
+            idle = ANALYZER_WORKERS - len(in_flight)
+            if idle > 0 and queue.empty():
+                for token, step, analyzed_at in scheduler.pop_due(idle):
+                    rescans[token] = (step, analyzed_at)
+                    in_flight.add(token)
+                    queue.put_nowait(token)
+            RESCORE_PENDING.set(len(scheduler))
+
+        def enqueue(token):
+            if not owns_token(token, CONFIG) or token in in_flight or token_index.is_analyzed(token):
+                return False
+            in_flight.add(token)
+            queue.put_nowait(token)
+            checkpoint.update(in_flight=sorted(in_flight))
+            return True
 
-        time.sleep(10)  # Allow page to settle
+        resumed = sum(enqueue(token) for token in checkpoint.state.get("in_flight", []))
+        if resumed:
+            print(f"Queued {resumed} tokens the last run did not finish.")
+
+        pool = asyncio.create_task(run_analyzer_pool(session, queue, on_result, ANALYZER_WORKERS, BASE_URL,
+                                                     TARGET_SELECTOR, mode=EXTRACTION_MODE))
+        print(f"Analyzer pool started with {ANALYZER_WORKERS} workers.")
+        if TOKEN_SOURCE == "bus":
+            feeder = asyncio.create_task(feed_from_bus(enqueue, token_index))
+        else:
+            feeder = asyncio.create_task(feed_from_file(enqueue, queue))
+        exporter = asyncio.create_task(export_snapshots(instance_name("analyzer", CONFIG)))
+
+        async def monitor():
+            while not pool.done() and not feeder.done():
+                metrics_store.flush_if_due()
+                checkpoint.save_if_due()
+                TOKEN_BACKLOG.set(queue.qsize())
+                if scheduler is not None:
+                    schedule_rescans()
+                await asyncio.sleep(TOKEN_POLL_INTERVAL)
+            # Surface the error of whichever task ended.
+            for task in (pool, feeder):
+                if task.done():
+                    task.result()
 
-        # 5. Scrape the target div's text using Playwright and BeautifulSoup
         try:
-            page_text = asyncio.run(scrape_page_text())
-        except Exception as e:
-            print(f"Error during asynchronous scraping: {e}")
-            page_text = ""
+            await run_with_watchdog(monitor(), "analyzer browser", session.probe)
+        finally:
+            for task in (pool, feeder, exporter):
+                task.cancel()
+            await asyncio.gather(pool, feeder, exporter, return_exceptions=True)
+    finally:
+        checkpoint.save()
+        metrics_store.close()
+        token_metrics.close()
+        token_index.close()
+        await session.close()
+
+async def feed_from_bus(enqueue, token_index):
+    """
+    Queue the recent tokens that were never analyzed, then every token published
+    on the token bus the moment it arrives.
+    """
+    from token_bus import subscribe_all
+
+    backlog = token_index.pending_tokens(since=time.time() - BACKFILL_WINDOW, chains=ANALYZER_CHAINS)
+    queued = sum(enqueue(token) for token in backlog)
+    if queued:
+        print(f"Queued {queued} recently discovered tokens that were not analyzed yet.")
+    async for event in subscribe_all():
+        token = event.get("token")
+        if event.get("chain", "sol") not in ANALYZER_CHAINS:
+            continue
+        if token and enqueue(token):
+            print(f"Queued token {token} from the token bus "
+                  f"({(time.time() - event.get('ts', time.time())) * 1000:.0f} ms after discovery).")
 
-        if not page_text:
-            print("No page text retrieved; skipping extraction for this iteration.")
+async def feed_from_file(enqueue, queue):
+    """
+    Tail the token file and queue newly appended tokens.
+    """
+    tailer = TokenTailer(TOKEN_FILE_PATH, instance_file(TOKEN_FILE_PATH, CONFIG) + ".offset", order=TOKEN_ORDER)
+    while True:
+        tailer.poll()
+        # Only hand out as many tokens as there are workers, so the rest of
+        # the backlog stays in the tailer's persisted state across restarts.
+        while queue.qsize() < ANALYZER_WORKERS:
+            token = tailer.next_token()
+            if not token:
+                break
+            if enqueue(token):
+                print(f"Queued token {token} ({len(tailer)} left in backlog).")
+        await asyncio.sleep(TOKEN_POLL_INTERVAL)
+
+# =============================================================================
+# Main Loop
+# =============================================================================
+
+def main():
+    # Set up logging (stdout goes to the console and the rotated log file via a background thread)
+    setup_logging(instance_file(LOG_FILE_PATH, CONFIG))
+    
+    if CONFIG.instance >= CONFIG.analyzer_instances:
+        print(f"Analyzer instance {CONFIG.instance} is out of range: analyzer_instances is "
+              f"{CONFIG.analyzer_instances}.")
+        return
+    print("=== Starting Token-Based Scraping Automation ===")
+
+    # The analyzer is restarted with backoff whenever it fails or stops; its
+    # Chrome is stopped before each restart, so none is left behind.
+    try:
+        if ANALYZER_MODE == "pool":
+            asyncio.run(supervise("analyzer", run_pool))
         else:
-            # 6. Extract the required fields using regex
-            extracted = extract_data(page_text)
-            print("Extracted Data:")
-            for key, value in extracted.items():
-                print(f"  {key}: {value}")
-            
-            # 7. Write the extracted data to the CSV file
-            write_csv(extracted, CSV_FILE_PATH)
-
-        # 8. Close the Chrome tab using the Ctrl+w shortcut via pyautogui
-        terminate_browser_with_pyautogui(chrome_process)
-
-        # Wait before checking for new tokens
-        print("Iteration complete. Waiting for 5 seconds before next iteration...\n")
-        time.sleep(5)
+            supervise_sync("analyzer", run_serial)
+    except KeyboardInterrupt:
+        print("=== Token-Based Scraping Automation stopped ===")
 
 if __name__ == "__main__":
     main()
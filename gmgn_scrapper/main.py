@@ -2,33 +2,83 @@ import asyncio
 import time
 import subprocess
 import os
-import sys
-import pyautogui
-import pandas as pd
+from discovery_supervisor import DiscoverySupervisor
+from token_index import open_token_index
+from token_bus import TokenBus, bus_port, serve_bus
+from readiness import wait_for_cdp
+from popup import IMAGE_CLOSE, wait_and_click
+from pipeline_log import setup_logging
+from pipeline_metrics import export_snapshots
+from pipeline_supervisor import Checkpoint, probe_browser, reap_process, run_with_watchdog, supervise
+from runtime_config import CONFIG, browser_slot, instance_file, instance_name, resolve_chrome, resolve_headless
 
 # =============================================================================
 # Configuration for the separate Chrome instance
 # =============================================================================
-# Path to your Chrome executable (adjust as needed).
-chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+# Chrome, its profile and its port come from the runtime config (see
+# runtime_config.py): Chrome is auto-detected unless chrome_path is set, and
+# each discovery instance (GMGN_INSTANCE) gets its own profile directory and
+# remote debugging port (see chrome_slot), so several can run side by side.
+chrome_path = CONFIG.chrome_path
 
-# Use a temporary folder for this browser instance's user data.
-temp_user_data_dir = r"C:\temp\my_temp_chrome_profile"
-os.makedirs(temp_user_data_dir, exist_ok=True)
+# The target URL to open.
+URL = CONFIG.new_pair_url
 
-# Use a dedicated remote debugging port (different from your default, if any).
-remote_debugging_port = 9223
+# "network" records new coins from the page's new-pair XHR/websocket payloads
+# before they render (with "push" as the DOM fallback; experimental, its
+# payload decoders are unverified, see network_capture.py); "push" reports new
+# coins through a DOM MutationObserver as soon as they render; "poll" re-reads
+# the "New Pool" table every POLL_INTERVAL seconds.
+DISCOVERY_MODE = "push"
 
-# The target URL to open.
-URL = "https://gmgn.ai/new-pair?chain=sol"
+# Poll interval in poll mode, and the fallback poll interval in push mode (seconds).
+POLL_INTERVAL = 5
+
+# New-pair views that can be monitored, each on its own page of the same
+# browser (see discovery_supervisor.py for every setting). The filtered views
+# select their filter by clicking its label, which depends on gmgn's current
+# page text, so they are only watched when named in discovery_feeds.
+FEED_CATALOG = {feed["name"]: feed for feed in [
+    {"name": "sol", "url": URL, "interval": POLL_INTERVAL},
+    {"name": "sol-pump", "url": URL, "filter_clicks": ["Pump"]},
+    {"name": "sol-moonshot", "url": URL, "filter_clicks": ["Moonshot"]},
+    {"name": "bsc", "url": "https://gmgn.ai/new-pair?chain=bsc", "chain": "bsc"},
+]}
+
+# The feeds monitored concurrently, from discovery_feeds in the runtime config
+# (just "sol" by default). The first feed is the page Chrome opens at URL and
+# runs unthrottled; the others are throttled (CPU throttling, no images/fonts,
+# batched reports) unless they override it. A token is recorded once, by the
+# first feed that sees it, and tagged with that feed's name and chain on the
+# bus and in the token index. Only "sol" tokens are analyzed (see
+# ANALYZER_CHAINS in formating+data_ex.py). With several discovery instances,
+# instance n watches every discovery_instances-th feed starting at feed n (see
+# instance_feeds).
+unknown_feeds = [name for name in CONFIG.discovery_feeds if name not in FEED_CATALOG]
+if unknown_feeds:
+    raise ValueError(f"Unknown discovery feeds {', '.join(unknown_feeds)}; known: {', '.join(FEED_CATALOG)}")
+DISCOVERY_FEEDS = [FEED_CATALOG[name] for name in CONFIG.discovery_feeds]
+
+# New tokens are published on the local token bus (see token_bus.py), which the
+# analyzer and the API subscribe to.
+TOKEN_BUS = True
+
+# Tokens are also appended to this file as an audit log (None to disable).
+AUDIT_TOKEN_FILE = "./data/new_coins.txt"
+
+def instance_feeds():
+    """
+    The DISCOVERY_FEEDS this discovery instance watches.
+    """
+    return DISCOVERY_FEEDS[CONFIG.instance::CONFIG.discovery_instances]
 
 # =============================================================================
-# Part 1: Launch a separate Chrome instance and perform PyAutoGUI automation
+# Part 1: Launch a separate Chrome instance
 # =============================================================================
 
 # File names for the reference images (ensure these files exist at the given path)
 IMAGES = {
-    "close": "./images/close_button.png",
+    "close": IMAGE_CLOSE,
     "pump": "./images/pump.png",
     "moonshot": "./images/moonshot.png",
     "filter": "./images/filter_button.png",
@@ -36,65 +86,67 @@ IMAGES = {
     "apply": "./images/apply.png"
 }
 
-# Confidence level for image matching (requires OpenCV installed)
-CONFIDENCE = 0.8
+# Run Chrome without a window. The pop-up is dismissed through the DOM, so no
+# display is needed unless POPUP_IMAGE_FALLBACK is enabled. By default only on
+# Linux hosts without a display (see runtime_config.py).
+HEADLESS = resolve_headless(CONFIG)
+
+# Fall back to clicking the pop-up close button image on screen (PyAutoGUI +
+# OpenCV, needs a display and an idle mouse) if DOM dismissal fails.
+POPUP_IMAGE_FALLBACK = False
+
+# The Chrome process started by launch_separate_browser, if any.
+chrome_process = None
+
+def chrome_slot():
+    """
+    (remote debugging port, profile directory) of this discovery instance.
+    Resolved when discovery runs rather than at import, so importing this
+    script works in any process, whatever its instance number.
+    """
+    return browser_slot("discovery", CONFIG)
 
 def launch_separate_browser():
     """
     Launches an entirely separate Chrome instance using the specified
     executable, temporary user data directory, remote debugging port, and target URL.
+    A previously launched instance that is still running (but no longer
+    answering) is stopped first.
     """
+    global chrome_process
+    reap_process(chrome_process)
+    remote_debugging_port, temp_user_data_dir = chrome_slot()
+    os.makedirs(temp_user_data_dir, exist_ok=True)
     args = [
-        chrome_path,
+        chrome_path or resolve_chrome(CONFIG),
         f"--remote-debugging-port={remote_debugging_port}",
         f"--user-data-dir={temp_user_data_dir}",
-        URL  # Open the target URL immediately.
+        *CONFIG.chrome_args,
     ]
-    subprocess.Popen(args)
+    if HEADLESS:
+        args.append("--headless=new")
+    args.append(URL)  # Open the target URL immediately.
+    chrome_process = subprocess.Popen(args)
     print(f"Launched separate Chrome instance with remote debugging on port {remote_debugging_port}.")
 
-def wait_and_click(image_file, description, timeout=30):
-    """
-    Wait until an image appears on the screen, then click its center.
-    :param image_file: Filename of the image to locate.
-    :param description: Text description (for logging).
-    :param timeout: Maximum time (in seconds) to wait.
-    :return: True if clicked successfully, False if timed out.
-    """
-    print(f"Waiting for {description}...")
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        location = pyautogui.locateOnScreen(image_file, confidence=CONFIDENCE)
-        if location:
-            center = pyautogui.center(location)
-            pyautogui.moveTo(center.x, center.y, duration=0.25)
-            pyautogui.click()
-            print(f"Clicked on {description}.")
-            return True
-        time.sleep(1)
-    print(f"Timeout: Could not find {description}.")
-    return False
-
 def run_pyautogui_automation():
     """
     Perform a series of PyAutoGUI actions on the opened browser window.
-    The original commented-out steps are retained.
+    Only used as the fallback when the pop-up cannot be dismissed through the
+    DOM; the images are matched in grayscale within the centre of the screen.
     """
-    print("Opening the website. Please do not use the mouse during automation.")
-    time.sleep(5)  # Allow time for the browser and page to load.
+    print("Dismissing the pop-up on screen. Please do not use the mouse during automation.")
 
     # --- Step 1: Close the pop-up ---
     if not wait_and_click(IMAGES["close"], "pop-up close button"):
         print("Error: Unable to close the pop-up. Exiting automation.")
         return False
 
-    time.sleep(0.2)
     print("PyAutoGUI automation steps completed.")
-    time.sleep(1)  # Keep the browser open for observation (adjust if needed)
     return True
 
 # =============================================================================
-# Part 2: Asynchronous Web Crawler Using Playwright (After PyAutoGUI actions)
+# Part 2: Asynchronous Web Crawler Using Playwright
 # =============================================================================
 
 SCRAPE_URL = URL  # Use the same target URL.
@@ -102,15 +154,18 @@ SCRAPE_URL = URL  # Use the same target URL.
 async def fetch_scrape_data():
     """
     Connects to the separate Chrome instance (with remote debugging enabled),
-    monitors for new coin elements in the "New Pool" section,
-    extracts the token address from each coin's href attribute (removing the '/sol/token/' prefix),
-    and appends the token address to a file only when new coins are found.
+    and monitors each of its DISCOVERY_FEEDS new-pair views concurrently for new coin
+    elements in the "New Pool" section (pushed by a MutationObserver, or polled
+    when DISCOVERY_MODE is "poll"; in "network" mode taken from the new-pair
+    XHR/websocket payloads first), extracts the token address from each coin's
+    href attribute (removing the '/<chain>/token/' prefix), and appends the token address to a
+    file only when new coins are found.
     """
     from playwright.async_api import async_playwright
 
     p = await async_playwright().start()
     try:
-        browser = await p.chromium.connect_over_cdp(f"http://localhost:{remote_debugging_port}")
+        browser = await p.chromium.connect_over_cdp(f"http://localhost:{chrome_slot()[0]}")
     except Exception as e:
         print("Error connecting via CDP. Make sure Chrome is running with remote debugging enabled on the specified port.")
         await p.stop()
@@ -147,100 +202,88 @@ async def fetch_scrape_data():
         await p.stop()
         return
 
-    if SCRAPE_URL not in page.url:
-        print(f"Current page URL is '{page.url}'. Navigating to the target URL...")
+    # Coins seen by earlier runs are loaded from the shared token index, so a
+    # restart does not re-append every coin still visible in the table.
+    token_index = open_token_index()
+    processed_coins = token_index.seen_tokens()
+    print(f"Loaded {len(processed_coins)} previously seen coins from the token index.")
+    new_coins_file = AUDIT_TOKEN_FILE
+    checkpoint = Checkpoint(instance_name("discovery", CONFIG))
+    if checkpoint.state.get("last_seen_at"):
+        print(f"Resuming discovery; the last coin ({checkpoint.state['last_token']}, feed "
+              f"{checkpoint.state['last_feed']}) was found {time.time() - checkpoint.state['last_seen_at']:.0f}s ago.")
+
+    bus = TokenBus()
+    bus_server = None
+    if TOKEN_BUS:
         try:
-            await page.goto(SCRAPE_URL, wait_until="networkidle")
-        except Exception as nav_err:
-            print(f"Navigation error: {nav_err}")
-            try:
-                await page.reload(wait_until="networkidle")
-            except Exception as reload_err:
-                print(f"Reload error: {reload_err}")
-                await p.stop()
-                return
-        print("Navigation complete.")
+            bus_server = await serve_bus(bus, port=bus_port(CONFIG.instance))
+        except OSError as e:
+            print(f"Could not start the token bus ({e}); new tokens go to the audit file only.")
 
-    print("Starting to monitor new coins in the 'New Pool' section...")
-    processed_coins = set()
-    # Refined CSS selector based on your HTML structure.
-    coin_selector = "div.g-table-tbody-virtual-holder-inner a.css-5uoabp"
-    new_coins_file = "./data/new_coins.txt"
-    os.makedirs(os.path.dirname(new_coins_file), exist_ok=True)
-
-    while True:
-        coin_elements = await page.query_selector_all(coin_selector)
-        if coin_elements:
-            new_coin_addresses = []
-            for coin in coin_elements:
-                coin_href = await coin.get_attribute("href")
-                if coin_href:
-                    # Remove the "/sol/token/" prefix if present.
-                    prefix = "/sol/token/"
-                    if coin_href.startswith(prefix):
-                        token_address = coin_href[len(prefix):]
-                    else:
-                        token_address = coin_href
-                    if token_address not in processed_coins:
-                        new_coin_addresses.append(token_address)
-                        processed_coins.add(token_address)
-            if new_coin_addresses:
-                print(f"New coins found: {new_coin_addresses}")
-                try:
-                    with open(new_coins_file, "a", encoding="utf-8") as f:
-                        for address in new_coin_addresses:
-                            f.write(address + "\n")
-                except Exception as file_err:
-                    print(f"Error writing to file: {file_err}")
-            else:
-                print("No new coins found in this iteration.")
-        else:
-            print("No coin elements found in the 'New Pool' section.")
-        await asyncio.sleep(5)
-
-    await p.stop()
+    def on_new(addresses, feed):
+        # Index first so a subscriber that checks the index already sees the token.
+        # Only tokens new to the index are published and written to the audit
+        # file, so a token that another discovery instance found first is not
+        # announced twice.
+        addresses = token_index.mark_seen(addresses, chain=feed["chain"], source=feed["name"])
+        if addresses:
+            bus.publish_tokens(addresses, source=feed["name"], chain=feed["chain"])
+            checkpoint.update(last_token=addresses[-1], last_feed=feed["name"], last_seen_at=time.time())
+        return addresses
 
-# =============================================================================
-# Stdout Tee Setup: Redirect prints to both terminal and file
-# =============================================================================
+    supervisor = DiscoverySupervisor(
+        context, instance_feeds(), processed_coins, new_coins_file, on_new, mode=DISCOVERY_MODE, first_page=page,
+        popup_fallback=run_pyautogui_automation if POPUP_IMAGE_FALLBACK else None)
+
+    print("Starting to monitor new coins in the 'New Pool' section...")
+    # Discovery metrics are served by the API's /metrics (see pipeline_metrics.py).
+    exporter = asyncio.create_task(export_snapshots(instance_name("discovery", CONFIG)))
+    try:
+        # A Chrome that stops answering CDP commands ends the run, so the
+        # supervisor in main() reconnects (relaunching Chrome if needed).
+        cdp = await browser.new_browser_cdp_session()
+        await run_with_watchdog(supervisor.run(), "discovery browser", lambda: probe_browser(cdp))
+    finally:
+        exporter.cancel()
+        checkpoint.save()
+        token_index.close()
+        if bus_server:
+            bus_server.close()
+        await p.stop()
 
-class Tee:
+async def run_discovery():
     """
-    A simple class to redirect stdout to multiple file-like objects.
+    One supervised run of discovery: relaunch the separate Chrome if it no
+    longer answers on its debugging port, then monitor the feeds.
     """
-    def __init__(self, *files):
-        self.files = files
-
-    def write(self, obj):
-        for f in self.files:
-            f.write(obj)
-            f.flush()
-
-    def flush(self):
-        for f in self.files:
-            f.flush()
-
-def setup_stdout_tee(log_file_path):
-    log_dir = os.path.dirname(log_file_path)
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = open(log_file_path, "a", encoding="utf-8")
-    sys.stdout = Tee(sys.stdout, log_file)
+    remote_debugging_port = chrome_slot()[0]
+    if not await asyncio.to_thread(wait_for_cdp, remote_debugging_port, 1):
+        launch_separate_browser()
+        # Wait until Chrome accepts CDP connections instead of sleeping a fixed time.
+        if not await asyncio.to_thread(wait_for_cdp, remote_debugging_port):
+            raise RuntimeError("Chrome did not open its remote debugging port in time.")
+    await fetch_scrape_data()
 
 # =============================================================================
 # Main Integration
 # =============================================================================
 
 def main():
-    setup_stdout_tee("./data/data.txt")
-    launch_separate_browser()
-    if not run_pyautogui_automation():
-        print("Automation did not complete successfully. Exiting.")
+    setup_logging(instance_file("./data/data.txt", CONFIG))
+    if not instance_feeds():
+        print(f"Discovery instance {CONFIG.instance} has no feeds: there are {len(DISCOVERY_FEEDS)} feeds "
+              f"for {CONFIG.discovery_instances} instances.")
         return
     print("Starting asynchronous coin monitoring...")
+    # Discovery is restarted with backoff whenever it fails or stops (a page
+    # crash, a lost CDP connection, a hung browser).
     try:
-        asyncio.run(fetch_scrape_data())
-    except Exception as e:
-        print(f"An error occurred during asynchronous processing: {e}")
+        asyncio.run(supervise("discovery", run_discovery))
+    except KeyboardInterrupt:
+        print("Coin monitoring stopped.")
+    finally:
+        reap_process(chrome_process)
 
 if __name__ == "__main__":
     main()
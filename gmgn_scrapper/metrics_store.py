@@ -0,0 +1,270 @@
+import atexit
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Directory holding the Parquet segments of the token metrics store.
+METRICS_DIR = "./data/metrics"
+
+# Buffered rows are written as a new segment once there are this many of them,
+# or once the oldest buffered row is FLUSH_INTERVAL seconds old.
+BATCH_SIZE = 20
+FLUSH_INTERVAL = 10
+
+# Segments are merged into a single file once there are more than this many.
+COMPACT_THRESHOLD = 16
+
+# Parquet footer key of a compacted file listing the files it merged (JSON list
+# of file names). Until they are removed, readers skip the listed files, so a
+# read during (or a crash after) a compaction never sees a row twice.
+MERGED_KEY = b"gmgn.merged"
+
+# The fields are stored as extracted (raw strings), so nothing is lost if the
+# parsing changes; load_metrics returns them as the typed columns below (see
+# extractor.to_typed), or raw with raw=True.
+METRIC_FIELDS = ["snipers", "bluechip", "top10", "audit", "rug_prob"]
+TYPED_COLUMNS = {
+    "snipers": "Int64", "snipers_total": "Int64", "bluechip": "Float64", "top10": "Float64",
+    "audit": "string", "audit_passed": "Int64", "audit_total": "Int64", "rug_prob": "Float64",
+}
+
+@lru_cache(maxsize=None)
+def arrow_schema():
+    """
+    Parquet schema of the store. pyarrow is imported here, on first use, so
+    importing this module (and starting the analyzer) does not load it.
+    """
+    import pyarrow as pa
+
+    return pa.schema(
+        [("token", pa.string()), ("timestamp", pa.timestamp("ms", tz="UTC"))]
+        + [(field, pa.string()) for field in METRIC_FIELDS]
+    )
+
+# =============================================================================
+# Metrics Store
+# =============================================================================
+
+class MetricsStore:
+    """
+    Append-only store for the metrics extracted per token. Rows are buffered in
+    memory and written in batches as Parquet segments; small segments are
+    periodically compacted into one file. Replaces one CSV file per token.
+
+    Several analyzer instances can share the directory: each writes and
+    compacts only its own files (named with "-<instance>" for instance > 0),
+    and load_metrics reads them all.
+    """
+
+    def __init__(self, directory=METRICS_DIR, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 compact_threshold=COMPACT_THRESHOLD, instance=0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.suffix = f"-{instance}" if instance else ""
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_threshold = compact_threshold
+        self._buffer = []
+        self._oldest = None
+        # Buffered rows are written at exit unless close() was called first.
+        atexit.register(self.flush)
+
+    def close(self):
+        """
+        Write the buffered rows and drop the exit handler, so a store that is
+        re-opened on every restart does not pile up handlers.
+        """
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def append(self, token, data, timestamp=None):
+        """
+        Buffer one row of extracted data for `token`. Missing values ('' or None)
+        are stored as nulls.
+        """
+        row = {"token": token, "timestamp": int((timestamp or time.time()) * 1000)}
+        for field in METRIC_FIELDS:
+            row[field] = data.get(field) or None
+        self._buffer.append(row)
+        if self._oldest is None:
+            self._oldest = time.time()
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        """
+        Flush when the batch is full or the oldest buffered row is too old.
+        Call it from idle loops so a partial batch is not held indefinitely.
+        """
+        if not self._buffer:
+            return
+        if len(self._buffer) >= self.batch_size or time.time() - self._oldest >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows as a new segment (and compact if needed).
+        """
+        if not self._buffer:
+            return
+        import pyarrow as pa
+
+        table = pa.Table.from_pylist(self._buffer, schema=arrow_schema())
+        path = _write_segment(self.directory, "segment" + self.suffix, table)
+        print(f"Wrote {len(self._buffer)} metric rows to {path}")
+        self._buffer = []
+        self._oldest = None
+        if len(_segment_files(self.directory, self.suffix)) > self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """
+        Merge all segments into one file that lists them (MERGED_KEY), then
+        remove the merged segments. Segments left behind by an interrupted
+        compaction are removed without being merged again.
+        """
+        files, merged = _live_files(_segment_files(self.directory, self.suffix))
+        for f in merged:
+            os.remove(f)
+        if len(files) < 2:
+            return
+        table = _read_tables(files)
+        names = [os.path.basename(f) for f in files]
+        table = table.replace_schema_metadata({MERGED_KEY: json.dumps(names).encode()})
+        path = _write_segment(self.directory, "compacted" + self.suffix, table)
+        for f in files:
+            os.remove(f)
+        print(f"Compacted {len(files)} segments ({table.num_rows} rows) into {path}")
+
+def _segment_files(directory, suffix=None):
+    # Every file, or only those of the instance with this file name suffix.
+    if suffix is None:
+        return sorted(glob.glob(os.path.join(directory, "*.parquet")))
+    return sorted(glob.glob(os.path.join(directory, f"*-segment{suffix}.parquet"))
+                  + glob.glob(os.path.join(directory, f"*-compacted{suffix}.parquet")))
+
+def _live_files(files):
+    """
+    Split `files` into (files to read, files already merged into a compacted
+    file among them that still exist).
+    """
+    import pyarrow.parquet as pq
+
+    merged = set()
+    for f in files:
+        if "-compacted" in os.path.basename(f):
+            metadata = pq.read_metadata(f).metadata or {}
+            merged.update(json.loads(metadata.get(MERGED_KEY, b"[]")))
+    live = [f for f in files if os.path.basename(f) not in merged]
+    return live, [f for f in files if os.path.basename(f) in merged]
+
+def _read_tables(files):
+    # One table in the store's schema; the merge lists are dropped.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    return pa.concat_tables([pq.read_table(f, schema=arrow_schema()).replace_schema_metadata(None)
+                             for f in files])
+
+def _write_segment(directory, kind, table):
+    # Name by creation time so segments sort chronologically; write to a temp
+    # name first so readers never see a partial file.
+    import pyarrow.parquet as pq
+
+    path = os.path.join(directory, f"{time.time_ns():020d}-{kind}.parquet")
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return path
+
+# =============================================================================
+# Loading and Legacy Import
+# =============================================================================
+
+def load_metrics(directory=METRICS_DIR, raw=False):
+    """
+    Load every stored metrics row as one pandas DataFrame with a UTC datetime
+    timestamp, ordered by timestamp. The metrics are the typed TYPED_COLUMNS
+    (nullable ints and floats, the audit verdict as a string; missing or
+    unparsable values are <NA>), or with raw=True the stored strings of
+    METRIC_FIELDS.
+    """
+    for attempt in range(3):
+        try:
+            files, _ = _live_files(_segment_files(directory))
+            table = _read_tables(files) if files else arrow_schema().empty_table()
+            break
+        except FileNotFoundError:
+            # A compaction removed a segment between listing and reading it.
+            if attempt == 2:
+                raise
+    df = table.to_pandas()
+    for column in ["token"] + METRIC_FIELDS:
+        df[column] = df[column].astype("string")
+    if not raw:
+        df = _typed(df)
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+def _typed(df):
+    # Parsed once per distinct value; a column repeats few distinct strings.
+    import pandas as pd
+    from extractor import parse_audit, parse_percent, parse_ratio
+
+    def parsed(column, parse):
+        values = df[column].astype(object).where(df[column].notna(), None)
+        return values.map({value: parse(value) for value in values.unique()})
+
+    def part(values, i):
+        return values.map(lambda value: None if value is None else value[i])
+
+    snipers = parsed("snipers", parse_ratio)
+    audit = parsed("audit", parse_audit)
+    columns = {
+        "snipers": part(snipers, 0), "snipers_total": part(snipers, 1),
+        "bluechip": parsed("bluechip", parse_percent), "top10": parsed("top10", parse_percent),
+        "audit": part(audit, 0), "audit_passed": part(audit, 1), "audit_total": part(audit, 2),
+        "rug_prob": parsed("rug_prob", parse_percent),
+    }
+    typed = pd.DataFrame({name: pd.array(columns[name].tolist(), dtype=dtype)
+                          for name, dtype in TYPED_COLUMNS.items()}, index=df.index)
+    return pd.concat([df[["token", "timestamp"]], typed], axis=1)
+
+def import_legacy_csvs(data_dir="./data", directory=METRICS_DIR):
+    """
+    Import the per-token data/<token>.csv files into the store, timestamped
+    with each file's mtime. Returns the number of rows imported.
+    """
+    store = MetricsStore(directory, batch_size=sys.maxsize, flush_interval=sys.maxsize)
+    rows = 0
+    try:
+        for csv_path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+            token = os.path.splitext(os.path.basename(csv_path))[0]
+            if token.startswith("output_"):
+                continue
+            mtime = os.path.getmtime(csv_path)
+            with open(csv_path, "r", newline="", encoding="utf-8") as f:
+                for data in csv.DictReader(f):
+                    store.append(token, data, timestamp=mtime)
+                    rows += 1
+    finally:
+        store.close()
+    return rows
+
+if __name__ == "__main__":
+    # python metrics_store.py import [data_dir]  -- import the per-token CSVs
+    # python metrics_store.py compact            -- merge all segments now
+    command = sys.argv[1] if len(sys.argv) > 1 else "import"
+    if command == "import":
+        count = import_legacy_csvs(sys.argv[2] if len(sys.argv) > 2 else "./data")
+        print(f"Imported {count} rows into {METRICS_DIR}.")
+    elif command == "compact":
+        MetricsStore().compact()
+    else:
+        print(f"Unknown command: {command}")
@@ -0,0 +1,199 @@
+import json
+import re
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# XHR endpoints the gmgn pages load their data from.
+#
+# The payload shapes below and in bench/fixtures/payloads/ are SYNTHETIC: they
+# were written by hand from the fields the panel shows, not captured from
+# gmgn. The endpoint paths, the websocket channel names and pool keys (a / ba /
+# qa), sniper_holding_count, burn_status and the four-check audit derivation
+# are unverified guesses, which is why "network" extraction and discovery are
+# opt-in and never the default. Replace the fixtures with real captures (and
+# fix the decoders against them) before relying on either.
+NEW_PAIRS_URL = re.compile(r"/new_pairs\b")
+TOKEN_SECURITY_URL = re.compile(r"/token_security[^/]*/sol/(?P<token>\w+)")
+
+# Websocket channels that push newly created pools.
+NEW_POOL_CHANNELS = {"new_pool_info", "new_pair_update"}
+
+# How long the analyzer waits for the token security response before falling
+# back to reading the rendered panel (milliseconds).
+RESPONSE_TIMEOUT_MS = 10000
+
+# The "Top 10" audit check passes when the ten largest holders own at most this
+# share (a guess at the panel's rule, see above).
+AUDIT_TOP10_MAX_RATE = 0.3
+
+# =============================================================================
+# Payload Decoders
+# =============================================================================
+
+def _pair_address(item):
+    # new_pairs XHR: the base token, else the pair's own address.
+    return item.get("base_address") or item.get("address")
+
+def _pool_address(pool):
+    # Websocket pools: "ba" is the base token, "a" the pool itself.
+    return pool.get("ba") or pool.get("a")
+
+def decode_new_pairs(payload):
+    """
+    Token addresses from a new_pairs XHR payload: {"data": {"pairs": [...]}}.
+    """
+    data = payload.get("data") or {}
+    pairs = data.get("pairs", []) if isinstance(data, dict) else data
+    return [address for address in map(_pair_address, pairs) if address]
+
+def decode_ws_frame(frame):
+    """
+    Token addresses from a websocket frame on one of NEW_POOL_CHANNELS; an
+    empty list for any other frame.
+    """
+    if isinstance(frame, bytes):
+        frame = frame.decode("utf-8", errors="replace")
+    if not frame or frame[0] not in "{[":
+        return []
+    try:
+        message = json.loads(frame)
+    except ValueError:
+        return []
+    if not isinstance(message, dict) or message.get("channel") not in NEW_POOL_CHANNELS:
+        return []
+    items = message.get("data") or []
+    if isinstance(items, dict):
+        items = [items]
+    addresses = []
+    for item in items:
+        pools = item.get("pools") if isinstance(item, dict) and "pools" in item else [item]
+        addresses.extend(address for address in map(_pool_address, pools) if address)
+    return addresses
+
+def _percent(rate):
+    # Same rendering as the panel: one decimal, trailing ".0" dropped.
+    text = f"{rate * 100:.1f}"
+    return (text[:-2] if text.endswith(".0") else text) + "%"
+
+def decode_token_security(payload):
+    """
+    Turn a token security payload into the same dict extract_data returns
+    (snipers, bluechip, top10, audit, rug_prob as display strings), so it can
+    go straight into the rest of the pipeline. Returns None if the payload
+    does not look like a token security response.
+    """
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if not isinstance(data, dict) or "top_10_holder_rate" not in data:
+        return None
+    top10_rate = data.get("top_10_holder_rate")
+    checks = [
+        bool(data.get("renounced_mint")),
+        bool(data.get("renounced_freeze_account")),
+        data.get("burn_status") == "burn",
+        top10_rate is not None and top10_rate <= AUDIT_TOP10_MAX_RATE,
+    ]
+    passed = sum(checks)
+    snipers = ""
+    if data.get("sniper_count") is not None:
+        snipers = f"{data.get('sniper_holding_count', 0)}/{data['sniper_count']}"
+    bluechip = data.get("bluechip_owner_percentage")
+    rug_ratio = data.get("rug_ratio")
+    return {
+        "snipers": snipers,
+        "bluechip": _percent(bluechip) if bluechip is not None else "",
+        "top10": _percent(top10_rate) if top10_rate is not None else "",
+        "audit": f"{'Safe' if passed == len(checks) else 'Risk'} {passed}/{len(checks)}",
+        "rug_prob": _percent(rug_ratio) if rug_ratio is not None else None,
+    }
+
+def is_security_response_for(token):
+    """
+    Predicate for page.expect_response matching the security XHR of `token`.
+    """
+    def predicate(response):
+        match = TOKEN_SECURITY_URL.search(response.url)
+        return bool(match) and match.group("token") == token
+    return predicate
+
+# =============================================================================
+# Network Capture
+# =============================================================================
+
+class NetworkCapture:
+    """
+    Subscribes to a page's XHR responses and websocket frames on the existing
+    CDP connection and hands decoded payloads to the pipeline as they arrive,
+    before the page renders them:
+
+        on_new_tokens(addresses)        for new-pair payloads / frames
+        on_security(token, extracted)   for token security payloads
+    """
+
+    def __init__(self, on_new_tokens=None, on_security=None):
+        self.on_new_tokens = on_new_tokens
+        self.on_security = on_security
+        self.decoded = 0
+        self.errors = 0
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+        page.on("websocket", self._on_websocket)
+
+    def detach(self, page):
+        page.remove_listener("response", self._on_response)
+        page.remove_listener("websocket", self._on_websocket)
+
+    async def _on_response(self, response):
+        url = response.url
+        is_new_pairs = self.on_new_tokens is not None and NEW_PAIRS_URL.search(url)
+        security = TOKEN_SECURITY_URL.search(url) if self.on_security is not None else None
+        if not is_new_pairs and not security:
+            return
+        try:
+            payload = await response.json()
+            if is_new_pairs:
+                addresses = decode_new_pairs(payload)
+                if addresses:
+                    self.decoded += 1
+                    self.on_new_tokens(addresses)
+            else:
+                extracted = decode_token_security(payload)
+                if extracted is not None:
+                    self.decoded += 1
+                    self.on_security(security.group("token"), extracted)
+        except Exception as e:
+            self.errors += 1
+            print(f"Could not decode response from {url}: {e}")
+
+    def _on_websocket(self, websocket):
+        if self.on_new_tokens is not None:
+            websocket.on("framereceived", self._on_frame)
+
+    def _on_frame(self, frame):
+        addresses = decode_ws_frame(frame)
+        if addresses:
+            self.decoded += 1
+            self.on_new_tokens(addresses)
+
+async def capture_token_security(page, url, token, timeout_ms=RESPONSE_TIMEOUT_MS):
+    """
+    Navigate to `url` and wait for the security payload of `token`. Returns
+    (navigated, extracted): navigated is True once the navigation committed,
+    extracted the decoded payload, or None if it did not arrive in time or was
+    not decodable. Raises if the navigation itself failed, in which case the
+    page may still show the previous token.
+    """
+    navigated = False
+    try:
+        async with page.expect_response(is_security_response_for(token), timeout=timeout_ms) as response_info:
+            await page.goto(url, wait_until="commit", timeout=timeout_ms)
+            navigated = True
+        response = await response_info.value
+        return navigated, decode_token_security(await response.json())
+    except Exception as e:
+        if not navigated:
+            raise
+        print(f"No security payload for {token}: {e}")
+        return navigated, None
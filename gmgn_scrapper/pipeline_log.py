@@ -0,0 +1,137 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# The log file is rotated when it reaches LOG_MAX_BYTES; LOG_BACKUPS old files
+# (<log>.1 ... <log>.N) are kept.
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+# Messages printed on every idle iteration. The first one is logged as usual;
+# repeats are counted and logged once per IDLE_SUMMARY_INTERVAL seconds with
+# the number of occurrences, instead of once per iteration.
+IDLE_MESSAGES = {
+    "No new coins found in this iteration.",
+    "No coin elements found in the 'New Pool' section.",
+    "No new token found. Waiting for 5 seconds before retrying...",
+}
+IDLE_SUMMARY_INTERVAL = 60
+
+LOGGER_NAME = "gmgn"
+
+# =============================================================================
+# Idle Message Collapsing
+# =============================================================================
+
+class IdleCollapseFilter(logging.Filter):
+    """
+    Lets the first occurrence of an idle message through, then drops repeats
+    and lets one through at most every `interval` seconds, suffixed with how
+    many times it occurred since the last one that was logged.
+    """
+
+    def __init__(self, messages=IDLE_MESSAGES, interval=IDLE_SUMMARY_INTERVAL):
+        super().__init__()
+        self.messages = set(messages)
+        self.interval = interval
+        self._state = {}
+
+    def filter(self, record):
+        message = record.getMessage()
+        if message not in self.messages:
+            return True
+        now = time.monotonic()
+        last_logged, count = self._state.get(message, (None, 0))
+        if last_logged is None:
+            self._state[message] = (now, 0)
+            return True
+        count += 1
+        if now - last_logged < self.interval:
+            self._state[message] = (last_logged, count)
+            return False
+        record.msg = f"{message} (x{count} in the last {now - last_logged:.0f}s)"
+        record.args = None
+        self._state[message] = (now, 0)
+        return True
+
+# =============================================================================
+# Stdout Redirection
+# =============================================================================
+
+class LogWriter:
+    """
+    File-like replacement for sys.stdout that turns every printed line into a
+    log record. Records only go onto an in-memory queue, so a print never
+    waits for the console or the disk.
+    """
+
+    def __init__(self, logger, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+        for line in lines:
+            if line.strip():
+                self.logger.log(self.level, line.rstrip())
+        return len(text)
+
+    def flush(self):
+        # Writing happens on the listener thread; nothing to flush here.
+        pass
+
+    def isatty(self):
+        return False
+
+def setup_logging(log_file_path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    """
+    Send everything printed to stdout to the console and to a size-rotated log
+    file through a background writer thread. Replaces the old stdout Tee, which
+    flushed every file on every write. Returns the QueueListener that writes
+    the records.
+    """
+    log_dir = os.path.dirname(log_file_path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    console = logging.StreamHandler(sys.__stdout__)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    log_file = logging.handlers.RotatingFileHandler(log_file_path, maxBytes=max_bytes, backupCount=backups,
+                                                    encoding="utf-8")
+    log_file.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, console, log_file)
+    listener.start()
+
+    def stop():
+        # Later prints go straight to the console; queued records are written out.
+        sys.stdout = sys.__stdout__
+        listener.stop()
+
+    atexit.register(stop)
+
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(IdleCollapseFilter())
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(handler)
+
+    sys.stdout = LogWriter(logger)
+    return listener
@@ -0,0 +1,346 @@
+import asyncio
+import bisect
+import json
+import math
+import os
+import time
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Set to False to turn every metric update into an immediate return (no
+# labels resolved, nothing recorded, no snapshots written).
+METRICS_ENABLED = True
+
+# The discovery and analyzer scripts write a snapshot of their metrics here
+# every SNAPSHOT_INTERVAL seconds; the API serves them all at /metrics.
+SNAPSHOT_DIR = "./data/pipeline_metrics"
+SNAPSHOT_INTERVAL = 5
+
+# Histogram buckets (seconds) for stage durations and latencies.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+# =============================================================================
+# Metric Types
+# =============================================================================
+
+# Every metric created in this process, in creation order.
+REGISTRY = []
+
+def set_enabled(enabled):
+    """
+    Turn metric recording on or off for this process.
+    """
+    global METRICS_ENABLED
+    METRICS_ENABLED = enabled
+
+class _NoopChild:
+    """
+    Returned by labels() while metrics are disabled.
+    """
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+_NOOP = _NoopChild()
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        REGISTRY.append(self)
+
+    def labels(self, **labels):
+        """
+        The child holding the value for one combination of label values, e.g.
+        STAGE_SECONDS.labels(stage="ready").observe(0.8).
+        """
+        if not METRICS_ENABLED:
+            return _NOOP
+        key = tuple(map(labels.__getitem__, self.labelnames))
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def samples(self):
+        """
+        [(labels dict, value), ...] for the snapshot and the exposition.
+        """
+        return [(dict(zip(self.labelnames, map(str, key))), child.value()) for key, child in self._children.items()]
+
+class _Value:
+    def __init__(self):
+        self._value = 0.0
+
+    def inc(self, amount=1):
+        self._value += amount
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+class Counter(_Metric):
+    """
+    A count that only goes up (tokens discovered, fields that failed to parse).
+    """
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down (backlog size).
+    """
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self.labels().set(value)
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # counts[i] is the number of values in (buckets[i-1], buckets[i]]; the
+        # last slot holds the values above the largest bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+
+    def value(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values (seconds) over fixed buckets.
+    """
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+# =============================================================================
+# Pipeline Metrics
+# =============================================================================
+
+DISCOVERY_TICKS = Counter(
+    "gmgn_discovery_ticks_total",
+    "Discovery iterations by source (poll, push, fallback poll, network payload).",
+    ["source"])
+DISCOVERY_TICK_SECONDS = Histogram(
+    "gmgn_discovery_tick_seconds",
+    "Time to read the New Pool table (or decode a payload) and record new coins in one iteration.",
+    ["source"])
+TOKENS_DISCOVERED = Counter(
+    "gmgn_tokens_discovered_total",
+    "New tokens recorded by discovery, by source.",
+    ["source"])
+FEED_TOKENS = Counter(
+    "gmgn_feed_tokens_total",
+    "New tokens by discovery feed (the first feed to see a token gets it).",
+    ["feed"])
+FEED_RESTARTS = Counter(
+    "gmgn_feed_restarts_total",
+    "Discovery feeds re-opened after their page failed or went away.",
+    ["feed"])
+DISCOVERY_TO_ANALYSIS_SECONDS = Histogram(
+    "gmgn_discovery_to_analysis_seconds",
+    "Time from a token's discovery to its analyzed metrics being stored.")
+SCRAPE_SECONDS = Histogram(
+    "gmgn_scrape_seconds",
+    "Time to load a token page and scrape its fields, by extraction mode.",
+    ["mode"])
+STAGE_SECONDS = Histogram(
+    "gmgn_stage_seconds",
+    "Per-token stage durations (launch, popup, ready, extract, persist).",
+    ["stage"])
+TOKENS_ANALYZED = Counter(
+    "gmgn_tokens_analyzed_total",
+    "Tokens processed by the analyzer, by result (stored, empty).",
+    ["result"])
+EXTRACTION_FAILURES = Counter(
+    "gmgn_extraction_failures_total",
+    "Fields missing or unparsable in a scraped token, by field.",
+    ["field"])
+RESCORES = Counter(
+    "gmgn_rescores_total",
+    "Re-samples of analyzed tokens, by result (stored, stable, empty).",
+    ["result"])
+RESCORE_PENDING = Gauge(
+    "gmgn_rescore_pending",
+    "Analyzed tokens with a re-sample scheduled.")
+TOKEN_BACKLOG = Gauge(
+    "gmgn_token_backlog",
+    "Tokens waiting to be analyzed.")
+CHROME_RESTARTS = Counter(
+    "gmgn_chrome_restarts_total",
+    "Browser sessions restarted after Chrome crashed or the CDP connection was lost.")
+TASK_RESTARTS = Counter(
+    "gmgn_task_restarts_total",
+    "Supervised tasks (discovery, analyzer) restarted after they failed or stopped.",
+    ["task"])
+HEALTH_CHECK_FAILURES = Counter(
+    "gmgn_health_check_failures_total",
+    "Health checks of a page or browser that failed or timed out, by check.",
+    ["check"])
+
+# =============================================================================
+# Cross-Process Snapshots
+# =============================================================================
+
+def snapshot():
+    """
+    The current value of every metric in this process that has been set.
+    """
+    return [
+        {"name": metric.name, "type": metric.type, "help": metric.help, "samples": metric.samples()}
+        for metric in REGISTRY if metric._children
+    ]
+
+def write_snapshot(process, directory=SNAPSHOT_DIR, metrics=None):
+    """
+    Atomically replace <directory>/<process>.json with this process's metrics
+    (or with `metrics`, a snapshot() taken earlier).
+    """
+    if not METRICS_ENABLED:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{process}.json")
+    data = {"process": process, "pid": os.getpid(), "written_at": time.time(),
+            "metrics": snapshot() if metrics is None else metrics}
+    try:
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Error writing metrics snapshot {path}: {e}")
+
+async def export_snapshots(process, interval=SNAPSHOT_INTERVAL, directory=SNAPSHOT_DIR):
+    """
+    Write this process's snapshot every `interval` seconds until cancelled.
+    The metrics are read on the event loop, where they are updated, and the
+    file is written from a worker thread.
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            if METRICS_ENABLED:
+                await asyncio.to_thread(write_snapshot, process, directory, snapshot())
+    finally:
+        write_snapshot(process, directory)
+
+def read_snapshots(directory=SNAPSHOT_DIR):
+    """
+    Every process snapshot in `directory`, skipping unreadable files.
+    """
+    snapshots = []
+    if not os.path.isdir(directory):
+        return snapshots
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+# =============================================================================
+# Prometheus Text Exposition
+# =============================================================================
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+               for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+def _sample_lines(metric_type, name, labels, value):
+    if metric_type != "histogram":
+        return [f"{name}{_format_labels(labels)} {_format_value(value)}"]
+    lines = []
+    cumulative = 0
+    for bound, count in zip(value["buckets"] + [math.inf], value["counts"]):
+        cumulative += count
+        bucket_labels = {**labels, "le": _format_value(bound)}
+        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return lines
+
+def render(process, directory=SNAPSHOT_DIR):
+    """
+    Prometheus text format (version 0.0.4) of this process's metrics and of
+    every snapshot in `directory`. Each sample gets a `process` label; the age
+    of every snapshot is exported as gmgn_metrics_snapshot_age_seconds.
+    """
+    if not METRICS_ENABLED:
+        return ""
+    now = time.time()
+    sources = [(process, snapshot())]
+    ages = {}
+    for data in read_snapshots(directory):
+        if data.get("process") == process:
+            continue
+        sources.append((data["process"], data["metrics"]))
+        ages[data["process"]] = now - data["written_at"]
+
+    families = {}
+    for source, metrics in sources:
+        for metric in metrics:
+            family = families.setdefault(metric["name"], {"type": metric["type"], "help": metric["help"], "samples": []})
+            for labels, value in metric["samples"]:
+                family["samples"].append(({"process": source, **labels}, value))
+
+    lines = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in family["samples"]:
+            lines.extend(_sample_lines(family["type"], name, labels, value))
+    if ages:
+        lines.append("# HELP gmgn_metrics_snapshot_age_seconds Seconds since a process last wrote its metrics snapshot.")
+        lines.append("# TYPE gmgn_metrics_snapshot_age_seconds gauge")
+        for source, age in ages.items():
+            lines.append(f"gmgn_metrics_snapshot_age_seconds{_format_labels({'process': source})} {age:.1f}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import subprocess
+import time
+
+from pipeline_metrics import HEALTH_CHECK_FAILURES, TASK_RESTARTS
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Delay before restarting a task that failed, doubled on each consecutive
+# failure up to MAX_RESTART_BACKOFF (seconds). A run that lasted HEALTHY_AFTER
+# seconds resets the delay.
+RESTART_BACKOFF = 1
+MAX_RESTART_BACKOFF = 60
+HEALTHY_AFTER = 60
+
+# Every HEALTH_INTERVAL seconds each health check must answer within
+# HEALTH_TIMEOUT seconds; a failed check is retried at once, and
+# HEALTH_FAILURES consecutive failures count as a hang. A hung page or browser
+# is thus detected within HEALTH_INTERVAL + HEALTH_FAILURES * HEALTH_TIMEOUT
+# seconds.
+HEALTH_INTERVAL = 2
+HEALTH_TIMEOUT = 2
+HEALTH_FAILURES = 2
+
+# Task checkpoints (small JSON files, replaced atomically), written at most
+# every CHECKPOINT_INTERVAL seconds while the task runs and when it stops.
+CHECKPOINT_DIR = "./data/checkpoints"
+CHECKPOINT_INTERVAL = 2
+
+# =============================================================================
+# Checkpoints
+# =============================================================================
+
+class Checkpoint:
+    """
+    Restart state of one task, e.g. the tokens a worker had taken but not
+    finished, in <directory>/<name>.json:
+
+        checkpoint = Checkpoint("analyzer")
+        in_flight = checkpoint.state.get("in_flight", [])
+        checkpoint.update(in_flight=sorted(tokens))   # saved when due
+        checkpoint.save()                             # on shutdown
+    """
+
+    def __init__(self, name, directory=CHECKPOINT_DIR, interval=CHECKPOINT_INTERVAL):
+        self.path = os.path.join(directory, f"{name}.json")
+        self.interval = interval
+        self.state = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except Exception as e:
+            print(f"Could not read checkpoint {self.path} ({e}); starting without it.")
+            self.state = {}
+
+    def update(self, **values):
+        """
+        Change some values and save them if the last save is old enough.
+        """
+        self.state.update(values)
+        self._dirty = True
+        self.save_if_due()
+
+    def save_if_due(self):
+        if self._dirty and time.monotonic() - self._saved_at >= self.interval:
+            self.save()
+
+    def save(self):
+        """
+        Write the state now if anything changed since the last save.
+        """
+        if not self._dirty:
+            return
+        self.state["saved_at"] = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.state, f)
+            os.replace(self.path + ".tmp", self.path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        except OSError as e:
+            print(f"Error writing checkpoint {self.path}: {e}")
+
+# =============================================================================
+# Health Checks
+# =============================================================================
+
+class HealthCheckFailed(RuntimeError):
+    """
+    Raised when a health check did not answer HEALTH_FAILURES times in a row.
+    """
+
+async def probe_page(page, timeout=HEALTH_TIMEOUT):
+    """
+    Raise asyncio.TimeoutError if the page's renderer does not run a trivial
+    script within `timeout` seconds. Other errors (e.g. the page navigating
+    while it is probed) are not a hang and are ignored.
+    """
+    try:
+        await asyncio.wait_for(page.evaluate("1"), timeout)
+    except asyncio.TimeoutError:
+        raise
+    except Exception:
+        if page.is_closed():
+            raise
+
+async def probe_browser(cdp_session, timeout=HEALTH_TIMEOUT):
+    """
+    Raise if the browser does not answer a CDP command over `cdp_session` (a
+    browser.new_browser_cdp_session()) within `timeout` seconds.
+    """
+    await asyncio.wait_for(cdp_session.send("Browser.getVersion"), timeout)
+
+async def watchdog(name, check, interval=HEALTH_INTERVAL, failures=HEALTH_FAILURES):
+    """
+    Await `check()` every `interval` seconds; raise HealthCheckFailed once it
+    has raised (or timed out) `failures` times in a row.
+    """
+    failed = 0
+    while True:
+        if not failed:
+            await asyncio.sleep(interval)
+        try:
+            await check()
+            failed = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            failed += 1
+            HEALTH_CHECK_FAILURES.labels(check=name).inc()
+            if failed >= failures:
+                raise HealthCheckFailed(f"{name} did not answer {failed} health checks in a row "
+                                        f"({type(e).__name__}: {e})") from e
+
+async def run_with_watchdog(coro, name, check, interval=HEALTH_INTERVAL, failures=HEALTH_FAILURES):
+    """
+    Await `coro` while `check` is probed by a watchdog. If the watchdog gives
+    up first, `coro` is cancelled and HealthCheckFailed raised. Returns what
+    `coro` returns.
+    """
+    task = asyncio.ensure_future(coro)
+    guard = asyncio.create_task(watchdog(name, check, interval, failures))
+    try:
+        await asyncio.wait({task, guard}, return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            return task.result()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        guard.result()
+    finally:
+        for pending in (task, guard):
+            if not pending.done():
+                pending.cancel()
+        await asyncio.gather(task, guard, return_exceptions=True)
+
+# =============================================================================
+# Task Supervision
+# =============================================================================
+
+class Backoff:
+    """
+    Restart delay of a supervised task: doubled after each failure, reset
+    after a run that lasted HEALTHY_AFTER seconds.
+    """
+
+    def __init__(self, initial=RESTART_BACKOFF, maximum=MAX_RESTART_BACKOFF, healthy_after=HEALTHY_AFTER):
+        self.initial = initial
+        self.maximum = maximum
+        self.healthy_after = healthy_after
+        self.delay = initial
+
+    def next_delay(self, ran_for):
+        if ran_for >= self.healthy_after:
+            self.delay = self.initial
+        delay = self.delay
+        self.delay = min(self.delay * 2, self.maximum)
+        return delay
+
+def _report_stop(name, error, delay):
+    TASK_RESTARTS.labels(task=name).inc()
+    if error is None:
+        print(f"[supervisor] {name} stopped; restarting in {delay}s.")
+    else:
+        print(f"[supervisor] {name} failed ({type(error).__name__}: {error}); restarting in {delay}s.")
+
+async def supervise(name, run, backoff=None):
+    """
+    Run the coroutine function `run` until cancelled, restarting it with
+    backoff whenever it raises or returns.
+    """
+    backoff = backoff or Backoff()
+    while True:
+        started = time.monotonic()
+        error = None
+        try:
+            await run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        delay = backoff.next_delay(time.monotonic() - started)
+        _report_stop(name, error, delay)
+        await asyncio.sleep(delay)
+
+def supervise_sync(name, run, backoff=None):
+    """
+    Blocking version of supervise() for loops that are not coroutines (the
+    serial analyzer). Stops on KeyboardInterrupt.
+    """
+    backoff = backoff or Backoff()
+    while True:
+        started = time.monotonic()
+        error = None
+        try:
+            run()
+        except Exception as e:
+            error = e
+        delay = backoff.next_delay(time.monotonic() - started)
+        _report_stop(name, error, delay)
+        time.sleep(delay)
+
+def reap_process(process, timeout=5):
+    """
+    Terminate a child process (kill it if it does not exit within `timeout`
+    seconds) and wait for it, so no orphaned Chrome is left behind.
+    """
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+from functools import lru_cache
+
+from readiness import STAGE_TIMEOUTS
+from runtime_config import CONFIG
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Close buttons of the gmgn welcome / announcement modal (Chakra UI modal; see
+# popup_close_selectors in runtime_config.py).
+POPUP_CLOSE_SELECTORS = CONFIG.popup_close_selectors
+POPUP_CLOSE_SELECTOR = ", ".join(POPUP_CLOSE_SELECTORS)
+
+# Hides the modal and its overlay and gives the page its scrolling back. Applied
+# to every document, so a modal that opens late never covers the panel either.
+POPUP_HIDE_CSS = """
+.chakra-modal__overlay,
+.chakra-modal__content-container,
+.chakra-portal [role='dialog'] {
+    display: none !important;
+}
+body {
+    overflow: auto !important;
+    pointer-events: auto !important;
+}
+"""
+
+# Injects POPUP_HIDE_CSS into each document as soon as it has a root element
+# (for context.add_init_script, which runs before the page's own scripts).
+POPUP_INIT_SCRIPT = """
+(() => {
+    const css = %s;
+    const inject = () => {
+        const style = document.createElement('style');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.documentElement) inject();
+    else document.addEventListener('readystatechange', inject, { once: true });
+})();
+"""
+
+# The modal itself: dismissal only counts once nothing matching this is shown
+# (hidden or detached), checked for up to POPUP_VERIFY_TIMEOUT_MS.
+POPUP_MODAL_SELECTOR = ".chakra-modal__content-container, .chakra-portal [role='dialog']"
+POPUP_VERIFY_TIMEOUT_MS = 2000
+
+# True once no element matching the selector is rendered and visible.
+POPUP_HIDDEN_JS = """
+(selector) => !Array.from(document.querySelectorAll(selector)).some(el =>
+    el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden')
+"""
+
+# Image-matching fallback (opt-in): reference image of the close (cross) button
+# and the matching confidence (requires OpenCV).
+IMAGE_CLOSE = "./images/close_button.png"
+CONFIDENCE = 0.8
+
+# The image search is limited to this centred fraction of the screen, where the
+# modal opens, instead of the full screen.
+IMAGE_REGION_FRACTION = 0.6
+
+def popup_init_script():
+    """
+    POPUP_INIT_SCRIPT with the CSS filled in, for context.add_init_script.
+    """
+    return POPUP_INIT_SCRIPT % json.dumps(POPUP_HIDE_CSS)
+
+# =============================================================================
+# DOM Dismissal
+# =============================================================================
+
+async def dismiss_popup(page, image_fallback=False):
+    """
+    Dismiss the pop-up through the DOM: hide it with POPUP_HIDE_CSS and, if a
+    close button is already rendered, click it too so the site registers the
+    dismissal, then check that no modal (POPUP_MODAL_SELECTOR) is still shown.
+    Does not wait for a pop-up that is not there, so it costs a few round
+    trips when there is none. With `image_fallback`, falls back to clicking
+    the close button on screen if the modal is still shown.
+    Returns True only if the modal is verified hidden or gone.
+    """
+    try:
+        await page.add_style_tag(content=POPUP_HIDE_CSS)
+    except Exception as e:
+        print(f"Could not hide the pop-up with CSS: {e}")
+    try:
+        close_button = await page.query_selector(POPUP_CLOSE_SELECTOR)
+        if close_button is not None:
+            # The button may be hidden by the CSS above, so dispatch the click
+            # directly instead of a pointer click.
+            await close_button.dispatch_event("click")
+            print("Closed the pop-up through the DOM.")
+    except Exception as e:
+        print(f"Could not click the pop-up close button: {e}")
+    try:
+        await page.wait_for_function(POPUP_HIDDEN_JS, arg=POPUP_MODAL_SELECTOR, timeout=POPUP_VERIFY_TIMEOUT_MS)
+        return True
+    except Exception as e:
+        print(f"The pop-up is still shown after DOM dismissal: {e}")
+    if image_fallback:
+        return await asyncio.to_thread(wait_and_click, IMAGE_CLOSE, "pop-up close button",
+                                       STAGE_TIMEOUTS["popup"])
+    return False
+
+# =============================================================================
+# Image Fallback (PyAutoGUI + OpenCV)
+# =============================================================================
+
+@lru_cache(maxsize=None)
+def load_template(image_file):
+    """
+    Load a reference image once, as grayscale, and keep it for later matches.
+    """
+    import cv2
+
+    template = cv2.imread(image_file, cv2.IMREAD_GRAYSCALE)
+    if template is None:
+        raise FileNotFoundError(image_file)
+    return template
+
+def centre_region(fraction=IMAGE_REGION_FRACTION):
+    """
+    (left, top, width, height) of the centred `fraction` of the screen.
+    """
+    import pyautogui
+
+    screen_width, screen_height = pyautogui.size()
+    width, height = int(screen_width * fraction), int(screen_height * fraction)
+    return ((screen_width - width) // 2, (screen_height - height) // 2, width, height)
+
+def wait_and_click(image_file, description, timeout=30, region=None, confidence=CONFIDENCE):
+    """
+    Wait until the given image appears on the screen (within `region`, the
+    centre of the screen by default) and then click its center. Matching uses
+    the cached grayscale template. Needs a real display and an idle mouse.
+    """
+    import pyautogui
+
+    template = load_template(image_file)
+    region = region or centre_region()
+    print(f"Waiting for {description}...")
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        try:
+            location = pyautogui.locateOnScreen(template, confidence=confidence, region=region, grayscale=True)
+        except pyautogui.ImageNotFoundException:
+            location = None
+        if location:
+            center = pyautogui.center(location)
+            pyautogui.moveTo(center.x, center.y, duration=0.25)
+            pyautogui.click()
+            print(f"Clicked on {description}.")
+            return True
+        time.sleep(1)
+    print(f"Timeout: Could not find {description}.")
+    return False
@@ -0,0 +1,141 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from pipeline_metrics import STAGE_SECONDS
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Per-stage timeouts (seconds). Each stage waits on a concrete readiness
+# condition and gives up after its timeout; a stage that takes longer than its
+# budget is reported as over budget.
+STAGE_TIMEOUTS = {
+    "launch": 15,    # Chrome accepts CDP connections
+    "popup": 5,      # pop-up dismissed (or confirmed absent)
+    "ready": 30,     # target panel rendered
+    "extract": 10,   # fields extracted from the panel
+    "persist": 5,    # row stored and token marked analyzed
+}
+
+# Per-token stage timings are appended here, one JSON object per line, by a
+# background writer thread (see stage_log), so finishing a timer on the event
+# loop never waits for the disk.
+STAGE_LOG_PATH = "./data/stage_timings.jsonl"
+
+# =============================================================================
+# Readiness Conditions
+# =============================================================================
+
+def wait_for_cdp(port, timeout=None, interval=0.1):
+    """
+    Block until Chrome answers on its remote debugging port (instead of sleeping
+    a fixed time after launching it). Returns True when ready, False on timeout.
+    """
+    timeout = STAGE_TIMEOUTS["launch"] if timeout is None else timeout
+    deadline = time.time() + timeout
+    url = f"http://localhost:{port}/json/version"
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(interval)
+    return False
+
+def stage_timeout_ms(stage):
+    """
+    Timeout of a stage in milliseconds, for Playwright calls.
+    """
+    return int(STAGE_TIMEOUTS[stage] * 1000)
+
+# =============================================================================
+# Per-Token Stage Timer
+# =============================================================================
+
+# Stage log path -> logger whose records a QueueListener thread appends to it.
+_stage_logs = {}
+
+def stage_log(log_path):
+    """
+    Logger that appends its messages, one per line, to `log_path` from a
+    background thread (the same queue/listener setup as pipeline_log).
+    """
+    logger = _stage_logs.get(log_path)
+    if logger is None:
+        log_dir = os.path.dirname(log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        log_file = logging.FileHandler(log_path, encoding="utf-8")
+        log_file.setFormatter(logging.Formatter("%(message)s"))
+        records = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(records, log_file)
+        listener.start()
+        atexit.register(listener.stop)
+        logger = logging.getLogger(f"gmgn.stages.{len(_stage_logs)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        _stage_logs[log_path] = logger
+    return logger
+
+class StageTimer:
+    """
+    Records how long each pipeline stage took for one token.
+
+        timer = StageTimer(token)
+        with timer.stage("ready"):
+            await page.wait_for_selector(...)
+        timer.finish()
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.started = time.time()
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        STAGE_SECONDS.labels(stage=name).observe(seconds)
+        budget = STAGE_TIMEOUTS.get(name)
+        if budget is not None and seconds > budget:
+            print(f"[{self.token}] stage '{name}' over budget: {seconds:.2f}s > {budget}s")
+
+    def summary(self):
+        parts = [f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.durations.items()]
+        return f"{self.token}: " + " ".join(parts) + f" total={sum(self.durations.values()) * 1000:.0f}ms"
+
+    def finish(self, log_path=STAGE_LOG_PATH):
+        """
+        Print the stage summary and queue it for the stage log.
+        """
+        print(f"Stage timings {self.summary()}")
+        if not log_path:
+            return
+        record = {
+            "token": self.token,
+            "started": self.started,
+            "stages_ms": {name: round(seconds * 1000, 1) for name, seconds in self.durations.items()},
+            "total_ms": round(sum(self.durations.values()) * 1000, 1),
+        }
+        try:
+            stage_log(log_path).info(json.dumps(record))
+        except Exception as e:
+            print(f"Error writing stage timings: {e}")
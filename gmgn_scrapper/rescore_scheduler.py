@@ -0,0 +1,171 @@
+import heapq
+import time
+
+from token_metrics import risk_components
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Seconds after a token's first analysis at which it is scraped again. Sniper
+# share and top-10 concentration move fast right after launch, so the samples
+# are dense at first and then decay. An empty tuple turns re-scoring off.
+RESCORE_SCHEDULE = (30, 120, 600, 3600)
+
+# A token is no longer re-sampled once its last STABLE_SAMPLES samples agree:
+# the same audit verdict, and every risk component (see
+# token_metrics.risk_components, 0-100 each) within STABLE_TOLERANCE points.
+STABLE_SAMPLES = 2
+STABLE_TOLERANCE = 2.0
+
+# Re-samples started per minute at most, across all tokens. First analyses of
+# new tokens are not counted and always go first; re-samples only use workers
+# the new tokens leave idle.
+RESCORE_BUDGET = 20
+
+# =============================================================================
+# Stability
+# =============================================================================
+
+def samples_agree(previous, current, tolerance=STABLE_TOLERANCE):
+    """
+    Whether two stored samples (token_metrics rows) have the same audit
+    verdict and the same risk components within `tolerance` points.
+    """
+    if previous["audit"] != current["audit"]:
+        return False
+    before, after = risk_components(previous), risk_components(current)
+    if before.keys() != after.keys():
+        return False
+    return all(abs(after[name] - before[name]) <= tolerance for name in after)
+
+def is_stable(samples, count=STABLE_SAMPLES, tolerance=STABLE_TOLERANCE):
+    """
+    Whether the last `count` samples of a token (oldest first) all agree.
+    """
+    if count < 2 or len(samples) < count:
+        return False
+    last = samples[-count:]
+    return all(samples_agree(a, b, tolerance) for a, b in zip(last, last[1:]))
+
+# =============================================================================
+# Re-scoring Scheduler
+# =============================================================================
+
+class RescoreScheduler:
+    """
+    Priority queue of the re-samples due for recently analyzed tokens, ordered
+    by due time:
+
+        scheduler.add(token, first_analyzed_at)
+        for token, step, analyzed_at in scheduler.pop_due(limit=idle_workers):
+            ...scrape token again, store the sample...
+            scheduler.record(token, step, samples)
+            # or, if nothing could be scraped: scheduler.add(token, analyzed_at, step + 1)
+
+    Step n is due RESCORE_SCHEDULE[n] seconds after the first analysis. A
+    re-sample that is taken so late that the next step is due as well counts
+    as that later step, so a backlog does not produce bursts of samples of the
+    same token. A token whose samples have become stable (see is_stable)
+    leaves the schedule. pop_due hands out at most `budget` re-samples per
+    minute (a token bucket refilled continuously).
+    """
+
+    def __init__(self, schedule=RESCORE_SCHEDULE, budget=RESCORE_BUDGET):
+        self.schedule = tuple(schedule)
+        self.budget = budget
+        self._heap = []
+        # token -> (first analysis time, step) of its pending re-sample.
+        self._pending = {}
+        self._tokens = float(budget)
+        self._refilled = None
+        self.stats = {"scheduled": 0, "started": 0, "stable": 0, "coalesced": 0, "finished": 0}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, token, analyzed_at, step=0):
+        """
+        Schedule re-sample `step` of a token first analyzed at `analyzed_at`
+        (epoch seconds). Replaces any pending re-sample of the token.
+        """
+        if step >= len(self.schedule):
+            self._pending.pop(token, None)
+            self.stats["finished"] += 1
+            return
+        self._pending[token] = (analyzed_at, step)
+        heapq.heappush(self._heap, (analyzed_at + self.schedule[step], step, token))
+        self.stats["scheduled"] += 1
+
+    def record(self, token, step, samples):
+        """
+        Schedule the step after `step` unless the token's samples (oldest
+        first, including the one just taken) have become stable.
+        """
+        if not samples:
+            return
+        if is_stable(samples):
+            self._pending.pop(token, None)
+            self.stats["stable"] += 1
+            return
+        self.add(token, samples[0]["updated_at"], step + 1)
+
+    def restore(self, histories):
+        """
+        Rebuild the schedule after a restart from the stored samples of
+        recently analyzed tokens ({address: [rows oldest first]}, see
+        TokenMetrics.recent_histories). Returns the number of tokens scheduled.
+        """
+        before = len(self._pending)
+        for token, samples in histories.items():
+            if not is_stable(samples):
+                # The first sample is the first analysis; each later one a step.
+                self.add(token, samples[0]["updated_at"], len(samples) - 1)
+        return len(self._pending) - before
+
+    def next_due(self):
+        """
+        Epoch seconds at which the earliest pending re-sample is due, or None.
+        """
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, limit, now=None):
+        """
+        Up to `limit` re-samples that are due, within the budget, as
+        [(token, step, first analysis time)], earliest first. The tokens are no longer pending
+        until record() schedules their next step.
+        """
+        now = time.time() if now is None else now
+        self._refill(now)
+        due = []
+        while len(due) < limit and self._tokens >= 1:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, step, token = heapq.heappop(self._heap)
+            analyzed_at, _ = self._pending.pop(token)
+            late_step = step
+            while late_step + 1 < len(self.schedule) and analyzed_at + self.schedule[late_step + 1] <= now:
+                late_step += 1
+            self.stats["coalesced"] += late_step - step
+            self._tokens -= 1
+            self.stats["started"] += 1
+            due.append((token, late_step, analyzed_at))
+        return due
+
+    def _refill(self, now):
+        if self._refilled is not None and now > self._refilled:
+            self._tokens = min(float(self.budget), self._tokens + (now - self._refilled) * self.budget / 60)
+        if self._refilled is None or now > self._refilled:
+            self._refilled = now
+
+    def _discard_stale(self):
+        # Entries replaced by a later add() or dropped as stable stay in the
+        # heap until they reach the top.
+        while self._heap:
+            due_at, step, token = self._heap[0]
+            pending = self._pending.get(token)
+            if pending is not None and pending[1] == step and pending[0] + self.schedule[step] == due_at:
+                return
+            heapq.heappop(self._heap)
@@ -0,0 +1,250 @@
+import dataclasses
+import glob
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import zlib
+from typing import Optional
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Settings are read from this JSON file if it exists (any subset of the
+# RuntimeConfig fields), then overridden by GMGN_<FIELD> environment variables,
+# e.g. GMGN_INSTANCE=2 or GMGN_CHROME_PATH=/usr/bin/chromium. Lists are given
+# as JSON in the environment. GMGN_CONFIG names another file.
+CONFIG_PATH = "./config.json"
+ENV_PREFIX = "GMGN_"
+
+# Chrome executables tried in order when chrome_path is not set: commands on
+# the PATH, then fixed install locations, then the Chromium Playwright
+# downloads (`playwright install chromium`).
+CHROME_COMMANDS = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+CHROME_LOCATIONS = {
+    "Linux": ["/usr/bin/google-chrome", "/usr/bin/chromium", "/usr/bin/chromium-browser", "/snap/bin/chromium",
+              "/opt/google/chrome/chrome"],
+    "Darwin": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+               "/Applications/Chromium.app/Contents/MacOS/Chromium"],
+    "Windows": [r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+                r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+                os.path.expandvars(r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe")],
+}
+PLAYWRIGHT_CACHES = {
+    "Linux": ("~/.cache/ms-playwright", ["chromium-*/chrome-linux*/chrome"]),
+    "Darwin": ("~/Library/Caches/ms-playwright", ["chromium-*/chrome-mac*/Chromium.app/Contents/MacOS/Chromium"]),
+    "Windows": (r"~\AppData\Local\ms-playwright", [r"chromium-*\chrome-win*\chrome.exe"]),
+}
+
+# Each process runs as one instance of a role and gets its own Chrome profile
+# (<profile_dir>/<role>[-<instance>]) and CDP port (cdp_port + the role's
+# offset + instance), so several can run side by side on one host.
+ROLE_PORT_OFFSETS = {"discovery": 0, "analyzer": 100}
+MAX_INSTANCES = 100
+
+@dataclasses.dataclass
+class RuntimeConfig:
+    """
+    Deployment settings shared by the discovery, analyzer and API scripts.
+    """
+    # Chrome/Chromium executable; None auto-detects it (see find_chrome).
+    chrome_path: Optional[str] = None
+    # Extra Chrome flags, e.g. ["--no-sandbox"] when running as root in a container.
+    chrome_args: list = dataclasses.field(default_factory=list)
+    # Parent directory of the per-instance Chrome profiles; None uses
+    # <temp dir>/gmgn_chrome_profiles.
+    profile_dir: Optional[str] = None
+    # First CDP port; see ROLE_PORT_OFFSETS.
+    cdp_port: int = 9223
+    # Run Chrome without a window; None does so only on Linux without a display.
+    headless: Optional[bool] = None
+
+    # This process's instance of its role (0-based), and how many instances of
+    # each role run. Discovery instances split discovery_feeds between them and
+    # serve the token bus on bus_port + instance; analyzer instances split the
+    # tokens by address (see owns_token).
+    instance: int = 0
+    discovery_instances: int = 1
+    analyzer_instances: int = 1
+
+    # Names of the discovery feeds to watch (see FEED_CATALOG in main.py). Only
+    # "sol" by default; "sol-pump" and "sol-moonshot" are opt-in.
+    discovery_feeds: list = dataclasses.field(default_factory=lambda: ["sol"])
+
+    bus_host: str = "127.0.0.1"
+    bus_port: int = 8765
+
+    # gmgn pages and selectors.
+    new_pair_url: str = "https://gmgn.ai/new-pair?chain=sol"
+    token_url: str = "https://gmgn.ai/sol/token/{placeholder}"
+    target_selector: str = "div.css-1jy8g2v"
+    coin_container_selector: str = "div.g-table-tbody-virtual-holder-inner"
+    coin_link_selector: str = "a.css-5uoabp"
+    popup_close_selectors: list = dataclasses.field(default_factory=lambda: [
+        "button.chakra-modal__close-btn",
+        ".chakra-modal__content button[aria-label='Close']",
+        "[role='dialog'] button[aria-label='Close']",
+    ])
+
+# =============================================================================
+# Loading
+# =============================================================================
+
+def _field_type(field):
+    # Optional[X] -> X
+    return next((t for t in getattr(field.type, "__args__", ()) if t is not type(None)), field.type)
+
+def _coerce(field, value, source):
+    """
+    `value` (from JSON or an environment string) as the field's type.
+    """
+    kind = _field_type(field)
+    if value is None or (isinstance(value, str) and value.lower() in ("", "none", "null")):
+        if field.type is kind:
+            raise ValueError(f"{source}: {field.name} cannot be empty")
+        return None
+    if kind is bool:
+        if isinstance(value, str):
+            if value.lower() not in ("1", "true", "yes", "on", "0", "false", "no", "off"):
+                raise ValueError(f"{source}: {field.name} must be true or false, not {value!r}")
+            return value.lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    if kind is list:
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{source}: {field.name} must be a JSON list ({e})") from None
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"{source}: {field.name} must be a list of strings")
+        return value
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{source}: {field.name} must be {kind.__name__}, not {value!r}") from None
+
+def load_config(path=None, environ=None):
+    """
+    Defaults, overridden by the config file (`path`, else $GMGN_CONFIG, else
+    CONFIG_PATH if it exists), overridden by GMGN_* environment variables.
+    Raises ValueError for unknown keys and values of the wrong type.
+    """
+    environ = os.environ if environ is None else environ
+    fields = {field.name: field for field in dataclasses.fields(RuntimeConfig)}
+    values = {}
+
+    path = path or environ.get(ENV_PREFIX + "CONFIG")
+    if path or os.path.exists(CONFIG_PATH):
+        path = path or CONFIG_PATH
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        unknown = sorted(set(data) - set(fields))
+        if unknown:
+            raise ValueError(f"{path}: unknown settings {', '.join(unknown)}")
+        for name, value in data.items():
+            values[name] = _coerce(fields[name], value, path)
+
+    for name, field in fields.items():
+        if ENV_PREFIX + name.upper() in environ:
+            values[name] = _coerce(field, environ[ENV_PREFIX + name.upper()], ENV_PREFIX + name.upper())
+
+    config = RuntimeConfig(**values)
+    for name in ("discovery_instances", "analyzer_instances"):
+        if not 1 <= getattr(config, name) <= MAX_INSTANCES:
+            raise ValueError(f"{name} must be between 1 and {MAX_INSTANCES}")
+    if config.instance < 0:
+        raise ValueError("instance must be 0 or more")
+    return config
+
+# =============================================================================
+# Chrome and Per-instance Resources
+# =============================================================================
+
+def find_chrome(system=None):
+    """
+    Path of an installed Chrome or Chromium (see CHROME_COMMANDS,
+    CHROME_LOCATIONS and PLAYWRIGHT_CACHES), or None.
+    """
+    system = system or platform.system()
+    for command in CHROME_COMMANDS:
+        path = shutil.which(command)
+        if path:
+            return path
+    for path in CHROME_LOCATIONS.get(system, []):
+        if os.path.isfile(path):
+            return path
+    cache, patterns = PLAYWRIGHT_CACHES.get(system, (None, []))
+    cache = os.environ.get("PLAYWRIGHT_BROWSERS_PATH") or (cache and os.path.expanduser(cache))
+    for pattern in patterns:
+        # Newest download first.
+        matches = sorted(glob.glob(os.path.join(cache, pattern)), reverse=True)
+        if matches:
+            return matches[0]
+    return None
+
+def resolve_chrome(config):
+    """
+    The configured Chrome executable, else the auto-detected one. Raises
+    FileNotFoundError if there is none.
+    """
+    path = config.chrome_path or find_chrome()
+    if not path:
+        raise FileNotFoundError("No Chrome or Chromium found; install one (e.g. `playwright install chromium`) "
+                                "or set chrome_path in the config (GMGN_CHROME_PATH).")
+    return path
+
+def resolve_headless(config):
+    if config.headless is not None:
+        return config.headless
+    return sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def instance_name(role, config):
+    """
+    "analyzer" for instance 0, "analyzer-2" for instance 2: names the files
+    each process keeps for itself (checkpoints, metric snapshots, logs).
+    """
+    return role if config.instance == 0 else f"{role}-{config.instance}"
+
+def instance_file(path, config):
+    """
+    `path` for instance 0, else with "-<instance>" before its extension.
+    """
+    if config.instance == 0:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{config.instance}{ext}"
+
+def browser_slot(role, config):
+    """
+    (CDP port, Chrome profile directory) of this process's instance of `role`
+    ("discovery" or "analyzer").
+    """
+    count = getattr(config, f"{role}_instances")
+    if config.instance >= count:
+        raise ValueError(f"instance {config.instance} is out of range: {role}_instances is {count}")
+    root = config.profile_dir or os.path.join(tempfile.gettempdir(), "gmgn_chrome_profiles")
+    return config.cdp_port + ROLE_PORT_OFFSETS[role] + config.instance, os.path.join(root, instance_name(role, config))
+
+def owns_token(token, config):
+    """
+    Whether this analyzer instance analyzes `token`. A stable hash of the
+    address, so every instance agrees and a token always goes to the same one.
+    """
+    return config.analyzer_instances == 1 or \
+        zlib.crc32(token.encode()) % config.analyzer_instances == config.instance
+
+# Loaded once per process, when first imported.
+CONFIG = load_config()
+
+if __name__ == "__main__":
+    # python runtime_config.py  -- print the settings this process would use.
+    for field in dataclasses.fields(RuntimeConfig):
+        print(f"{field.name} = {getattr(CONFIG, field.name)!r}")
+    print(f"detected chrome = {find_chrome()!r}  headless = {resolve_headless(CONFIG)}")
+    for role in ROLE_PORT_OFFSETS:
+        if CONFIG.instance < getattr(CONFIG, f"{role}_instances"):
+            port, profile = browser_slot(role, CONFIG)
+            print(f"{role} instance {CONFIG.instance}: CDP port {port}, profile {profile}")
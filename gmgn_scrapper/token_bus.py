@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+
+from runtime_config import CONFIG
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Local socket the discovery process publishes new tokens on. The analyzer and
+# the API connect to it as subscribers. With several discovery instances (see
+# runtime_config.py), instance n publishes on BUS_PORT + n and subscribers
+# listen to all DISCOVERY_INSTANCES of them.
+BUS_HOST = CONFIG.bus_host
+BUS_PORT = CONFIG.bus_port
+DISCOVERY_INSTANCES = CONFIG.discovery_instances
+
+# Events buffered per subscriber. A subscriber that falls this far behind loses
+# its oldest events instead of slowing the publisher down.
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Delay before a remote subscriber reconnects, doubled on each consecutive failure.
+RECONNECT_BACKOFF = 0.5
+MAX_RECONNECT_BACKOFF = 10
+
+# =============================================================================
+# In-process Bus
+# =============================================================================
+
+def make_event(token, source="discovery", timestamp=None, chain=None):
+    """
+    The event published for a token: {"token", "source", "ts"} (ts in epoch
+    seconds), plus "chain" when the publisher knows it. Discovery sets source
+    to the name of the feed that found the token.
+    """
+    event = {"token": token, "source": source, "ts": timestamp or time.time()}
+    if chain:
+        event["chain"] = chain
+    return event
+
+class TokenBus:
+    """
+    Broadcasts token events to every subscriber inside one process. Each
+    subscriber gets its own bounded asyncio queue, so a token published by one
+    stage is in the next stage's hands on the next event loop iteration.
+
+        bus = TokenBus()
+        queue = bus.subscribe()
+        bus.publish(make_event(token))
+        event = await queue.get()
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = []
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    def publish(self, event):
+        """
+        Hand the event to every subscriber without waiting for any of them.
+        """
+        self.published += 1
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+
+    def publish_tokens(self, tokens, source="discovery", chain=None):
+        timestamp = time.time()
+        for token in tokens:
+            self.publish(make_event(token, source, timestamp, chain))
+
+# =============================================================================
+# Cross-process Transport (newline-delimited JSON over a local socket)
+# =============================================================================
+
+async def serve_bus(bus, host=None, port=None):
+    """
+    Expose `bus` on a local TCP socket (BUS_HOST:BUS_PORT by default): every
+    connected client receives each published event as one JSON line. Returns
+    the asyncio server.
+    """
+    host = host or BUS_HOST
+    port = port or BUS_PORT
+
+    async def handle(reader, writer):
+        queue = bus.subscribe()
+        peer = writer.get_extra_info("peername")
+        print(f"Token bus subscriber connected: {peer}")
+        # Subscribers never send anything; the read only completes when the
+        # client disconnects, so an idle handler does not outlive its client.
+        disconnected = asyncio.ensure_future(reader.read())
+        try:
+            while True:
+                next_event = asyncio.ensure_future(queue.get())
+                await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_event.done():
+                    next_event.cancel()
+                    break
+                writer.write((json.dumps(next_event.result()) + "\n").encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            disconnected.cancel()
+            bus.unsubscribe(queue)
+            writer.close()
+            print(f"Token bus subscriber disconnected: {peer}")
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Token bus listening on {host}:{port}.")
+    return server
+
+async def subscribe_remote(host=None, port=None):
+    """
+    Async generator of events from the bus served by another process
+    (BUS_HOST:BUS_PORT by default). Reconnects (with backoff) whenever the
+    publisher is not running or goes away; events published while
+    disconnected are not replayed.
+    """
+    host = host or BUS_HOST
+    port = port or BUS_PORT
+    backoff = RECONNECT_BACKOFF
+    warned = False
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if not warned:
+                print(f"Token bus at {host}:{port} not reachable; retrying...")
+                warned = True
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_RECONNECT_BACKOFF)
+            continue
+        print(f"Subscribed to the token bus at {host}:{port}.")
+        warned = False
+        backoff = RECONNECT_BACKOFF
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"Ignoring malformed token bus message: {line[:80]!r}")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+        print("Token bus connection lost; reconnecting...")
+
+def bus_port(instance=0):
+    """
+    Port the bus of discovery instance `instance` is served on.
+    """
+    return BUS_PORT + instance
+
+async def subscribe_all(host=None, ports=None):
+    """
+    Async generator of the events of every discovery instance's bus (all
+    DISCOVERY_INSTANCES by default), merged in arrival order; each connection
+    reconnects on its own as in subscribe_remote.
+    """
+    ports = ports or [bus_port(i) for i in range(DISCOVERY_INSTANCES)]
+    if len(ports) == 1:
+        async for event in subscribe_remote(host, ports[0]):
+            yield event
+        return
+    queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    async def forward(port):
+        async for event in subscribe_remote(host, port):
+            await queue.put(event)
+
+    tasks = [asyncio.create_task(forward(port)) for port in ports]
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
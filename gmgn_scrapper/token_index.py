@@ -0,0 +1,175 @@
+import glob
+import os
+import sqlite3
+import sys
+import time
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Shared by the discovery and analysis scripts.
+TOKEN_INDEX_PATH = "./data/tokens.db"
+
+# Legacy sources imported by migrate_legacy.
+LEGACY_DATA_DIR = "./data"
+LEGACY_TOKEN_FILE = "./data/new_coins.txt"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    address     TEXT PRIMARY KEY,
+    first_seen  REAL NOT NULL,
+    analyzed_at REAL,
+    chain       TEXT,
+    source      TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# =============================================================================
+# Token Index
+# =============================================================================
+
+class TokenIndex:
+    """
+    Restart-safe index of every token that has been seen by discovery and/or
+    analyzed. Backed by SQLite in WAL mode so the discovery and analysis
+    processes can read and write it at the same time; lookups are primary-key
+    probes, and the full set of seen tokens loads in one query at startup.
+    """
+
+    def __init__(self, db_path=TOKEN_INDEX_PATH):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Indexes created before tokens were tagged lack these columns; their
+        # rows (chain NULL) are Solana tokens.
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tokens)")}
+        for column in ("chain", "source"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE tokens ADD COLUMN {column} TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def seen_tokens(self):
+        """
+        Return the set of all tokens recorded so far.
+        """
+        return {row[0] for row in self.conn.execute("SELECT address FROM tokens")}
+
+    def mark_seen(self, addresses, seen_at=None, chain=None, source=None):
+        """
+        Record tokens found by discovery (in one transaction), tagged with their
+        chain and the feed that found them first. Returns the ones that were
+        not in the index before.
+        """
+        seen_at = seen_at or time.time()
+        new_addresses = []
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for address in addresses:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO tokens (address, first_seen, chain, source) VALUES (?, ?, ?, ?)",
+                    (address, seen_at, chain, source),
+                )
+                if cur.rowcount:
+                    new_addresses.append(address)
+        return new_addresses
+
+    def pending_tokens(self, since=0, chains=None):
+        """
+        Tokens first seen at or after `since` (epoch seconds) that have not
+        been analyzed yet, oldest first; only those on `chains` if given
+        (untagged tokens count as "sol").
+        """
+        query = "SELECT address FROM tokens WHERE analyzed_at IS NULL AND first_seen >= ?"
+        params = [since]
+        if chains:
+            query += f" AND COALESCE(chain, 'sol') IN ({', '.join('?' * len(chains))})"
+            params.extend(chains)
+        return [row[0] for row in self.conn.execute(query + " ORDER BY first_seen", params)]
+
+    def is_seen(self, address):
+        return self.conn.execute("SELECT 1 FROM tokens WHERE address = ?", (address,)).fetchone() is not None
+
+    def first_seen(self, address):
+        """
+        When the token was first discovered (epoch seconds), or None.
+        """
+        row = self.conn.execute("SELECT first_seen FROM tokens WHERE address = ?", (address,)).fetchone()
+        return row[0] if row else None
+
+    def is_analyzed(self, address):
+        row = self.conn.execute("SELECT analyzed_at FROM tokens WHERE address = ?", (address,)).fetchone()
+        return row is not None and row[0] is not None
+
+    def mark_analyzed(self, address, analyzed_at=None):
+        analyzed_at = analyzed_at or time.time()
+        self.conn.execute(
+            "INSERT INTO tokens (address, first_seen, analyzed_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(address) DO UPDATE SET analyzed_at = excluded.analyzed_at",
+            (address, analyzed_at, analyzed_at),
+        )
+
+    # -------------------------------------------------------------------------
+    # Migration from the file-based state
+    # -------------------------------------------------------------------------
+
+    def needs_migration(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'legacy_migrated'").fetchone()
+        return row is None
+
+    def migrate_legacy(self, data_dir=LEGACY_DATA_DIR, token_file=LEGACY_TOKEN_FILE):
+        """
+        Import the tokens listed in the token file (as seen) and every per-token
+        CSV in data_dir (as analyzed, timestamped with the file's mtime).
+        Safe to run more than once. Returns (seen, analyzed) counts.
+        """
+        seen = 0
+        if os.path.exists(token_file):
+            with open(token_file, "r", encoding="utf-8") as f:
+                addresses = [line.strip() for line in f if line.strip()]
+            seen = len(self.mark_seen(addresses, seen_at=os.path.getmtime(token_file)))
+
+        analyzed = 0
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for csv_path in glob.glob(os.path.join(data_dir, "*.csv")):
+                address = os.path.splitext(os.path.basename(csv_path))[0]
+                if address.startswith("output_"):
+                    continue
+                mtime = os.path.getmtime(csv_path)
+                self.conn.execute(
+                    "INSERT INTO tokens (address, first_seen, analyzed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(address) DO UPDATE SET analyzed_at = COALESCE(analyzed_at, excluded.analyzed_at)",
+                    (address, mtime, mtime),
+                )
+                analyzed += 1
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_migrated', ?)", (str(time.time()),))
+        return seen, analyzed
+
+def open_token_index(db_path=TOKEN_INDEX_PATH):
+    """
+    Open the shared token index, importing the legacy files on first use.
+    """
+    index = TokenIndex(db_path)
+    if index.needs_migration():
+        seen, analyzed = index.migrate_legacy()
+        print(f"Token index migrated: {seen} seen tokens, {analyzed} analyzed tokens imported.")
+    return index
+
+if __name__ == "__main__":
+    # python token_index.py [db_path]  -- (re-)run the legacy import explicitly.
+    index = TokenIndex(sys.argv[1] if len(sys.argv) > 1 else TOKEN_INDEX_PATH)
+    seen, analyzed = index.migrate_legacy()
+    print(f"Imported {seen} new seen tokens and {analyzed} analyzed tokens into {index.db_path}.")
+    index.close()
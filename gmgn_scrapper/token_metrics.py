@@ -0,0 +1,303 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from extractor import to_typed
+from token_index import TOKEN_INDEX_PATH
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Weights of the composite risk score (0 = lowest risk, 100 = highest). Each
+# component is scaled to 0-100; components that are missing for a token are
+# left out and the remaining weights renormalized.
+RISK_WEIGHTS = {
+    "top10": 0.30,         # share held by the ten largest holders
+    "snipers": 0.20,       # share of snipers still holding
+    "audit": 0.25,         # share of failed audit checks
+    "rug_prob": 0.25,      # rug probability
+}
+
+# Rows returned by query() when no limit is given, and the most it returns.
+DEFAULT_QUERY_LIMIT = 50
+MAX_QUERY_LIMIT = 500
+
+# Hot rows kept in memory by TokenMetricsCache, and how long a cached row is
+# served before it is read again (rows change when a token is re-analyzed).
+CACHE_SIZE = 10000
+CACHE_TTL = 5
+
+COLUMNS = ["address", "updated_at", "snipers", "snipers_total", "bluechip", "top10", "audit",
+           "audit_passed", "audit_total", "rug_prob", "risk", "raw"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS token_metrics (
+    address       TEXT PRIMARY KEY,
+    updated_at    REAL NOT NULL,
+    snipers       INTEGER,
+    snipers_total INTEGER,
+    bluechip      REAL,
+    top10         REAL,
+    audit         TEXT,
+    audit_passed  INTEGER,
+    audit_total   INTEGER,
+    rug_prob      REAL,
+    risk          REAL,
+    raw           TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS token_metrics_updated ON token_metrics (updated_at);
+CREATE INDEX IF NOT EXISTS token_metrics_top10 ON token_metrics (top10, updated_at);
+CREATE INDEX IF NOT EXISTS token_metrics_audit ON token_metrics (audit, updated_at);
+CREATE INDEX IF NOT EXISTS token_metrics_risk ON token_metrics (risk, updated_at);
+CREATE TABLE IF NOT EXISTS token_metrics_history (
+    address       TEXT NOT NULL,
+    updated_at    REAL NOT NULL,
+    snipers       INTEGER,
+    snipers_total INTEGER,
+    bluechip      REAL,
+    top10         REAL,
+    audit         TEXT,
+    audit_passed  INTEGER,
+    audit_total   INTEGER,
+    rug_prob      REAL,
+    risk          REAL,
+    raw           TEXT,
+    PRIMARY KEY (address, updated_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS token_metrics_history_updated ON token_metrics_history (updated_at);
+"""
+
+# =============================================================================
+# Risk Score
+# =============================================================================
+
+def risk_components(typed):
+    """
+    The 0-100 risk components available for a token's typed metrics (see
+    extractor.to_typed).
+    """
+    components = {}
+    if typed["top10"] is not None:
+        components["top10"] = min(max(typed["top10"], 0.0), 100.0)
+    if typed["snipers"] is not None and typed["snipers_total"]:
+        components["snipers"] = min(typed["snipers"] / typed["snipers_total"], 1.0) * 100
+    if typed["audit_passed"] is not None and typed["audit_total"]:
+        components["audit"] = (1 - min(typed["audit_passed"] / typed["audit_total"], 1.0)) * 100
+    if typed["rug_prob"] is not None:
+        components["rug_prob"] = min(max(typed["rug_prob"], 0.0), 100.0)
+    return components
+
+def risk_score(typed):
+    """
+    Composite risk score (0-100, one decimal) of a token's typed metrics, or
+    None if none of its components are known.
+    """
+    components = risk_components(typed)
+    weight = sum(RISK_WEIGHTS[name] for name in components)
+    if not weight:
+        return None
+    return round(sum(RISK_WEIGHTS[name] * value for name, value in components.items()) / weight, 1)
+
+# =============================================================================
+# Token Metrics Store
+# =============================================================================
+
+class TokenMetrics:
+    """
+    Latest typed metrics of every analyzed token, one row per token, in the
+    shared SQLite database. Values are parsed and the risk score computed once
+    at ingest, so reads are an index lookup; filtered queries use the indexes
+    on top10, audit, risk and updated_at. Every ingested sample is also kept
+    in token_metrics_history, the time series of a re-scored token.
+    """
+
+    def __init__(self, db_path=TOKEN_INDEX_PATH):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def ingest(self, token, raw, updated_at=None):
+        """
+        Store the raw strings extracted for a token (as returned by
+        extract_data), replacing its previous row, and append them to its
+        history. Returns the stored row.
+        """
+        typed = to_typed(raw)
+        row = {
+            "address": token,
+            "updated_at": updated_at or time.time(),
+            **{column: typed[column] for column in COLUMNS[2:-2]},
+            "risk": risk_score(typed),
+            "raw": json.dumps(raw),
+        }
+        values = [row[column] for column in COLUMNS]
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO token_metrics ({', '.join(COLUMNS)}) VALUES ({placeholders})", values)
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO token_metrics_history ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                    values)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return self._decode(row)
+
+    def get(self, address):
+        """
+        The stored row of a token as a dict, or None if it was never analyzed.
+        """
+        with self._lock:
+            values = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM token_metrics WHERE address = ?", (address,)
+            ).fetchone()
+        return self._decode(dict(zip(COLUMNS, values))) if values else None
+
+    def history(self, address, since=None):
+        """
+        Every stored sample of a token (updated at or after `since`, epoch
+        seconds), oldest first.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM token_metrics_history "
+                f"WHERE address = ? AND updated_at >= ? ORDER BY updated_at",
+                (address, since or 0),
+            ).fetchall()
+        return [self._decode(dict(zip(COLUMNS, values))) for values in rows]
+
+    def recent_histories(self, since):
+        """
+        The samples of every token first analyzed at or after `since` (epoch
+        seconds), as {address: [rows oldest first]}.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM token_metrics_history WHERE address IN "
+                f"(SELECT address FROM token_metrics_history GROUP BY address HAVING MIN(updated_at) >= ?) "
+                f"ORDER BY address, updated_at",
+                (since,),
+            ).fetchall()
+        histories = {}
+        for values in rows:
+            row = self._decode(dict(zip(COLUMNS, values)))
+            histories.setdefault(row["address"], []).append(row)
+        return histories
+
+    def query(self, max_top10=None, audit=None, since=None, max_risk=None, max_rug_prob=None,
+              limit=DEFAULT_QUERY_LIMIT):
+        """
+        Rows matching every given filter, most recently updated first.
+        `since` is in epoch seconds; `audit` is the verdict ("Safe"/"Risk").
+        """
+        clauses, params = [], []
+        for clause, value in (("top10 <= ?", max_top10), ("audit = ?", audit), ("updated_at >= ?", since),
+                              ("risk <= ?", max_risk), ("rug_prob <= ?", max_rug_prob)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        limit = max(1, min(limit or DEFAULT_QUERY_LIMIT, MAX_QUERY_LIMIT))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM token_metrics {where}ORDER BY updated_at DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [self._decode(dict(zip(COLUMNS, values))) for values in rows]
+
+    def _decode(self, row):
+        row = dict(row)
+        row["raw"] = json.loads(row["raw"]) if row["raw"] else None
+        return row
+
+    def import_metrics_store(self, directory=None):
+        """
+        Ingest the latest row per token from the Parquet metrics store. Returns
+        the number of tokens imported.
+        """
+        import pandas as pd
+        from metrics_store import METRICS_DIR, METRIC_FIELDS, load_metrics
+
+        df = load_metrics(directory or METRICS_DIR, raw=True)
+        latest = df.drop_duplicates("token", keep="last")
+        for record in latest.to_dict("records"):
+            raw = {field: None if pd.isna(record[field]) else record[field] for field in METRIC_FIELDS}
+            self.ingest(record["token"], raw, record["timestamp"].timestamp())
+        return len(latest)
+
+# =============================================================================
+# LRU Cache of Hot Rows
+# =============================================================================
+
+class TokenMetricsCache:
+    """
+    LRU cache in front of TokenMetrics.get for the API: the CACHE_SIZE most
+    recently requested rows are served from memory for up to CACHE_TTL seconds.
+    Tokens that were never analyzed are cached too (as None), so repeated
+    lookups of unknown addresses do not hit the database either.
+    """
+
+    def __init__(self, metrics, size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.metrics = metrics
+        self.size = size
+        self.ttl = ttl
+        self._rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, address):
+        found, row = self.lookup(address)
+        if not found:
+            row = self.metrics.get(address)
+            self.put(address, row)
+        return row
+
+    def lookup(self, address):
+        """
+        (True, row) if `address` is cached and fresh, else (False, None),
+        without touching the database: the API reads misses from a worker
+        thread and then puts the row.
+        """
+        entry = self._rows.get(address)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self._rows.move_to_end(address)
+            self.hits += 1
+            return True, entry[0]
+        self.misses += 1
+        return False, None
+
+    def put(self, address, row, now=None):
+        self._rows[address] = (row, now if now is not None else time.monotonic())
+        self._rows.move_to_end(address)
+        if len(self._rows) > self.size:
+            self._rows.popitem(last=False)
+
+    def invalidate(self, address):
+        self._rows.pop(address, None)
+
+if __name__ == "__main__":
+    # python token_metrics.py import [metrics_dir]  -- load the Parquet metrics store
+    command = sys.argv[1] if len(sys.argv) > 1 else "import"
+    if command == "import":
+        metrics = TokenMetrics()
+        count = metrics.import_metrics_store(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"Imported the latest metrics of {count} tokens into {metrics.db_path}.")
+    else:
+        print(f"Unknown command: {command}")
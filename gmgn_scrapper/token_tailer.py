@@ -0,0 +1,107 @@
+import json
+import os
+from collections import deque
+
+# =============================================================================
+# Incremental Token File Tailer
+# =============================================================================
+
+class TokenTailer:
+    """
+    Follows the token file the discovery script appends to. Only the bytes
+    appended since the last read are parsed, and every unseen token is kept in
+    a pending queue so none are skipped while a scrape is in progress.
+
+    The byte offset and the pending tokens are stored in a small JSON state file
+    next to the token file, so a restart resumes where the last run stopped.
+    """
+
+    def __init__(self, file_path, state_path=None, order="fifo"):
+        """
+        :param file_path: Token file to follow (one address per line).
+        :param state_path: Where to persist the offset (default: <file_path>.offset).
+        :param order: "fifo" to hand out tokens oldest first, "newest" for newest first.
+        """
+        if order not in ("fifo", "newest"):
+            raise ValueError(f"Unknown token order: {order}")
+        self.file_path = file_path
+        self.state_path = state_path or file_path + ".offset"
+        self.order = order
+        self.offset = 0
+        self.pending = deque()
+        self._pending_set = set()
+        self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.offset = int(state.get("offset", 0))
+            for token in state.get("pending", []):
+                self._push(token)
+        except Exception as e:
+            print(f"Could not read tailer state {self.state_path} ({e}); starting from the beginning.")
+            self.offset = 0
+            self.pending.clear()
+            self._pending_set.clear()
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"offset": self.offset, "pending": list(self.pending)}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _push(self, token):
+        if token in self._pending_set:
+            return
+        self._pending_set.add(token)
+        if self.order == "newest":
+            self.pending.appendleft(token)
+        else:
+            self.pending.append(token)
+
+    def poll(self):
+        """
+        Read the lines appended since the last call and queue their tokens.
+        A partially written last line is left for the next call. Returns the
+        list of tokens read in this call.
+        """
+        if not os.path.exists(self.file_path):
+            return []
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:
+            print(f"Token file {self.file_path} shrank; re-reading from the start.")
+            self.offset = 0
+        if size == self.offset:
+            return []
+        with open(self.file_path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return []
+        self.offset += end + 1
+        tokens = []
+        for line in chunk[:end].decode("utf-8", errors="replace").splitlines():
+            token = line.strip()
+            if token:
+                tokens.append(token)
+                self._push(token)
+        self._save_state()
+        return tokens
+
+    def next_token(self):
+        """
+        Pop the next pending token (None when the backlog is empty).
+        """
+        if not self.pending:
+            return None
+        token = self.pending.popleft()
+        self._pending_set.discard(token)
+        self._save_state()
+        return token
+
+    def __len__(self):
+        return len(self.pending)